@@ -1,14 +1,48 @@
 from wireup import initialize_container, create_container
 
 from app.core.database import Database
+from app.core.http_client import HttpClient
+from app.core.metrics import Metrics
+from app.core.route_cache import RouteCache
+from app.core.store import FleetStore
+from app.core.telemetry import TelemetryWriter
+from app.core.tracing import Tracer
+from app.routing.base import RoutingBackend
+from app.routing.contraction import ContractionHierarchy
+from app.routing.google import GoogleRoutingBackend
+from app.routing.graph import RoadGraph
+from app.routing.local import LocalRoutingBackend
+from app.services.google_maps import GoogleMapsService
 from app import repositories, services
 from configs.settings import Settings
 
 
+def routing_backend(
+    settings: Settings,
+    maps: GoogleMapsService,
+    http_client: HttpClient,
+    route_cache: RouteCache
+) -> RoutingBackend:
+    if settings.ROUTING_BACKEND == "local":
+        return LocalRoutingBackend(
+            RoadGraph.load(settings.ROUTING_GRAPH_PATH),
+            ContractionHierarchy.load_all(settings.ROUTING_GRAPH_PATH)
+        )
+
+    return GoogleRoutingBackend(settings, maps, http_client, route_cache)
+
+
 def init_dependencies() -> None:
     container = create_container()
     container.register(Settings)
+    container.register(Metrics)
+    container.register(Tracer)
     container.register(Database)
+    container.register(HttpClient)
+    container.register(RouteCache)
+    container.register(FleetStore)
+    container.register(TelemetryWriter)
+    container.register(routing_backend)
     initialize_container(container, service_modules=[repositories, services])
 
     return container
@@ -1,6 +1,8 @@
 import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable
+
+import asyncpg
 
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import (
@@ -10,21 +12,26 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
 )
 
+from app.core.metrics import Metrics, timed_pool
 from app.exceptions.infrastructure import DatabaseUnreachableError
 from configs.settings import Settings
 
 
 class Database:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, metrics: Metrics) -> None:
         self._engine = create_async_engine(
             url=settings.POSTGRES_URI,
-            echo=True,
+            poolclass=timed_pool(metrics.pool_checkout),
+            # Statements are logged through app.core.log when SQL_ECHO is set;
+            # echo would add a synchronous stdout handler of its own.
+            echo=False,
             pool_size=10,
             max_overflow=20,
             pool_timeout=30,
             pool_recycle=1800,
             # pool_pre_ping=True
         )
+        metrics.instrument_engine(self._engine.sync_engine)
         self._session_factory = async_scoped_session(
             async_sessionmaker(
                 autocommit=False,
@@ -49,3 +56,22 @@ class Database:
             raise DatabaseUnreachableError(e)
         finally:
             await session.close()
+
+    @asynccontextmanager
+    async def listen(self, channel: str, callback: Callable) -> AsyncGenerator[
+        asyncpg.Connection,
+        None
+    ]:
+        """
+        LISTEN on `channel` for as long as the context is open, on a pooled
+        connection held for that time. `callback(connection, pid, channel,
+        payload)` runs on the event loop for every notification.
+        """
+        async with self._engine.connect() as connection:
+            raw = (await connection.get_raw_connection()).driver_connection
+            await raw.add_listener(channel, callback)
+            try:
+                yield raw
+            finally:
+                if not raw.is_closed():
+                    await raw.remove_listener(channel, callback)
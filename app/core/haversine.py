@@ -0,0 +1,97 @@
+from math import atan2, cos, radians, sin, sqrt
+from typing import Iterable, Tuple
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0
+EARTH_RADIUS_M = EARTH_RADIUS_KM * 1000
+
+
+def to_radians(
+    latitudes: Iterable[float],
+    longitudes: Iterable[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    lat = np.radians(np.ascontiguousarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.ascontiguousarray(longitudes, dtype=np.float64))
+    return lat, lon
+
+
+def distance(
+    orig_latitude: float,
+    orig_longitude: float,
+    dest_latitude: float,
+    dest_longitude: float
+) -> float:
+    lat1 = radians(orig_latitude)
+    lat2 = radians(dest_latitude)
+    dlat = lat2 - lat1
+    dlon = radians(dest_longitude) - radians(orig_longitude)
+
+    a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c * 1000
+
+
+def one_to_many(
+    lat_rad: float,
+    lon_rad: float,
+    lats_rad: np.ndarray,
+    lons_rad: np.ndarray
+) -> np.ndarray:
+    """Distances in meters from one point to every point of the arrays (all in radians)."""
+    a = (
+        np.sin((lats_rad - lat_rad) / 2) ** 2
+        + np.cos(lat_rad) * np.cos(lats_rad) * np.sin((lons_rad - lon_rad) / 2) ** 2
+    )
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c * 1000
+
+
+def pairwise(
+    lats1_rad: np.ndarray,
+    lons1_rad: np.ndarray,
+    lats2_rad: np.ndarray,
+    lons2_rad: np.ndarray
+) -> np.ndarray:
+    """Element-wise distances in meters between two equally long point arrays (all in radians)."""
+    a = (
+        np.sin((lats2_rad - lats1_rad) / 2) ** 2
+        + np.cos(lats1_rad) * np.cos(lats2_rad) * np.sin((lons2_rad - lons1_rad) / 2) ** 2
+    )
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c * 1000
+
+
+def many_to_many(
+    orig_lats_rad: np.ndarray,
+    orig_lons_rad: np.ndarray,
+    dest_lats_rad: np.ndarray,
+    dest_lons_rad: np.ndarray
+) -> np.ndarray:
+    """(len(orig), len(dest)) matrix of distances in meters (all inputs in radians)."""
+    lat1 = orig_lats_rad[:, np.newaxis]
+    lon1 = orig_lons_rad[:, np.newaxis]
+
+    a = (
+        np.sin((dest_lats_rad - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(dest_lats_rad) * np.sin((dest_lons_rad - lon1) / 2) ** 2
+    )
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c * 1000
+
+
+def top_k(distances: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` smallest distances along the last axis, closest first."""
+    k = min(k, distances.shape[-1])
+    if k <= 0:
+        return np.empty(distances.shape[:-1] + (0,), dtype=np.intp)
+
+    if k < distances.shape[-1]:
+        part = np.argpartition(distances, k - 1, axis=-1)[..., :k]
+    else:
+        part = np.broadcast_to(np.arange(k), distances.shape[:-1] + (k,))
+
+    order = np.argsort(np.take_along_axis(distances, part, axis=-1), axis=-1)
+    return np.take_along_axis(part, order, axis=-1)
@@ -0,0 +1,59 @@
+import time
+from typing import Any
+
+import httpx
+
+from app.core.metrics import Metrics
+from app.core.tracing import Tracer
+from configs.settings import Settings
+
+
+class HttpClient:
+    """
+    Process-wide pooled HTTP client for the routing provider.
+
+    Keeps connections (HTTP/2 where the server offers it) alive between
+    requests so upstream calls skip the TCP+TLS handshake. Every call is
+    timed into `Metrics.upstream` and traced as an `http.request` span.
+    Closed from the application lifespan.
+    """
+
+    def __init__(self, settings: Settings, metrics: Metrics, tracer: Tracer) -> None:
+        self.metrics = metrics
+        self.tracer = tracer
+        self._client = httpx.AsyncClient(
+            http2=settings.HTTP_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_TIMEOUT,
+                connect=settings.HTTP_CONNECT_TIMEOUT,
+            ),
+        )
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self._request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self._request("POST", url, **kwargs)
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        status = "cancelled"
+        started = time.perf_counter()
+        with self.tracer.span("http.request", **{"http.method": method, "http.url": url}) as span:
+            try:
+                response = await self._client.request(method, url, **kwargs)
+                status = str(response.status_code)
+                span.set_attribute("http.status_code", response.status_code)
+                return response
+            except Exception as e:
+                status = type(e).__name__
+                raise
+            finally:
+                self.metrics.observe_upstream(url, method, status, time.perf_counter() - started)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,77 @@
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator, Dict, Tuple
+
+from app.exceptions.infrastructure import InvalidPayloadError
+from app.schemas.scooter import MAX_BULK_COUNT
+
+
+# (latitude, longitude, count) of one group of scooters.
+BulkPoint = Tuple[float, float, int]
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+
+
+async def lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Non-empty lines of a byte stream with their 1-based line numbers."""
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            number += 1
+            if line.strip():
+                yield number, _decode(line, number)
+    if buffer.strip():
+        yield number + 1, _decode(buffer, number + 1)
+
+
+async def ndjson_points(chunks: AsyncIterable[bytes]) -> AsyncIterator[BulkPoint]:
+    """One `{"latitude", "longitude", "count"}` object per line, count defaulting to 1."""
+    async for number, line in lines(chunks):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise InvalidPayloadError(f"line {number} is not valid JSON")
+        if not isinstance(record, dict):
+            raise InvalidPayloadError(f"line {number} is not an object")
+        yield _point(record, number)
+
+
+async def csv_points(chunks: AsyncIterable[bytes]) -> AsyncIterator[BulkPoint]:
+    """A header row naming latitude, longitude and optionally count, then one scooter group per row."""
+    header = None
+    async for number, line in lines(chunks):
+        row = next(csv.reader([line]))
+        if header is None:
+            header = [column.strip().lower() for column in row]
+            if "latitude" not in header or "longitude" not in header:
+                raise InvalidPayloadError("CSV header must name latitude and longitude columns")
+            continue
+        if len(row) != len(header):
+            raise InvalidPayloadError(f"line {number} has {len(row)} columns, expected {len(header)}")
+        yield _point(dict(zip(header, row)), number)
+
+
+def _decode(line: bytes, number: int) -> str:
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError:
+        raise InvalidPayloadError(f"line {number} is not valid UTF-8")
+
+
+def _point(record: Dict, number: int) -> BulkPoint:
+    try:
+        latitude = float(record["latitude"])
+        longitude = float(record["longitude"])
+        # Only a missing or empty count defaults to 1; an explicit 0 is invalid.
+        count = record.get("count")
+        count = 1 if count is None or count == "" else int(count)
+        valid = -90 <= latitude <= 90 and -180 <= longitude <= 180 and 0 < count <= MAX_BULK_COUNT
+    except (KeyError, TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise InvalidPayloadError(f"line {number} is not a valid scooter record")
+    return latitude, longitude, count
@@ -0,0 +1,122 @@
+import json
+import logging
+import queue
+import random
+import reprlib
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Sized
+
+from configs.settings import Settings
+
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+# and becomes a field of the entry.
+RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+PAYLOAD_CHARS = 300
+
+_payload_repr = reprlib.Repr()
+_payload_repr.maxlevel = 3
+_payload_repr.maxdict = 6
+_payload_repr.maxlist = 4
+_payload_repr.maxtuple = 4
+_payload_repr.maxstring = 60
+_payload_repr.maxother = 60
+
+
+def summarize(value: Any, limit: int = PAYLOAD_CHARS) -> str:
+    """
+    Bounded description of a payload for a log entry: its size and a
+    truncated repr. Only the first few items of each container are looked
+    at, so summarizing the whole fleet costs the same as summarizing one
+    scooter.
+    """
+    text = _payload_repr.repr(value)
+    if isinstance(value, Sized) and not isinstance(value, (str, bytes)):
+        text = f"{len(value)} items {text}"
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a record logged with `extra={"sample": rate}` with probability
+    `rate`; the rate stays on the entry, so counts can be scaled back up.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample", None)
+        return rate is None or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread that formats and writes them.
+    The caller only pays for building the record; when the queue is full
+    the record is dropped and counted instead of waiting for the output.
+    """
+
+    def __init__(self, records: queue.Queue) -> None:
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tracebacks are rendered here, while the frames still exist;
+        # everything else is formatted on the listener thread.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(settings: Settings) -> QueueListener:
+    """
+    Route the `app` and SQLAlchemy loggers through a NonBlockingQueueHandler
+    to stdout. SQL statements are logged only with SQL_ECHO. The returned
+    listener has to be stopped on shutdown, which writes what is queued.
+    """
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(SamplingFilter())
+
+    levels = {
+        "app": settings.LOG_LEVEL,
+        "sqlalchemy.engine": logging.INFO if settings.SQL_ECHO else logging.WARNING,
+    }
+    for name, level in levels.items():
+        logger = logging.getLogger(name)
+        for previous in [h for h in logger.handlers if isinstance(h, NonBlockingQueueHandler)]:
+            logger.removeHandler(previous)
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+
+    listener = QueueListener(handler.queue, output)
+    listener.start()
+    return listener
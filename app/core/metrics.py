@@ -0,0 +1,224 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple, Type
+from urllib.parse import urlsplit
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+# Upper bounds in seconds, as in the Prometheus client libraries.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    __slots__ = ("name", "help", "label_names", "_values")
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Latency histogram per label combination. Observing is a bisect and two
+    additions; buckets are only made cumulative when rendered.
+    """
+
+    __slots__ = ("name", "help", "label_names", "buckets", "_counts", "_sums")
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for labels, counts in self._counts.items():
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {self._sums[labels]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {total}")
+        return lines
+
+
+class Metrics:
+    """
+    Process-wide request, database and upstream metrics, served on /metrics
+    in the Prometheus text format. Updated from the event loop thread only.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self.requests = Histogram(
+            "http_request_duration_seconds",
+            "Time to answer a request, by route template.",
+            ("method", "route", "status"),
+        )
+        self.statements = Histogram(
+            "db_statement_duration_seconds",
+            "Time to execute a SQL statement, by its first keyword.",
+            ("operation",),
+            STATEMENT_BUCKETS,
+        )
+        self.statement_errors = Counter(
+            "db_statement_errors_total",
+            "SQL statements that raised, by their first keyword.",
+            ("operation",),
+        )
+        self.pool_checkout = Histogram(
+            "db_pool_checkout_seconds",
+            "Time to get a connection from the pool, waiting and connecting included.",
+            buckets=STATEMENT_BUCKETS,
+        )
+        self.upstream = Histogram(
+            "upstream_request_duration_seconds",
+            "Time of a call to a routing provider; status is the HTTP status or the exception raised.",
+            ("host", "path", "method", "status"),
+        )
+        self._endpoints: Dict[str, Tuple[str, str]] = {}
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.statements, self.statement_errors, self.pool_checkout, self.upstream):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def observe_upstream(self, url: str, method: str, status: str, seconds: float) -> None:
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            parts = urlsplit(url)
+            endpoint = self._endpoints[url] = (parts.netloc, parts.path)
+        self.upstream.observe(seconds, endpoint + (method, status))
+
+    def instrument_engine(self, engine: Engine) -> None:
+        """Time every statement `engine` executes; pool checkout is timed by `timed_pool`."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def started(connection, cursor, statement, parameters, context, executemany):
+            context._metrics_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def finished(connection, cursor, statement, parameters, context, executemany):
+            self.statements.observe(time.perf_counter() - context._metrics_started, (_operation(statement),))
+
+        @event.listens_for(engine, "handle_error")
+        def failed(exception_context):
+            if exception_context.statement is not None:
+                self.statement_errors.inc((_operation(exception_context.statement),))
+
+
+def timed_pool(histogram: Histogram) -> Type[AsyncAdaptedQueuePool]:
+    """
+    The asyncio pool, timing every checkout into `histogram`. SQLAlchemy
+    has no event before a checkout starts, and a subclass survives the
+    pool being recreated on dispose.
+    """
+
+    class TimedQueuePool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+    return TimedQueuePool
+
+
+class MetricsMiddleware:
+    """
+    Per-route request latency. Plain ASGI rather than BaseHTTPMiddleware,
+    which would put every request through an extra task and stream. Routes
+    are labelled by their template, so path parameters do not create new
+    series; unmatched paths share one label.
+    """
+
+    def __init__(self, app, metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.requests.observe(
+                time.perf_counter() - started,
+                (scope["method"], _route(scope), str(status)),
+            )
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Plain Starlette routes (the docs) leave no template behind; without
+    # path parameters their path is one.
+    if "endpoint" in scope and not scope.get("path_params"):
+        return scope["path"]
+    return "unmatched"
+
+
+def _operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "EMPTY"
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
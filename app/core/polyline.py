@@ -0,0 +1,275 @@
+import heapq
+from math import cos, radians
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.haversine import EARTH_RADIUS_M
+
+
+METERS_PER_DEGREE = EARTH_RADIUS_M * radians(1)
+
+# Ground resolution of a 256 px Web Mercator tile at zoom 0 on the equator.
+METERS_PER_PIXEL_Z0 = 156543.03392
+
+# Geometry simplified for a zoom level may move by this many pixels.
+SIMPLIFY_PIXELS = 1.0
+
+# Up to this zoom, Visvalingam-Whyatt simplification is used: it drops the
+# least significant wiggles first and keeps the overall shape of a route at
+# overview scales. Closer in, Douglas-Peucker bounds the offset of every
+# dropped point, which keeps lines on their streets.
+VISVALINGAM_MAX_ZOOM = 12
+
+
+def encode(points: Iterable[Tuple[float, float]], precision: int = 5) -> str:
+    """Encode (latitude, longitude) pairs in the Google encoded polyline format."""
+    factor = 10 ** precision
+    out: List[str] = []
+    prev_lat = prev_lon = 0
+
+    for latitude, longitude in points:
+        lat = round(latitude * factor)
+        lon = round(longitude * factor)
+        _encode_value(lat - prev_lat, out)
+        _encode_value(lon - prev_lon, out)
+        prev_lat, prev_lon = lat, lon
+
+    return "".join(out)
+
+
+def decode(polyline: str, precision: int = 5) -> List[Tuple[float, float]]:
+    factor = 10 ** precision
+    points: List[Tuple[float, float]] = []
+    index = lat = lon = 0
+    length = len(polyline)
+
+    while index < length:
+        delta, index = _decode_value(polyline, index)
+        lat += delta
+        delta, index = _decode_value(polyline, index)
+        lon += delta
+        points.append((lat / factor, lon / factor))
+
+    return points
+
+
+def encode_arrays(latitudes: Sequence[float], longitudes: Sequence[float], precision: int = 5) -> str:
+    """`encode` for coordinate arrays, vectorized: no per-point Python work."""
+    factor = 10 ** precision
+    lat = np.round(np.asarray(latitudes, dtype=np.float64) * factor).astype(np.int64)
+    lon = np.round(np.asarray(longitudes, dtype=np.float64) * factor).astype(np.int64)
+
+    deltas = np.empty(2 * len(lat), dtype=np.int64)
+    deltas[0::2] = np.diff(lat, prepend=0)
+    deltas[1::2] = np.diff(lon, prepend=0)
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    # Up to seven 5-bit chunks per value, least significant first; every
+    # chunk but the last carries the continuation bit.
+    shifts = np.arange(7) * 5
+    chunks = (values[:, None] >> shifts) & 0x1f
+    count = 1 + (values[:, None] >= (1 << shifts[1:])).sum(axis=1)
+    more = shifts < (count[:, None] - 1) * 5
+    chars = (chunks | (more * 0x20)) + 63
+    return chars[shifts < count[:, None] * 5].astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_arrays(polyline: str, precision: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """`decode` into (latitudes, longitudes) float64 arrays, vectorized."""
+    values, _ = _values(polyline)
+    lat = np.empty(len(values) // 2)
+    lon = np.empty(len(values) // 2)
+    _write(values, lat, lon, 0, precision)
+    return lat, lon
+
+
+def decode_into(polyline: str, latitudes: np.ndarray, longitudes: np.ndarray, offset: int = 0, precision: int = 5) -> int:
+    """
+    Decode into preallocated arrays starting at `offset`, e.g. to collect
+    several legs in one buffer; returns the number of points written.
+    """
+    values, _ = _values(polyline)
+    return _write(values, latitudes, longitudes, offset, precision)
+
+
+def concat(polylines: Iterable[str]) -> str:
+    """
+    Join encoded polylines of the same precision into one. Only the first
+    point of each continuation is re-encoded, as a delta from where the
+    previous one ended, and dropped when it repeats that point.
+    """
+    parts: List[str] = []
+    last = None
+    for polyline in polylines:
+        values, ends = _values(polyline)
+        if len(values) < 2:
+            continue
+
+        first = (int(values[0]), int(values[1]))
+        rest = polyline[ends[1] + 1:]
+        if last is None:
+            parts.append(polyline)
+        elif first == last:
+            parts.append(rest)
+        else:
+            head: List[str] = []
+            _encode_value(first[0] - last[0], head)
+            _encode_value(first[1] - last[1], head)
+            parts.append("".join(head) + rest)
+
+        count = len(values) // 2
+        last = (int(values[0:2 * count:2].sum()), int(values[1:2 * count:2].sum()))
+
+    return "".join(parts)
+
+
+def tolerance_for_zoom(zoom: int, latitude: float) -> float:
+    """Meters covered by SIMPLIFY_PIXELS at `zoom` and `latitude`."""
+    return METERS_PER_PIXEL_Z0 * cos(radians(latitude)) / (1 << zoom) * SIMPLIFY_PIXELS
+
+
+def simplify(latitudes: np.ndarray, longitudes: np.ndarray, zoom: int) -> np.ndarray:
+    """Mask of the points to keep when the line is drawn at `zoom`; the end points are always kept."""
+    if len(latitudes) < 3:
+        return np.ones(len(latitudes), dtype=bool)
+
+    # Local equirectangular projection in meters; accurate enough at the
+    # scale of a route.
+    reference = float(latitudes.mean())
+    x = longitudes * (METERS_PER_DEGREE * cos(radians(reference)))
+    y = latitudes * METERS_PER_DEGREE
+    tolerance = tolerance_for_zoom(zoom, reference)
+
+    if zoom <= VISVALINGAM_MAX_ZOOM:
+        return visvalingam(x, y, tolerance ** 2)
+    return douglas_peucker(x, y, tolerance)
+
+
+def simplify_encoded(polyline: str, zoom: int, precision: int = 5) -> str:
+    lat, lon = decode_arrays(polyline, precision)
+    keep = simplify(lat, lon, zoom)
+    if keep.all():
+        return polyline
+    return encode_arrays(lat[keep], lon[keep], precision)
+
+
+def douglas_peucker(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    keep = np.zeros(len(x), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    # Every span still open is split in the same pass, so the Python loop
+    # runs once per level of the recursion rather than once per span.
+    first = np.array([0] if len(x) > 2 else [], dtype=np.int64)
+    last = first + len(x) - 1
+    while len(first):
+        inner = last - first - 1
+        span = np.repeat(np.arange(len(first)), inner)
+        starts = np.cumsum(inner) - inner
+        points = first[span] + 1 + np.arange(len(span)) - starts[span]
+
+        offsets = _segment_distances(x[points], y[points], x[first][span], y[first][span], x[last][span], y[last][span])
+        farthest = np.maximum.reduceat(offsets, starts)
+        # The first point at each span's maximum, as argmax would pick.
+        at_max = np.flatnonzero(offsets == farthest[span])
+        _, first_at_max = np.unique(span[at_max], return_index=True)
+        split = points[at_max[first_at_max]]
+
+        divided = farthest > tolerance
+        first, split, last = first[divided], split[divided], last[divided]
+        keep[split] = True
+        first, last = np.concatenate((first, split)), np.concatenate((split, last))
+        wide = last - first >= 2
+        first, last = first[wide], last[wide]
+
+    return keep
+
+
+def visvalingam(x: np.ndarray, y: np.ndarray, min_area: float) -> np.ndarray:
+    size = len(x)
+    previous = list(range(-1, size - 1))
+    following = list(range(1, size + 1))
+    xs, ys = x.tolist(), y.tolist()
+
+    def area(i: int) -> float:
+        a, c = previous[i], following[i]
+        return abs((xs[a] - xs[i]) * (ys[c] - ys[i]) - (xs[c] - xs[i]) * (ys[a] - ys[i])) / 2
+
+    areas = [float("inf")] * size
+    for i in range(1, size - 1):
+        areas[i] = area(i)
+    heap = [(areas[i], i) for i in range(1, size - 1)]
+    heapq.heapify(heap)
+
+    keep = np.ones(size, dtype=bool)
+    while heap:
+        smallest, i = heapq.heappop(heap)
+        if not keep[i] or smallest != areas[i]:
+            continue
+        if smallest >= min_area:
+            break
+
+        keep[i] = False
+        before, after = previous[i], following[i]
+        following[before], previous[after] = after, before
+        for neighbour in (before, after):
+            if 0 < neighbour < size - 1:
+                # Never below the area just removed, so points are dropped
+                # in order of significance.
+                areas[neighbour] = max(area(neighbour), smallest)
+                heapq.heappush(heap, (areas[neighbour], neighbour))
+
+    return keep
+
+
+def _segment_distances(px: np.ndarray, py: np.ndarray, ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray) -> np.ndarray:
+    """Distance of each point to its own segment from a to b."""
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    # Zero-length segments measure to their start point.
+    t = np.divide((px - ax) * dx + (py - ay) * dy, length, out=np.zeros(len(px)), where=length > 0)
+    t = np.clip(t, 0, 1)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def _values(polyline: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Signed values of a polyline and the index of each value's last character."""
+    data = np.frombuffer(polyline.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    ends = np.flatnonzero(data < 0x20)
+    if not len(ends):
+        return np.empty(0, dtype=np.int64), ends
+
+    data = data[:ends[-1] + 1]
+    starts = np.r_[0, ends[:-1] + 1]
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((data & 0x1f) << (5 * position), starts)
+    return np.where(values & 1, ~(values >> 1), values >> 1), ends
+
+
+def _write(values: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray, offset: int, precision: int) -> int:
+    count = len(values) // 2
+    factor = 10 ** precision
+    np.divide(np.cumsum(values[0:2 * count:2]), factor, out=latitudes[offset:offset + count])
+    np.divide(np.cumsum(values[1:2 * count:2]), factor, out=longitudes[offset:offset + count])
+    return count
+
+
+def _encode_value(value: int, out: List[str]) -> None:
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def _decode_value(polyline: str, index: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = ord(polyline[index]) - 63
+        index += 1
+        result |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            break
+
+    return (~(result >> 1) if result & 1 else result >> 1), index
@@ -0,0 +1,59 @@
+from types import NoneType
+from typing import Any, Dict, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+
+# Field name -> (required, mask of the nested object or None for a leaf).
+Mask = Dict[str, Tuple[bool, Optional["Mask"]]]
+
+
+class ProjectionError(ValueError):
+    pass
+
+
+def field_mask(model: Type[BaseModel]) -> Mask:
+    """The fields a Pydantic model keeps from a payload, nested models included."""
+    return {
+        name: (field.is_required(), _annotation_mask(field.annotation))
+        for name, field in model.model_fields.items()
+    }
+
+
+def project(value: Any, mask: Optional[Mask]) -> Any:
+    """
+    Copy of `value` reduced to the fields in `mask`, the way the model the
+    mask came from would dump it: unknown fields are dropped, missing
+    optional ones become None and a missing required one raises
+    ProjectionError. Leaf values are taken as they are, without validation.
+    """
+    if mask is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, mask) for item in value]
+    if not isinstance(value, dict):
+        raise ProjectionError(f"expected an object, got {type(value).__name__}")
+
+    projected = {}
+    for name, (required, nested) in mask.items():
+        if name in value:
+            projected[name] = project(value[name], nested)
+        elif required:
+            raise ProjectionError(f"missing field {name!r}")
+        else:
+            projected[name] = None
+    return projected
+
+
+def _annotation_mask(annotation: Any) -> Optional[Mask]:
+    origin = get_origin(annotation)
+    if origin is list:
+        args = get_args(annotation)
+        return _annotation_mask(args[0]) if args else None
+    if origin is Union:
+        for arg in get_args(annotation):
+            if arg is not NoneType:
+                return _annotation_mask(arg)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return field_mask(annotation)
+    return None
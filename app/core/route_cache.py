@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar, Union
+
+from app.core.tracing import current_span
+from configs.settings import Settings
+
+
+T = TypeVar("T")
+Location = Union[str, Tuple[float, float]]
+
+logger = logging.getLogger(__name__)
+
+
+class _Abandoned(Exception):
+    """Set on an in-flight fetch whose caller was cancelled before it finished."""
+
+
+class SharedCacheBackend(ABC):
+    """Cache tier shared between workers; values are JSON strings."""
+
+    # Exceptions meaning the tier is unavailable; lookups then skip it.
+    errors: Tuple[Type[BaseException], ...] = ()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """The cached value, or None when the key is absent."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        """Store `value` for `ttl` seconds."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    def __init__(self, url: str) -> None:
+        try:
+            from redis import asyncio as redis
+            from redis.exceptions import RedisError
+        except ImportError as e:
+            raise RuntimeError("ROUTE_CACHE_REDIS_URL is set but the redis package is not installed") from e
+
+        self._client = redis.from_url(url)
+        self.errors = (RedisError, OSError)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._client.set(key, value, ex=ttl)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class RouteCache:
+    """
+    Cache for routing provider results.
+
+    Keys are built from the travel mode, origin and destination rounded to
+    ROUTE_CACHE_PRECISION decimals and, for traffic-dependent modes, the
+    departure-time bucket. An in-process LRU tier with per-mode TTLs sits in
+    front of an optional shared tier, and concurrent lookups of the same key
+    share a single upstream call.
+    """
+
+    TIME_DEPENDENT_MODES = ("driving", "transit")
+
+    def __init__(self, settings: Settings) -> None:
+        self._max_entries = settings.ROUTE_CACHE_MAX_ENTRIES
+        self._precision = settings.ROUTE_CACHE_PRECISION
+        self._departure_bucket = settings.ROUTE_CACHE_DEPARTURE_BUCKET
+        self._ttls = {
+            "driving": settings.ROUTE_CACHE_TTL_DRIVING,
+            "walking": settings.ROUTE_CACHE_TTL_WALKING,
+            "bicycling": settings.ROUTE_CACHE_TTL_BICYCLING,
+            "transit": settings.ROUTE_CACHE_TTL_TRANSIT,
+        }
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._shared: Optional[SharedCacheBackend] = (
+            RedisCacheBackend(settings.ROUTE_CACHE_REDIS_URL)
+            if settings.ROUTE_CACHE_REDIS_URL
+            else None
+        )
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def key(self, mode: str, origin: Location, destination: Location, variant: str = "") -> str:
+        bucket = (
+            int(time.time() // self._departure_bucket)
+            if mode in self.TIME_DEPENDENT_MODES
+            else 0
+        )
+        return f"route:{mode}:{variant}:{self._quantise(origin)}:{self._quantise(destination)}:{bucket}"
+
+    def get(self, mode: str, origin: Location, destination: Location, variant: str = "") -> Optional[Any]:
+        value = self._lookup(self.key(mode, origin, destination, variant))
+        if value is None:
+            self.misses += 1
+        return value
+
+    def put(self, mode: str, origin: Location, destination: Location, value: Any, variant: str = "") -> None:
+        self._store(
+            self.key(mode, origin, destination, variant),
+            value,
+            self._ttls.get(mode, self._ttls["driving"])
+        )
+
+    async def get_or_fetch(
+        self,
+        mode: str,
+        origin: Location,
+        destination: Location,
+        fetch: Callable[[], Awaitable[T]],
+        variant: str = ""
+    ) -> T:
+        key = self.key(mode, origin, destination, variant)
+
+        while True:
+            value = self._lookup(key)
+            if value is not None:
+                current_span().set_attribute("cache", "hit")
+                return value
+
+            if key not in self._inflight:
+                break
+            self.coalesced += 1
+            current_span().set_attribute("cache", "coalesced")
+            try:
+                return await asyncio.shield(self._inflight[key])
+            except _Abandoned:
+                # The caller that was fetching got cancelled; the first
+                # waiter to get here takes over the fetch.
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fetch(key, mode, fetch)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # Only this caller was cancelled; waiters must not inherit it.
+            future.set_exception(_Abandoned())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved; waiters (if any) re-raise it themselves.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fetch(self, key: str, mode: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        ttl = self._ttls.get(mode, self._ttls["driving"])
+
+        cached = None
+        if self._shared is not None:
+            try:
+                cached = await self._shared.get(key)
+            except self._shared.errors as e:
+                logger.warning("shared route cache unavailable", extra={"error": repr(e), "sample": 0.1})
+            if cached is not None:
+                self.shared_hits += 1
+                current_span().set_attribute("cache", "shared")
+                value = json.loads(cached)
+                self._store(key, value, ttl)
+                return value
+
+        self.misses += 1
+        current_span().set_attribute("cache", "miss")
+        value = await fetch()
+        self._store(key, value, ttl)
+
+        if self._shared is not None:
+            try:
+                await self._shared.set(key, json.dumps(value), ttl)
+            except self._shared.errors as e:
+                logger.warning("shared route cache unavailable", extra={"error": repr(e), "sample": 0.1})
+
+        return value
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key: str, value: Any, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _quantise(self, location: Location) -> str:
+        if isinstance(location, str):
+            try:
+                latitude, longitude = (float(part) for part in location.split(","))
+            except ValueError:
+                return location.strip().lower()
+        else:
+            latitude, longitude = location
+
+        return f"{latitude:.{self._precision}f},{longitude:.{self._precision}f}"
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+    async def aclose(self) -> None:
+        if self._shared is not None:
+            await self._shared.aclose()
@@ -0,0 +1,329 @@
+from math import cos, floor, radians
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.haversine import EARTH_RADIUS_M, one_to_many, pairwise, top_k
+
+
+METERS_PER_DEGREE = EARTH_RADIUS_M * radians(1)
+
+# Query points matched per vectorized pass in `k_nearest_many`.
+BATCH_ROWS = 256
+
+CoordKey = Tuple[float, float]
+Cell = Tuple[int, int]
+
+
+class Neighbour:
+    __slots__ = ("latitude", "longitude", "distance")
+
+    def __init__(self, latitude: float, longitude: float, distance: float) -> None:
+        self.latitude = latitude
+        self.longitude = longitude
+        self.distance = distance
+
+
+class SpatialIndex:
+    """
+    Uniform lat/lon grid over the distinct scooter coordinates.
+
+    Coordinates live in contiguous float64 arrays (radians) addressed by
+    slot; grid cells of `cell_size` degrees hold slot numbers. Nearest
+    queries scan rings of cells around the query point with the vectorized
+    haversine kernel, stopping as soon as no unvisited ring can hold a
+    closer point.
+    Coordinates are keyed by their exact stored values so results can be fed
+    back into exact lookups such as `ScooterRepository.get_by_geo`.
+    """
+
+    def __init__(self, cell_size: float = 0.005, capacity: int = 1024) -> None:
+        self._cell_size = cell_size
+        self._lat_rad = np.empty(capacity, dtype=np.float64)
+        self._lon_rad = np.empty(capacity, dtype=np.float64)
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._keys: List[Optional[CoordKey]] = []
+        self._free: List[int] = []
+        self._slots: Dict[CoordKey, int] = {}
+        self._cells: Dict[Cell, List[int]] = {}
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+        # Cells as sorted arrays for `k_nearest_many`, rebuilt after changes.
+        self._sorted: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def build(cls, coords: Sequence[Tuple[float, float, int]], cell_size: float = 0.005) -> "SpatialIndex":
+        """Bulk-load distinct (latitude, longitude, count) triples, vectorized."""
+        index = cls(cell_size, capacity=max(len(coords), 1))
+        if not coords:
+            return index
+
+        lat, lon, counts = (np.asarray(column) for column in zip(*coords))
+        size = len(lat)
+        index._lat_rad[:size] = np.radians(lat)
+        index._lon_rad[:size] = np.radians(lon)
+        index._counts[:size] = counts
+        index._keys = list(zip(lat.tolist(), lon.tolist()))
+        index._slots = dict(zip(index._keys, range(size)))
+
+        ci = np.floor(lat / cell_size).astype(np.int64)
+        cj = np.floor(lon / cell_size).astype(np.int64)
+        order = np.lexsort((cj, ci))
+        ci, cj = ci[order], cj[order]
+        starts = np.flatnonzero(np.r_[True, (ci[1:] != ci[:-1]) | (cj[1:] != cj[:-1])])
+        ends = np.r_[starts[1:], size]
+        slots = order.tolist()
+        index._cells = {
+            (i, j): slots[start:end]
+            for i, j, start, end in zip(ci[starts].tolist(), cj[starts].tolist(), starts.tolist(), ends.tolist())
+        }
+        index._bounds = (int(ci[0]), int(ci[-1]), int(cj.min()), int(cj.max()))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def clear(self) -> None:
+        self._counts[:] = 0
+        self._keys.clear()
+        self._free.clear()
+        self._slots.clear()
+        self._cells.clear()
+        self._bounds = None
+        self._sorted = None
+
+    def insert(self, latitude: float, longitude: float, count: int = 1) -> None:
+        key = (latitude, longitude)
+        slot = self._slots.get(key)
+
+        if slot is None:
+            slot = self._allocate(key)
+            self._lat_rad[slot] = radians(latitude)
+            self._lon_rad[slot] = radians(longitude)
+
+            cell = self._cell_of(latitude, longitude)
+            self._cells.setdefault(cell, []).append(slot)
+            self._extend_bounds(cell)
+            self._sorted = None
+
+        self._counts[slot] += count
+
+    def insert_many(self, coords: Iterable[Tuple[float, float, int]]) -> None:
+        for latitude, longitude, count in coords:
+            self.insert(latitude, longitude, count)
+
+    def remove(self, latitude: float, longitude: float, count: int = 1) -> None:
+        key = (latitude, longitude)
+        slot = self._slots.get(key)
+
+        if slot is None:
+            return
+
+        self._counts[slot] -= count
+        if self._counts[slot] > 0:
+            return
+
+        self._counts[slot] = 0
+        cell = self._cell_of(latitude, longitude)
+        bucket = self._cells[cell]
+        bucket.remove(slot)
+        if not bucket:
+            del self._cells[cell]
+
+        del self._slots[key]
+        self._keys[slot] = None
+        self._free.append(slot)
+        self._sorted = None
+
+    def count(self, latitude: float, longitude: float) -> int:
+        slot = self._slots.get((latitude, longitude))
+        return 0 if slot is None else int(self._counts[slot])
+
+    def arrays(self) -> Tuple[List[CoordKey], np.ndarray, np.ndarray]:
+        """Live coordinates as (keys, latitudes, longitudes), the latter in radians."""
+        slots = np.fromiter(self._slots.values(), dtype=np.intp, count=len(self._slots))
+        return list(self._slots), self._lat_rad[slots], self._lon_rad[slots]
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[Neighbour]:
+        found = self.k_nearest(latitude, longitude, 1)
+        return found[0] if found else None
+
+    def k_nearest(self, latitude: float, longitude: float, k: int) -> List[Neighbour]:
+        if k <= 0 or not self._cells:
+            return []
+
+        lat_rad = radians(latitude)
+        lon_rad = radians(longitude)
+        ci, cj = self._cell_of(latitude, longitude)
+
+        max_ring = self._max_ring(ci, cj)
+
+        # Grow the search until it holds k candidates, then widen it once
+        # more to every ring that may still beat the k-th candidate.
+        slots: List[int] = []
+        ring = -1
+        while len(slots) < k and ring < max_ring:
+            ring += 1
+            slots.extend(self._ring_slots(ci, cj, ring))
+
+        slots = np.array(slots, dtype=np.intp)
+        dist = one_to_many(lat_rad, lon_rad, self._lat_rad[slots], self._lon_rad[slots])
+        keep = top_k(dist, k)
+        slots, dist = slots[keep], dist[keep]
+
+        outer: List[int] = []
+        while ring < max_ring and self._ring_clearance(latitude, ring) < dist[-1]:
+            ring += 1
+            outer.extend(self._ring_slots(ci, cj, ring))
+
+        if outer:
+            outer = np.array(outer, dtype=np.intp)
+            slots = np.concatenate((slots, outer))
+            dist = np.concatenate((
+                dist,
+                one_to_many(lat_rad, lon_rad, self._lat_rad[outer], self._lon_rad[outer]),
+            ))
+            keep = top_k(dist, k)
+            slots, dist = slots[keep], dist[keep]
+
+        return [
+            Neighbour(*self._keys[slot], distance=float(meters))
+            for slot, meters in zip(slots.tolist(), dist.tolist())
+        ]
+
+    def k_nearest_many(self, latitudes: Sequence[float], longitudes: Sequence[float], k: int) -> List[List[Neighbour]]:
+        """
+        `k_nearest` for many points in one vectorized pass: every point is
+        matched against the 3x3 block of cells around it at once. Only points
+        whose k-th candidate could still be beaten from outside that block
+        (sparse areas, points away from the fleet) fall back to the ring
+        search.
+        """
+        found: List[List[Neighbour]] = [[] for _ in latitudes]
+        if k <= 0 or not self._cells or not found:
+            return found
+
+        lat = np.asarray(latitudes, dtype=np.float64)
+        lon = np.asarray(longitudes, dtype=np.float64)
+        codes, starts, sizes, members = self._sorted_cells()
+        step = np.array([-1, 0, 1], dtype=np.int64)
+
+        for first in range(0, len(found), BATCH_ROWS):
+            q_lat, q_lon = lat[first:first + BATCH_ROWS], lon[first:first + BATCH_ROWS]
+            ci = np.floor(q_lat / self._cell_size).astype(np.int64)
+            cj = np.floor(q_lon / self._cell_size).astype(np.int64)
+
+            # Candidate (query, slot) pairs from the nine cells around each point.
+            wanted = _cell_code(ci[:, None, None] + step[:, None], cj[:, None, None] + step).ravel()
+            position = np.searchsorted(codes, wanted).clip(max=len(codes) - 1)
+            size = np.where(codes[position] == wanted, sizes[position], 0)
+            query = np.repeat(np.arange(len(q_lat)).repeat(9), size)
+            offset = np.arange(len(query)) - np.repeat(np.cumsum(size) - size, size)
+            slot = members[np.repeat(starts[position], size) + offset]
+            dist = pairwise(
+                np.radians(q_lat)[query], np.radians(q_lon)[query], self._lat_rad[slot], self._lon_rad[slot]
+            )
+
+            # Pairs are grouped by query already; lay them out one row per
+            # query, padded with infinite distances, and select per row.
+            column = np.arange(len(query)) - np.searchsorted(query, query)
+            width = max(int(column.max(initial=-1)) + 1, k)
+            distances = np.full((len(q_lat), width), np.inf)
+            distances[query, column] = dist
+            slots = np.zeros((len(q_lat), width), dtype=np.intp)
+            slots[query, column] = slot
+            keep = top_k(distances, k)
+            distances = np.take_along_axis(distances, keep, axis=-1)
+            slots = np.take_along_axis(slots, keep, axis=-1)
+
+            widest_lat = np.minimum(np.abs(q_lat) + 2 * self._cell_size, 89.0)
+            clearance = self._cell_size * METERS_PER_DEGREE * np.cos(np.radians(widest_lat))
+            resolved = (distances[:, -1] <= clearance).tolist()
+
+            for row, (done, row_slots, row_dist) in enumerate(zip(resolved, slots.tolist(), distances.tolist())):
+                if done:
+                    found[first + row] = [
+                        Neighbour(*self._keys[slot_], distance=meters)
+                        for slot_, meters in zip(row_slots, row_dist)
+                    ]
+                else:
+                    found[first + row] = self.k_nearest(float(q_lat[row]), float(q_lon[row]), k)
+        return found
+
+    def _ring_slots(self, ci: int, cj: int, ring: int) -> Iterator[int]:
+        for cell in self._ring(ci, cj, ring):
+            yield from self._cells.get(cell, ())
+
+    def _sorted_cells(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(codes, starts, sizes, members): cell codes in ascending order and each cell's slots as a run of `members`."""
+        if self._sorted is None:
+            cells = list(self._cells.items())
+            codes = _cell_code(
+                np.fromiter((i for (i, _), _ in cells), dtype=np.int64, count=len(cells)),
+                np.fromiter((j for (_, j), _ in cells), dtype=np.int64, count=len(cells)),
+            )
+            order = np.argsort(codes)
+            sizes = np.fromiter((len(cells[index][1]) for index in order.tolist()), dtype=np.int64, count=len(cells))
+            members = np.fromiter(
+                (slot for index in order.tolist() for slot in cells[index][1]), dtype=np.intp, count=int(sizes.sum())
+            )
+            self._sorted = (codes[order], np.cumsum(sizes) - sizes, sizes, members)
+        return self._sorted
+
+    def _allocate(self, key: CoordKey) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            if slot == len(self._lat_rad):
+                self._grow()
+
+        self._slots[key] = slot
+        return slot
+
+    def _grow(self) -> None:
+        capacity = len(self._lat_rad) * 2
+        self._lat_rad = np.resize(self._lat_rad, capacity)
+        self._lon_rad = np.resize(self._lon_rad, capacity)
+        counts = np.zeros(capacity, dtype=np.int64)
+        counts[:len(self._counts)] = self._counts
+        self._counts = counts
+
+    def _cell_of(self, latitude: float, longitude: float) -> Cell:
+        return floor(latitude / self._cell_size), floor(longitude / self._cell_size)
+
+    def _extend_bounds(self, cell: Cell) -> None:
+        i, j = cell
+        if self._bounds is None:
+            self._bounds = (i, i, j, j)
+        else:
+            min_i, max_i, min_j, max_j = self._bounds
+            self._bounds = (min(min_i, i), max(max_i, i), min(min_j, j), max(max_j, j))
+
+    def _max_ring(self, ci: int, cj: int) -> int:
+        min_i, max_i, min_j, max_j = self._bounds
+        return max(abs(ci - min_i), abs(ci - max_i), abs(cj - min_j), abs(cj - max_j))
+
+    def _ring_clearance(self, latitude: float, ring: int) -> float:
+        # Lower bound on the distance to any point outside rings 0..ring.
+        widest_lat = min(abs(latitude) + (ring + 1) * self._cell_size, 89.0)
+        return ring * self._cell_size * METERS_PER_DEGREE * cos(radians(widest_lat))
+
+    @staticmethod
+    def _ring(ci: int, cj: int, ring: int) -> Iterator[Cell]:
+        if ring == 0:
+            yield ci, cj
+            return
+
+        for j in range(cj - ring, cj + ring + 1):
+            yield ci - ring, j
+            yield ci + ring, j
+        for i in range(ci - ring + 1, ci + ring):
+            yield i, cj - ring
+            yield i, cj + ring
+
+
+def _cell_code(ci: np.ndarray, cj: np.ndarray) -> np.ndarray:
+    # Orders like the (ci, cj) tuple; both stay far below 2**31 in magnitude.
+    return ci * (1 << 32) + (cj + (1 << 31))
@@ -0,0 +1,353 @@
+import asyncio
+import json
+import logging
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core import haversine
+from app.core.spatial_index import Neighbour, SpatialIndex
+from app.core.tile_index import TileIndex
+from app.repositories.scooter_repository import ScooterRepository
+from configs.settings import Settings
+
+
+CHANNEL = "scooter_changes"
+
+logger = logging.getLogger(__name__)
+
+# Changed coordinates kept in a snapshot's overlay before the base index
+# is rebuilt; larger deltas also rebuild the tile index instead of
+# patching it in place.
+OVERLAY_LIMIT = 512
+
+# Remaining range, in meters, that each precomputed layer guarantees: the
+# layer for an edge holds every scooter whose range reaches it, so a
+# range-constrained query is a single lookup on the first layer at or above
+# the required range. Edge 0 is the whole fleet. New scooters carry up to
+# 40400 m; requirements past the last edge are answered exactly from the
+# few scooters beyond it.
+RANGE_EDGES = (0, 2500, 5000, 7500, 10000, 15000, 20000, 30000, 40000)
+
+# Exact snapshots for requirements past the last edge kept between changes.
+EXACT_CACHE_SIZE = 64
+
+Point = Tuple[float, float]
+# (latitude, longitude, remaining range in meters) of one scooter.
+Position = Tuple[float, float, float]
+
+
+class FleetSnapshot:
+    """
+    Immutable view of the fleet: an array-backed SpatialIndex plus a small
+    overlay of per-coordinate count changes made since it was built. A new
+    snapshot is published for every change; readers hold a reference and
+    never see it mutate.
+    """
+
+    __slots__ = ("version", "size", "base", "overlay", "_added", "_shadowed")
+
+    def __init__(self, version: int, size: int, base: SpatialIndex, overlay: Dict[Point, int]) -> None:
+        self.version = version
+        self.size = size
+        self.base = base
+        self.overlay = overlay
+        # Coordinates only the overlay knows about, and how many base
+        # coordinates it may hide from a query.
+        self._added = [point for point, change in overlay.items() if change > 0 and not base.count(*point)]
+        self._shadowed = sum(1 for change in overlay.values() if change < 0)
+
+    def k_nearest(self, latitude: float, longitude: float, k: int) -> List[Neighbour]:
+        if not self.overlay:
+            return self.base.k_nearest(latitude, longitude, k)
+
+        found = [
+            neighbour
+            for neighbour in self.base.k_nearest(latitude, longitude, k + self._shadowed)
+            if self._alive(neighbour.latitude, neighbour.longitude)
+        ]
+        found.extend(
+            Neighbour(*point, distance=haversine.distance(latitude, longitude, *point))
+            for point in self._added
+        )
+        found.sort(key=lambda neighbour: neighbour.distance)
+        return found[:k]
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[Neighbour]:
+        found = self.k_nearest(latitude, longitude, 1)
+        return found[0] if found else None
+
+    def k_nearest_many(self, latitudes: Sequence[float], longitudes: Sequence[float], k: int) -> List[List[Neighbour]]:
+        if not self.overlay:
+            return self.base.k_nearest_many(latitudes, longitudes, k)
+
+        found = self.base.k_nearest_many(latitudes, longitudes, k + self._shadowed)
+        if self._added:
+            lat, lon = haversine.to_radians(latitudes, longitudes)
+            added_lat, added_lon = haversine.to_radians(
+                [point[0] for point in self._added], [point[1] for point in self._added]
+            )
+            added = haversine.many_to_many(lat, lon, added_lat, added_lon).tolist()
+        else:
+            added = [[] for _ in found]
+
+        for index, (neighbours, meters) in enumerate(zip(found, added)):
+            neighbours = [
+                neighbour for neighbour in neighbours
+                if self._alive(neighbour.latitude, neighbour.longitude)
+            ]
+            neighbours.extend(Neighbour(*point, distance=distance) for point, distance in zip(self._added, meters))
+            neighbours.sort(key=lambda neighbour: neighbour.distance)
+            found[index] = neighbours[:k]
+        return found
+
+    def arrays(self) -> Tuple[List[Point], np.ndarray, np.ndarray]:
+        """Live coordinates as (keys, latitudes, longitudes), the latter in radians."""
+        keys, lat, lon = self.base.arrays()
+        if not self.overlay:
+            return keys, lat, lon
+
+        keep = np.fromiter((self._alive(*key) for key in keys), dtype=bool, count=len(keys))
+        added_lat, added_lon = haversine.to_radians(
+            [point[0] for point in self._added], [point[1] for point in self._added]
+        )
+        return (
+            [key for key, alive in zip(keys, keep.tolist()) if alive] + self._added,
+            np.concatenate((lat[keep], added_lat)),
+            np.concatenate((lon[keep], added_lon)),
+        )
+
+    def _alive(self, latitude: float, longitude: float) -> bool:
+        return self.base.count(latitude, longitude) + self.overlay.get((latitude, longitude), 0) > 0
+
+
+class FleetStore:
+    """
+    In-process copy of scooter positions shared by every request of a
+    worker.
+
+    Row changes arrive over LISTEN/NOTIFY from the `scooter` triggers (see
+    migration 9e4b7d1c2a65), are coalesced for FLEET_REFRESH_DELAY seconds
+    and published as new snapshots with a single assignment, one per range
+    layer (see RANGE_EDGES); small changes only extend a snapshot's overlay,
+    and a layer's base index is rebuilt off the event loop once its overlay
+    grows. Readers therefore never wait on a refresh. The whole table is
+    re-read every FLEET_POLL_INTERVAL seconds, which bounds staleness when
+    notifications are lost or the listening connection is down.
+    """
+
+    def __init__(self, settings: Settings, repository: ScooterRepository) -> None:
+        self.repository = repository
+        self.delay = settings.FLEET_REFRESH_DELAY
+        self.poll_interval = settings.FLEET_POLL_INTERVAL
+
+        self.snapshot: Optional[FleetSnapshot] = None
+        self.layers: Tuple[FleetSnapshot, ...] = ()
+        self.tiles = TileIndex()
+        self._positions: Dict[str, Position] = {}
+        # Scooters with more range than the last edge, and exact snapshots
+        # built from them per required range.
+        self._beyond: Dict[str, Position] = {}
+        self._exact: Dict[float, FleetSnapshot] = {}
+        self._counts: List[Counter] = [Counter() for _ in RANGE_EDGES]
+        self._sizes: List[int] = [0 for _ in RANGE_EDGES]
+        self._overlays: List[Dict[Point, int]] = [{} for _ in RANGE_EDGES]
+        self._pending: List[Tuple[str, list]] = []
+        self._reload_requested = False
+        self._changed = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def current(self) -> FleetSnapshot:
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot
+
+        # Only the very first read waits, and it fails like any other query
+        # when the database is unreachable.
+        async with self._lock:
+            if self.snapshot is None:
+                await self._reload()
+                self._task = asyncio.create_task(self._run())
+        return self.snapshot
+
+    async def reaching(self, meters: float) -> FleetSnapshot:
+        await self.current()
+        return self.layer(meters)
+
+    def layer(self, meters: float) -> FleetSnapshot:
+        """
+        Snapshot of the scooters with at least `meters` of remaining range.
+        It may leave out scooters just above `meters` but never includes one
+        below it; past the last range edge it is exact.
+        """
+        index = bisect_left(RANGE_EDGES, meters)
+        if index < len(RANGE_EDGES):
+            return self.layers[index] if index < len(self.layers) else EMPTY
+
+        snapshot = self._exact.get(meters)
+        if snapshot is None:
+            counts = Counter(position[:2] for position in self._beyond.values() if position[2] >= meters)
+            coords = [(latitude, longitude, count) for (latitude, longitude), count in counts.items()]
+            version = self.layers[-1].version if self.layers else 0
+            snapshot = FleetSnapshot(version, sum(counts.values()), SpatialIndex.build(coords), {})
+            if len(self._exact) >= EXACT_CACHE_SIZE:
+                self._exact.clear()
+            self._exact[meters] = snapshot
+        return snapshot
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.repository.listen(CHANNEL, self._notified) as connection:
+                    # Changes committed before LISTEN took effect were not announced.
+                    await self._reload()
+                    await self._follow(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # No listener: fall back to polling until one can be opened again.
+                logger.exception("fleet listener failed")
+                await asyncio.sleep(self.poll_interval)
+                try:
+                    await self._reload()
+                except Exception:
+                    logger.exception("fleet reload failed")
+
+    async def _follow(self, connection) -> None:
+        while not connection.is_closed():
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                await self._reload()
+                continue
+
+            await asyncio.sleep(self.delay)
+            self._changed.clear()
+            if self._reload_requested:
+                await self._reload()
+            else:
+                changes, self._pending = self._pending, []
+                await self._apply(changes)
+
+    def _notified(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            message = {"op": "reload"}
+
+        if message["op"] == "reload":
+            self._reload_requested = True
+        else:
+            self._pending.append((message["op"], message["rows"]))
+        self._changed.set()
+
+    async def _reload(self) -> None:
+        # Every notification received so far was sent after its commit, so
+        # the read below already includes it.
+        self._pending = []
+        self._reload_requested = False
+        rows = await self.repository.get_positions()
+
+        self._positions, self._beyond, deltas = await asyncio.to_thread(_diff, rows, self._counts)
+        self._exact = {}
+        await self._publish(deltas)
+
+    async def _apply(self, changes: List[Tuple[str, list]]) -> None:
+        deltas = [Counter() for _ in RANGE_EDGES]
+        for op, rows in changes:
+            for scooter_id, latitude, longitude, meters in rows:
+                previous = self._positions.pop(scooter_id, None)
+                self._beyond.pop(scooter_id, None)
+                if previous is not None:
+                    for delta in deltas[:_reach(previous[2])]:
+                        delta[previous[:2]] -= 1
+                if op == "upsert":
+                    self._positions[scooter_id] = (latitude, longitude, meters)
+                    if meters > RANGE_EDGES[-1]:
+                        self._beyond[scooter_id] = (latitude, longitude, meters)
+                    for delta in deltas[:_reach(meters)]:
+                        delta[latitude, longitude] += 1
+        # A range change past the last edge moves no layer, so this cannot
+        # wait for _publish.
+        self._exact = {}
+        await self._publish(deltas)
+
+    async def _publish(self, deltas: List[Counter]) -> None:
+        deltas = [{point: change for point, change in delta.items() if change} for delta in deltas]
+        if not any(deltas) and self.snapshot is not None:
+            return
+
+        layers = []
+        tiles = self.tiles
+        for index, delta in enumerate(deltas):
+            counts, overlay = self._counts[index], self._overlays[index]
+            previous = self.layers[index] if self.layers else None
+
+            counts.update(delta)
+            self._sizes[index] += sum(delta.values())
+            for point, change in delta.items():
+                if counts[point] <= 0:
+                    del counts[point]
+                change += overlay.pop(point, 0)
+                if change:
+                    overlay[point] = change
+
+            if previous is None or len(overlay) > OVERLAY_LIMIT or len(delta) > OVERLAY_LIMIT:
+                # Built off the event loop; queries keep using the previous
+                # snapshots until the new ones are swapped in below.
+                coords = [(latitude, longitude, count) for (latitude, longitude), count in counts.items()]
+                base = await asyncio.to_thread(SpatialIndex.build, coords)
+                overlay.clear()
+                if index == 0 and (previous is None or len(delta) > OVERLAY_LIMIT):
+                    tiles = await asyncio.to_thread(TileIndex.build, coords)
+                    delta = {}
+            else:
+                base = previous.base
+
+            if index == 0:
+                for (latitude, longitude), change in delta.items():
+                    if change > 0:
+                        tiles.insert(latitude, longitude, change)
+                    else:
+                        tiles.remove(latitude, longitude, -change)
+
+            version = previous.version + 1 if previous is not None else 1
+            layers.append(FleetSnapshot(version, self._sizes[index], base, dict(overlay)))
+
+        self.tiles = tiles
+        self.layers = tuple(layers)
+        self.snapshot = self.layers[0]
+
+
+EMPTY = FleetSnapshot(0, 0, SpatialIndex(), {})
+
+
+def _reach(meters: float) -> int:
+    """Number of range layers a scooter with `meters` of range belongs to; always the whole-fleet one."""
+    return max(1, bisect_right(RANGE_EDGES, meters))
+
+
+def _diff(rows: List[Tuple], counts: List[Counter]) -> Tuple[Dict[str, Position], Dict[str, Position], List[Counter]]:
+    positions = {
+        str(scooter_id): (latitude, longitude, meters)
+        for scooter_id, latitude, longitude, meters in rows
+    }
+    beyond = {scooter_id: position for scooter_id, position in positions.items() if position[2] > RANGE_EDGES[-1]}
+    deltas = [Counter() for _ in RANGE_EDGES]
+    for latitude, longitude, meters in positions.values():
+        for delta in deltas[:_reach(meters)]:
+            delta[latitude, longitude] += 1
+    for delta, layer in zip(deltas, counts):
+        delta.subtract(layer)
+    return positions, beyond, deltas
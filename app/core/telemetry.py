@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from app.exceptions.infrastructure import TelemetryBackpressureError, TelemetryBatchTooLargeError
+from app.repositories.scooter_repository import ScooterRepository
+from configs.settings import Settings
+
+
+# (id, latitude, longitude, charge, distance) as reported by a scooter.
+Reading = Tuple[UUID, float, float, int, int]
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryWriter:
+    """
+    Buffers scooter telemetry and writes it in batches.
+
+    Readings go through a bounded queue into a per-scooter buffer where
+    newer readings replace older ones, and the buffer is written as one
+    batched upsert every TELEMETRY_FLUSH_INTERVAL seconds. The buffer is
+    swapped out before the write, so collection continues while a flush is
+    in flight. When the database falls behind, the buffer stops taking new
+    scooters past TELEMETRY_MAX_PENDING, the queue fills up and producers
+    are pushed back: `put` waits for room and `offer` refuses the batch.
+    A batch larger than the whole queue could never be taken and is refused
+    outright.
+    """
+
+    def __init__(self, settings: Settings, repository: ScooterRepository) -> None:
+        self.repository = repository
+        self.interval = settings.TELEMETRY_FLUSH_INTERVAL
+        self.max_pending = settings.TELEMETRY_MAX_PENDING
+        self.queue: asyncio.Queue = asyncio.Queue(settings.TELEMETRY_QUEUE_SIZE)
+
+        self._pending: Dict[UUID, Reading] = {}
+        self._in_flight = 0
+        self._room = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+        self.received = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_rows = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self._flush_seconds = 0.0
+
+    def offer(self, readings: List[Reading]) -> None:
+        """Queue every reading or, when there is no room for all of them, none."""
+        if len(readings) > self.queue.maxsize:
+            self.rejected += len(readings)
+            raise TelemetryBatchTooLargeError(self.queue.maxsize)
+        self._start()
+        if self.queue.maxsize - self.queue.qsize() < len(readings):
+            self.rejected += len(readings)
+            raise TelemetryBackpressureError(self.interval)
+        for reading in readings:
+            self.queue.put_nowait(reading)
+        self.received += len(readings)
+
+    async def put(self, readings: Iterable[Reading]) -> None:
+        """Queue readings, waiting for room when the queue is full."""
+        self._start()
+        for reading in readings:
+            await self.queue.put(reading)
+            self.received += 1
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "pending": len(self._pending) + self._in_flight,
+            "received": self.received,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_rows": self.last_flush_rows,
+            "last_flush_ms": self.last_flush_seconds * 1000,
+            "mean_flush_ms": self._flush_seconds / self.flushes * 1000 if self.flushes else 0.0,
+            "max_flush_ms": self.max_flush_seconds * 1000,
+        }
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+        # Whatever was accepted before shutdown still gets written.
+        while not self.queue.empty():
+            self._collect(self.queue.get_nowait())
+        if self._pending:
+            try:
+                await self._flush()
+            except Exception:
+                logger.exception("telemetry flush on shutdown failed", extra={"rows": len(self._pending)})
+
+    def _start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._consume()), asyncio.create_task(self._flush_periodically())]
+
+    async def _consume(self) -> None:
+        while True:
+            reading = await self.queue.get()
+            try:
+                while reading[0] not in self._pending and len(self._pending) + self._in_flight >= self.max_pending:
+                    self._room.clear()
+                    await self._room.wait()
+            finally:
+                # Kept on shutdown too, when it is still flushed by aclose.
+                self._collect(reading)
+
+    def _collect(self, reading: Reading) -> None:
+        if reading[0] in self._pending:
+            self.coalesced += 1
+        self._pending[reading[0]] = reading
+
+    async def _flush_periodically(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += self.interval
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            if self._pending:
+                try:
+                    await self._flush()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # The batch stays pending and is retried with the next flush.
+                    logger.exception("telemetry flush failed", extra={"rows": len(self._pending)})
+            # A slow flush pushes the next one back instead of queueing up
+            # flushes that would run back to back.
+            deadline = max(deadline, loop.time())
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, {}
+        self._in_flight = len(batch)
+
+        started = time.perf_counter()
+        try:
+            await self.repository.upsert_positions(list(batch.values()))
+        except BaseException:
+            # Retried with the next flush unless a newer reading arrived meanwhile.
+            self.failed_flushes += 1
+            for scooter_id, reading in batch.items():
+                self._pending.setdefault(scooter_id, reading)
+            raise
+        finally:
+            self._in_flight = 0
+            self._room.set()
+
+        elapsed = time.perf_counter() - started
+        self.flushes += 1
+        self.written += len(batch)
+        self.last_flush_rows = len(batch)
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        self._flush_seconds += elapsed
@@ -0,0 +1,167 @@
+from math import atan, cos, floor, log, pi, radians, sinh, tan
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+MAX_LATITUDE = 85.05112878
+
+# Zoom levels 0..MAX_CLUSTER_ZOOM serve clusters, deeper tiles the
+# individual coordinates.
+MAX_CLUSTER_ZOOM = 15
+MAX_ZOOM = 22
+
+# Each tile is split into CELLS x CELLS clustering cells, which bounds the
+# payload of a clustered tile to CELLS**2 entries.
+CELLS = 16
+
+CoordKey = Tuple[float, float]
+Tile = Tuple[int, int]
+Cell = Tuple[int, int]
+
+
+class Cluster:
+    __slots__ = ("latitude", "longitude", "count")
+
+    def __init__(self, latitude: float, longitude: float, count: int) -> None:
+        self.latitude = latitude
+        self.longitude = longitude
+        self.count = count
+
+
+class TileIndex:
+    """
+    Hierarchical grid clustering of scooter coordinates for slippy map
+    tiles (Web Mercator z/x/y).
+
+    At zoom z the world is cut into cells 1/CELLS of a tile wide; each cell
+    keeps its scooter count and count-weighted Mercator sums, so its
+    centroid is available in O(1). Every cell is the union of its four
+    children one zoom deeper, and a write touches exactly one cell per
+    level. Cells are grouped by tile, so serving a tile only visits the
+    cells inside it. Past MAX_CLUSTER_ZOOM coordinates are served one by
+    one from buckets of MAX_CLUSTER_ZOOM + 1 tiles.
+    """
+
+    def __init__(self) -> None:
+        # levels[z][tile][cell] = [count, sum of x * count, sum of y * count]
+        self._levels: List[Dict[Tile, Dict[Cell, List[float]]]] = [{} for _ in range(MAX_CLUSTER_ZOOM + 1)]
+        self._points: Dict[Tile, Dict[CoordKey, List[float]]] = {}
+
+    @classmethod
+    def build(cls, coords: Sequence[Tuple[float, float, int]]) -> "TileIndex":
+        """Bulk-load distinct (latitude, longitude, count) triples, aggregating each level with NumPy."""
+        index = cls()
+        if not coords:
+            return index
+
+        # Project with the same scalar code as _update so cell assignment
+        # agrees exactly with later incremental writes.
+        projected = np.array([_project(latitude, longitude) for latitude, longitude, _ in coords])
+        mx, my = projected[:, 0], projected[:, 1]
+        counts = np.fromiter((count for _, _, count in coords), dtype=np.int64, count=len(coords))
+
+        scale = 1 << (MAX_CLUSTER_ZOOM + 1)
+        bx, by = _cells(mx, my, scale)
+        for (latitude, longitude, count), x, y, px, py in zip(coords, bx.tolist(), by.tolist(), mx.tolist(), my.tolist()):
+            index._points.setdefault((x, y), {})[latitude, longitude] = [count, px, py]
+
+        for z, level in enumerate(index._levels):
+            scale = CELLS << z
+            cx, cy = _cells(mx, my, scale)
+            keys, inverse = np.unique(cx * scale + cy, return_inverse=True)
+            totals = np.bincount(inverse, weights=counts)
+            sums_x = np.bincount(inverse, weights=mx * counts)
+            sums_y = np.bincount(inverse, weights=my * counts)
+            for key, total, sx, sy in zip(keys.tolist(), totals.tolist(), sums_x.tolist(), sums_y.tolist()):
+                cell = divmod(key, scale)
+                level.setdefault((cell[0] // CELLS, cell[1] // CELLS), {})[cell] = [int(total), sx, sy]
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._points.values())
+
+    def clear(self) -> None:
+        for level in self._levels:
+            level.clear()
+        self._points.clear()
+
+    def insert(self, latitude: float, longitude: float, count: int = 1) -> None:
+        self._update(latitude, longitude, count)
+
+    def insert_many(self, coords: Iterable[Tuple[float, float, int]]) -> None:
+        for latitude, longitude, count in coords:
+            self._update(latitude, longitude, count)
+
+    def remove(self, latitude: float, longitude: float, count: int = 1) -> None:
+        self._update(latitude, longitude, -count)
+
+    def tile(self, z: int, x: int, y: int) -> List[Cluster]:
+        """Clusters with scooter counts for z <= MAX_CLUSTER_ZOOM, coordinates with counts deeper."""
+        if z <= MAX_CLUSTER_ZOOM:
+            return [
+                Cluster(*_unproject(sx / count, sy / count), int(count))
+                for count, sx, sy in self._levels[z].get((x, y), {}).values()
+            ]
+
+        shift = z - MAX_CLUSTER_ZOOM - 1
+        bucket = self._points.get((x >> shift, y >> shift), {})
+        scale = 1 << z
+        return [
+            Cluster(latitude, longitude, int(count))
+            for (latitude, longitude), (count, mx, my) in bucket.items()
+            if floor(mx * scale) == x and floor(my * scale) == y
+        ]
+
+    def _update(self, latitude: float, longitude: float, count: int) -> None:
+        mx, my = _project(latitude, longitude)
+
+        scale = 1 << (MAX_CLUSTER_ZOOM + 1)
+        bucket_key = (min(floor(mx * scale), scale - 1), min(floor(my * scale), scale - 1))
+        bucket = self._points.setdefault(bucket_key, {})
+        point = bucket.setdefault((latitude, longitude), [0, mx, my])
+        if count < 0:
+            # Never remove more than the index holds, or the cells drift negative.
+            count = -min(-count, point[0])
+        point[0] += count
+        if point[0] <= 0:
+            del bucket[latitude, longitude]
+            if not bucket:
+                del self._points[bucket_key]
+        if count == 0:
+            return
+
+        for z, level in enumerate(self._levels):
+            scale = CELLS << z
+            cell = (min(floor(mx * scale), scale - 1), min(floor(my * scale), scale - 1))
+            tile_key = (cell[0] // CELLS, cell[1] // CELLS)
+            cells = level.setdefault(tile_key, {})
+            entry = cells.setdefault(cell, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += mx * count
+            entry[2] += my * count
+            if entry[0] <= 0:
+                del cells[cell]
+                if not cells:
+                    del level[tile_key]
+
+
+def _project(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Web Mercator in [0, 1) world units, y growing southwards."""
+    lat = radians(max(min(latitude, MAX_LATITUDE), -MAX_LATITUDE))
+    x = (longitude + 180.0) / 360.0
+    y = (1.0 - log(tan(lat) + 1.0 / cos(lat)) / pi) / 2.0
+    return x, y
+
+
+def _cells(mx: np.ndarray, my: np.ndarray, scale: int) -> Tuple[np.ndarray, np.ndarray]:
+    return (
+        np.minimum(np.floor(mx * scale), scale - 1).astype(np.int64),
+        np.minimum(np.floor(my * scale), scale - 1).astype(np.int64),
+    )
+
+
+def _unproject(x: float, y: float) -> Tuple[float, float]:
+    latitude = atan(sinh(pi * (1.0 - 2.0 * y))) * 180.0 / pi
+    return latitude, x * 360.0 - 180.0
+
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from configs.settings import Settings
+
+
+class Span:
+    """One timed operation of a trace, with OpenTelemetry's identifiers and fields."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = attributes
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def increment(self, key: str, amount: int = 1) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> Dict:
+        # Field names as in OTLP/JSON, with attributes kept as a flat object.
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start,
+            "endTimeUnixNano": self.end,
+            "attributes": self.attributes,
+            "status": {"code": self.status},
+        }
+
+
+class _NoSpan:
+    """Stands in for a span that is not recorded; annotating it costs nothing."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def increment(self, key: str, amount: int = 1) -> None:
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+_current: ContextVar[Any] = ContextVar("span", default=None)
+
+
+def current_span() -> Any:
+    """The span the calling code runs in, or NO_SPAN outside a recorded trace."""
+    span = _current.get()
+    return NO_SPAN if span is None else span
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a file, one JSON object per line, from a
+    background thread. Spans that arrive while the queue is full are
+    dropped and counted rather than holding up the request.
+    """
+
+    def __init__(self, path: str, queue_size: int = 10000) -> None:
+        self.path = path
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._write, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as output:
+            while True:
+                span = self._queue.get()
+                if span is None:
+                    return
+                output.write(json.dumps(span.to_dict(), default=str) + "\n")
+                if self._queue.empty():
+                    output.flush()
+
+
+class Tracer:
+    """
+    Records spans when TRACE_EXPORT_PATH is set. Whether a trace is kept is
+    decided once, at its root span, with probability TRACE_SAMPLE_RATE;
+    spans nest through a context variable, so tasks started inside a span
+    (gather, create_task) become its children.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.sample_rate = settings.TRACE_SAMPLE_RATE
+        self.exporter: Optional[JsonlSpanExporter] = (
+            JsonlSpanExporter(settings.TRACE_EXPORT_PATH) if settings.TRACE_EXPORT_PATH else None
+        )
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        if self.exporter is None:
+            yield NO_SPAN
+            return
+
+        parent = _current.get()
+        if parent is NO_SPAN or (parent is None and random.random() >= self.sample_rate):
+            # Not sampled: descendants see NO_SPAN and skip recording too.
+            token = _current.set(NO_SPAN)
+            try:
+                yield NO_SPAN
+            finally:
+                _current.reset(token)
+            return
+
+        if parent is None:
+            span = Span(name, secrets.token_hex(16), None, attributes)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.attributes["exception.type"] = type(e).__name__
+            raise
+        finally:
+            span.end = time.time_ns()
+            _current.reset(token)
+            self.exporter.export(span)
+
+    async def aclose(self) -> None:
+        if self.exporter is not None:
+            await asyncio.to_thread(self.exporter.close)
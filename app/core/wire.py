@@ -0,0 +1,221 @@
+"""
+Compact binary encoding of the fleet and route payloads, offered next to
+JSON through content negotiation (`Accept: application/vnd.baku-ways+binary`).
+
+A document is little-endian throughout:
+
+    header   magic "BW", u8 version, u8 kind
+    strings  u32 count, then per string u32 byte length + UTF-8 bytes
+    body     kind specific, strings referenced by u32 index
+
+Coordinates are int32 fixed-point degrees scaled by 1e7 (about 1 cm), and
+a point list is a u32 count followed by the packed pairs. Every distinct
+string, polylines included, is stored once in the string table however
+often the body refers to it.
+
+The coordinates kind has no string table and no count: pairs follow the
+header until the end of the stream, so it can be written as rows arrive.
+"""
+import struct
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.schemas.fast import FastResponse
+from app.schemas.taxi_optima import TaxiOptimaResponse
+
+
+MEDIA_TYPE = "application/vnd.baku-ways+binary"
+
+MAGIC = b"BW"
+VERSION = 1
+
+COORDINATES = 1
+FAST = 2
+TAXI_OPTIMA = 3
+
+SCALE = 10_000_000
+
+HEADER = struct.Struct("<2sBB")
+PATH = struct.Struct("<IIIiiiiI")
+TAXI = struct.Struct("<iiii7dIII")
+INSTRUCTION = struct.Struct("<III")
+
+Point = Tuple[float, float]
+
+
+class Writer:
+    def __init__(self, kind: int) -> None:
+        self.kind = kind
+        self.body = bytearray()
+        self._strings: Dict[str, int] = {}
+
+    def string(self, value: str) -> int:
+        ref = self._strings.get(value)
+        if ref is None:
+            ref = self._strings[value] = len(self._strings)
+        return ref
+
+    def pack(self, layout: struct.Struct, *values) -> None:
+        self.body += layout.pack(*values)
+
+    def points(self, points: Sequence[Point]) -> None:
+        self.body += struct.pack(f"<I{2 * len(points)}i", len(points), *_fixed(points))
+
+    def getvalue(self) -> bytes:
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.kind))
+        out += struct.pack("<I", len(self._strings))
+        for value in self._strings:
+            data = value.encode()
+            out += struct.pack("<I", len(data))
+            out += data
+        out += self.body
+        return bytes(out)
+
+
+class Reader:
+    def __init__(self, data: bytes, kind: int) -> None:
+        magic, version, found = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or found != kind:
+            raise ValueError("not a binary document of the expected kind")
+        self.data = data
+        self.offset = HEADER.size
+        self.strings: List[str] = []
+        if kind != COORDINATES:
+            for _ in range(self.unpack_one("I")):
+                length = self.unpack_one("I")
+                self.strings.append(bytes(data[self.offset:self.offset + length]).decode())
+                self.offset += length
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def unpack_one(self, code: str):
+        (value,) = struct.unpack_from(f"<{code}", self.data, self.offset)
+        self.offset += struct.calcsize(code)
+        return value
+
+    def points(self) -> List[Point]:
+        count = self.unpack_one("I")
+        values = struct.unpack_from(f"<{2 * count}i", self.data, self.offset)
+        self.offset += 8 * count
+        return _floating(values)
+
+
+def coordinates_header() -> bytes:
+    return HEADER.pack(MAGIC, VERSION, COORDINATES)
+
+
+def pack_coordinates(coords: Sequence[Point]) -> bytes:
+    return struct.pack(f"<{2 * len(coords)}i", *_fixed(coords))
+
+
+def decode_coordinates(data: bytes) -> List[Point]:
+    reader = Reader(data, COORDINATES)
+    values = struct.unpack_from(f"<{(len(data) - reader.offset) // 4}i", data, reader.offset)
+    return _floating(values)
+
+
+def encode_fast(options: Sequence[FastResponse]) -> bytes:
+    writer = Writer(FAST)
+    writer.body += struct.pack("<H", len(options))
+    for option in options:
+        writer.body += struct.pack("<IH", option.duration, len(option.paths))
+        for path in option.paths:
+            writer.pack(
+                PATH,
+                writer.string(path.type),
+                int(path.distance),
+                int(path.duration.rstrip("s")),
+                *_fixed((
+                    (path.start_latitude, path.start_longitude),
+                    (path.end_latitude, path.end_longitude),
+                )),
+                writer.string(path.polyline),
+            )
+    return writer.getvalue()
+
+
+def decode_fast(data: bytes) -> List[Dict]:
+    reader = Reader(data, FAST)
+    options = []
+    for _ in range(reader.unpack_one("H")):
+        duration = reader.unpack_one("I")
+        paths = []
+        for _ in range(reader.unpack_one("H")):
+            kind, distance, seconds, *coords, polyline = reader.unpack(PATH)
+            start_lat, start_lon, end_lat, end_lon = (value / SCALE for value in coords)
+            paths.append({
+                "type": reader.strings[kind],
+                "distance": distance,
+                "duration": seconds,
+                "start": (start_lat, start_lon),
+                "end": (end_lat, end_lon),
+                "polyline": reader.strings[polyline],
+            })
+        options.append({"duration": duration, "paths": paths})
+    return options
+
+
+def encode_taxi_optima(response: TaxiOptimaResponse) -> bytes:
+    writer = Writer(TAXI_OPTIMA)
+    writer.pack(
+        TAXI,
+        *_fixed((
+            (response.optimal_start_latitude, response.optimal_start_longitude),
+            (response.destination_latitude, response.destination_longitude),
+        )),
+        response.trip_distance,
+        response.trip_duration,
+        response.user_to_pickup_distance,
+        response.taxi_to_pickup_distance,
+        response.pickup_to_dest_distance,
+        response.taxi_wait_time,
+        response.taxi_wait_distance,
+        writer.string(response.user_to_pickup_polyline),
+        writer.string(response.pickup_to_dest_polyline),
+        writer.string(response.taxi_to_pickup_polyline),
+    )
+    writer.points(response.coordinates)
+    writer.points(response.taxi_coming_coordinates)
+    writer.body += struct.pack("<H", len(response.instructions))
+    for step in response.instructions:
+        writer.pack(
+            INSTRUCTION,
+            writer.string(step.get("instruction", "")),
+            writer.string(step.get("distance", "")),
+            writer.string(step.get("duration", "")),
+        )
+    return writer.getvalue()
+
+
+def decode_taxi_optima(data: bytes) -> Dict:
+    reader = Reader(data, TAXI_OPTIMA)
+    start_lat, start_lon, dest_lat, dest_lon, *metrics, user_polyline, dest_polyline, taxi_polyline = reader.unpack(TAXI)
+    names = (
+        "trip_distance", "trip_duration", "user_to_pickup_distance", "taxi_to_pickup_distance",
+        "pickup_to_dest_distance", "taxi_wait_time", "taxi_wait_distance",
+    )
+    decoded = {
+        "optimal_start": (start_lat / SCALE, start_lon / SCALE),
+        "destination": (dest_lat / SCALE, dest_lon / SCALE),
+        **dict(zip(names, metrics)),
+        "user_to_pickup_polyline": reader.strings[user_polyline],
+        "pickup_to_dest_polyline": reader.strings[dest_polyline],
+        "taxi_to_pickup_polyline": reader.strings[taxi_polyline],
+        "coordinates": reader.points(),
+        "taxi_coming_coordinates": reader.points(),
+    }
+    decoded["instructions"] = [
+        dict(zip(("instruction", "distance", "duration"), (reader.strings[ref] for ref in reader.unpack(INSTRUCTION))))
+        for _ in range(reader.unpack_one("H"))
+    ]
+    return decoded
+
+
+def _fixed(points: Iterable[Point]) -> List[int]:
+    return [round(value * SCALE) for point in points for value in point]
+
+
+def _floating(values: Sequence[int]) -> List[Point]:
+    return [(values[i] / SCALE, values[i + 1] / SCALE) for i in range(0, len(values), 2)]
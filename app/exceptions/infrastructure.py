@@ -31,3 +31,44 @@ class EntityRelationDoesNotExistError(HTTPException):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid relation for {entity}"
         )
+
+
+class RoutingProviderError(HTTPException):
+    def __init__(self, reason: str):
+        super().__init__(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Routing provider error: {reason}"
+        )
+
+
+class InvalidPayloadError(HTTPException):
+    def __init__(self, reason: str):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid payload: {reason}"
+        )
+
+
+class UnsupportedMediaTypeError(HTTPException):
+    def __init__(self, media_type: str):
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported media type: {media_type}"
+        )
+
+
+class TelemetryBackpressureError(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Telemetry queue is full",
+            headers={"Retry-After": str(max(1, round(retry_after)))}
+        )
+
+
+class TelemetryBatchTooLargeError(HTTPException):
+    def __init__(self, capacity: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Telemetry batches may hold at most {capacity} readings"
+        )
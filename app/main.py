@@ -1,22 +1,51 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.container import container
+from app.core.http_client import HttpClient
+from app.core.log import configure_logging
+from app.core.metrics import Metrics, MetricsMiddleware
+from app.core.route_cache import RouteCache
+from app.core.store import FleetStore
+from app.core.telemetry import TelemetryWriter
+from app.core.tracing import Tracer
+from app.routers.fast import router as fast_router
+from app.routers.metrics import router as metrics_router
 from app.routers.scooter import router as scooter_router
 from app.routers.taxi_optima import router as taxi_optima_router
 from app.routers.transit import router as transit_router
+from configs.settings import Settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener = configure_logging(container.get(Settings))
+    yield
+    # Flushed before the stores it writes through go away.
+    await container.get(TelemetryWriter).aclose()
+    await container.get(HttpClient).aclose()
+    await container.get(RouteCache).aclose()
+    await container.get(FleetStore).aclose()
+    await container.get(Tracer).aclose()
+    listener.stop()
 
 
 app = FastAPI(
     title="Scooter API",
     version="0.0.1",
     description="API for Scooter",
+    lifespan=lifespan,
 )
 
+app.include_router(fast_router)
 app.include_router(scooter_router)
 app.include_router(taxi_optima_router)
 app.include_router(transit_router)
+app.include_router(metrics_router)
 
-
+app.add_middleware(MetricsMiddleware, metrics=container.get(Metrics))
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -1,9 +1,17 @@
+from sqlalchemy import Double, Index
+from sqlmodel import Field
+
 from app.models.base import Base
 
 
 class Scooter(Base, table=True):
-    latitude: str
-    longitude: str
+    __table_args__ = (
+        Index("ix_scooter_latitude_longitude", "latitude", "longitude"),
+        Index("ix_scooter_longitude_latitude", "longitude", "latitude"),
+    )
+
+    latitude: float = Field(sa_type=Double)
+    longitude: float = Field(sa_type=Double)
 
     charge: int
     distance: int
@@ -1,23 +1,42 @@
-from typing import List
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Sequence, Tuple, Union
+from uuid import UUID
 
-from sqlalchemy import Select
+import asyncpg
+from sqlalchemy import Select, func, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlmodel import and_
 from wireup import service
 
 from app.core.database import Database
+from app.exceptions.infrastructure import DatabaseUnreachableError
 from app.models.base import Base
 from app.models.scooter import Scooter
 from app.repositories.base_repository import BaseRepository
-from app.schemas.coordinate import Coordinate
 from app.schemas.scooter import ScooterCreate, ScooterCreateRequest, ScooterUpdate
 
 
+# Generated `geography(Point)` column maintained by the database, see
+# migration 4b0d2c7e9a13. It is not part of the SQLModel on purpose.
+GEOG = literal_column("geog")
+
+COPY_COLUMNS = ["id", "latitude", "longitude", "charge", "distance"]
+
+# Rows per INSERT .. ON CONFLICT statement; five bind parameters each, well
+# under the 32767 asyncpg allows.
+UPSERT_ROWS = 500
+
+
+def geog_point(latitude: float, longitude: float):
+    return func.geography(func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326))
+
+
 @service
 class ScooterRepository(BaseRepository[Scooter, ScooterCreate, ScooterUpdate]):
     def __init__(self, database: Database):
         super().__init__(Scooter, database)
+        self.listen = database.listen
 
-    async def get_by_geo(self, latitude: str, longitude: str) -> List[Scooter]:
+    async def get_by_geo(self, latitude: float, longitude: float) -> List[Scooter]:
         async with self.produce_session() as session:
             stmt = (
                 Select(self.model)
@@ -34,7 +53,70 @@ class ScooterRepository(BaseRepository[Scooter, ScooterCreate, ScooterUpdate]):
 
             return objs
 
-    async def get_all_coords(self) -> List[Coordinate]:
+    async def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int
+    ) -> List[Tuple[Scooter, float]]:
+        async with self.produce_session() as session:
+            point = geog_point(latitude, longitude)
+            stmt = (
+                Select(self.model, func.ST_Distance(GEOG, point).label("meters"))
+                .order_by(GEOG.op("<->")(point))
+                .limit(k)
+            )
+
+            res = await session.execute(stmt)
+
+            return [(obj, meters) for obj, meters in res.all()]
+
+    async def within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        meters: float
+    ) -> List[Tuple[Scooter, float]]:
+        async with self.produce_session() as session:
+            point = geog_point(latitude, longitude)
+            distance = func.ST_Distance(GEOG, point)
+            stmt = (
+                Select(self.model, distance.label("meters"))
+                .where(func.ST_DWithin(GEOG, point, meters))
+                .order_by(distance)
+            )
+
+            res = await session.execute(stmt)
+
+            return [(obj, meters) for obj, meters in res.all()]
+
+    async def within_bbox(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float
+    ) -> List[Scooter]:
+        async with self.produce_session() as session:
+            # Plain range predicates on the numeric columns are served by the
+            # composite (latitude, longitude) / (longitude, latitude) B-trees.
+            stmt = Select(self.model).where(
+                and_(
+                    self.model.latitude.between(min_latitude, max_latitude),
+                    self.model.longitude.between(min_longitude, max_longitude)
+                )
+            )
+
+            res = await session.execute(stmt)
+            objs = res.scalars().all()
+
+            return objs
+
+    async def stream_coords(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[float, float]]]:
+        """
+        Distinct scooter coordinates in batches read from a server-side
+        cursor, so only one batch is held in memory at a time.
+        """
         async with self.produce_session() as session:
             stmt = Select(
                 self.model.latitude,
@@ -42,18 +124,54 @@ class ScooterRepository(BaseRepository[Scooter, ScooterCreate, ScooterUpdate]):
             ).group_by(
                 self.model.latitude,
                 self.model.longitude
-            )
+            ).execution_options(yield_per=batch_size)
 
-            res = await session.execute(stmt)
-            data = res.all()
+            res = await session.stream(stmt)
+            async for rows in res.partitions():
+                yield [tuple(row) for row in rows]
 
-            print(data)
+    async def get_positions(self) -> List[Tuple[UUID, float, float, int]]:
+        """(id, latitude, longitude, remaining range) of every scooter."""
+        async with self.produce_session() as session:
+            stmt = Select(self.model.id, self.model.latitude, self.model.longitude, self.model.distance)
 
-            return [Coordinate.model_validate({"latitude": obj[0], "longitude": obj[1]}, from_attributes=True) for obj in data]
+            res = await session.execute(stmt)
 
-    async def create_bulk(self, scooters: List[ScooterCreate]) -> List[Scooter]:
+            return [tuple(row) for row in res.all()]
+
+    async def copy_bulk(self, records: Union[Iterable[Tuple], AsyncIterable[Tuple]]) -> int:
+        """
+        Stream (id, latitude, longitude, charge, distance) rows into the table
+        with COPY in a single transaction; returns the number of rows written.
+        """
         async with self.produce_session() as session:
-            session.add_all([self.model.model_validate(scooter, from_attributes=True) for scooter in scooters])
+            connection = await session.connection()
+            raw = await connection.get_raw_connection()
+            try:
+                status = await raw.driver_connection.copy_records_to_table(
+                    self.model.__tablename__,
+                    records=records,
+                    columns=COPY_COLUMNS,
+                )
+            except asyncpg.PostgresError as e:
+                raise DatabaseUnreachableError(e) from e
             await session.commit()
 
-            return scooters
+            return int(status.split()[-1])
+
+    async def upsert_positions(self, rows: Sequence[Tuple[UUID, float, float, int, int]]) -> None:
+        """
+        Write (id, latitude, longitude, charge, distance) rows in one
+        transaction, inserting scooters that do not exist yet.
+        """
+        async with self.produce_session() as session:
+            for start in range(0, len(rows), UPSERT_ROWS):
+                stmt = insert(self.model).values(
+                    [dict(zip(COPY_COLUMNS, row)) for row in rows[start:start + UPSERT_ROWS]]
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[self.model.id],
+                    set_={column: stmt.excluded[column] for column in COPY_COLUMNS[1:]},
+                )
+                await session.execute(stmt)
+            await session.commit()
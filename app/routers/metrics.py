@@ -0,0 +1,16 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Response
+from wireup import Inject
+
+from app.core.container import container
+from app.core.metrics import Metrics
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+@container.autowire
+async def get_metrics(metrics: Annotated[Metrics, Inject()]):
+    return Response(metrics.render(), media_type=Metrics.CONTENT_TYPE)
@@ -1,23 +1,88 @@
-from typing import Annotated, List
+import json
+from typing import Annotated, AsyncIterator, List, Tuple, Union
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Path, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from wireup import Inject
 
+from app.core import wire
 from app.core.container import container
-from app.schemas.coordinate import Coordinate
-from app.schemas.scooter import ScooterBulkCreate, ScooterCreateRequest, ScooterGet
+from app.core.ingest import CSV, NDJSON, csv_points, ndjson_points
+from app.core.telemetry import Reading, TelemetryWriter
+from app.core.tile_index import MAX_ZOOM
+from app.exceptions.infrastructure import EntityNotFoundError, UnsupportedMediaTypeError
+from app.schemas.coordinate import Coordinate, NearestBatchRequest, ScooterCluster, ScooterDist
+from app.schemas.scooter import (
+    ScooterBulkCreate,
+    ScooterCreateRequest,
+    ScooterGet,
+    ScooterTelemetry,
+    TelemetryStats,
+)
 from app.services.scooter_service import ScooterService
 
 
 router = APIRouter(prefix="/scooters", tags=["scooters"])
 
+BULK_ADAPTER = TypeAdapter(List[ScooterBulkCreate])
+TELEMETRY_ADAPTER = TypeAdapter(Union[List[ScooterTelemetry], ScooterTelemetry])
 
-@router.get("/geo")
+
+@router.get(
+    "/geo",
+    response_model=List[Coordinate],
+    responses={200: {"content": {
+        NDJSON: {"schema": Coordinate.model_json_schema()},
+        wire.MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    }}},
+)
 @container.autowire
 async def get_distance(
+    request: Request,
+    scooter_service: Annotated[ScooterService, Inject()],
+) -> StreamingResponse:
+    # Rows are written as they come off the database cursor, so memory and
+    # time to first byte do not grow with the fleet. Clients that accept
+    # NDJSON get one coordinate per line, binary clients packed fixed-point
+    # pairs (see app.core.wire), everyone else a JSON array.
+    batches = scooter_service.stream_coords()
+    accept = request.headers.get("accept", "")
+    if wire.MEDIA_TYPE in accept:
+        return StreamingResponse(_binary(batches), media_type=wire.MEDIA_TYPE)
+    if NDJSON in accept:
+        return StreamingResponse(_ndjson(batches), media_type=NDJSON)
+    return StreamingResponse(_json_array(batches), media_type="application/json")
+
+
+@router.get("/tiles/{z}/{x}/{y}")
+@container.autowire
+async def get_tile(
+    z: Annotated[int, Path(ge=0, le=MAX_ZOOM, description="Zoom")],
+    x: Annotated[int, Path(ge=0)],
+    y: Annotated[int, Path(ge=0)],
+    scooter_service: Annotated[ScooterService, Inject()],
+) -> List[ScooterCluster]:
+    if x >= 1 << z or y >= 1 << z:
+        raise EntityNotFoundError("Tile")
+    return await scooter_service.get_tile(z, x, y)
+
+
+@router.post("/nearest:batch")
+@container.autowire
+async def get_nearest_batch(
+    batch: NearestBatchRequest,
     scooter_service: Annotated[ScooterService, Inject()],
-) -> List[Coordinate]:
-    return await scooter_service.get_all_coords()
+) -> List[List[ScooterDist]]:
+    # One list per requested point, in request order, all answered from the
+    # same fleet snapshot.
+    return await scooter_service.get_nearby_many(
+        [(point.latitude, point.longitude) for point in batch.points],
+        batch.k,
+        [batch.min_range] * len(batch.points),
+    )
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -32,18 +97,128 @@ async def create_scooter(
 @router.get("/")
 @container.autowire
 async def get_by_geo(
-    latitude: Annotated[str, Query(..., description="Latitude")],
-    longitude: Annotated[str, Query(..., description="Longitude")],
+    latitude: Annotated[float, Query(..., description="Latitude")],
+    longitude: Annotated[float, Query(..., description="Longitude")],
     scooter_service: Annotated[ScooterService, Inject()],
 ) -> List[ScooterGet]:
     return await scooter_service.get_by_geo(latitude, longitude)
 
 
-@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": BULK_ADAPTER.json_schema(),
+                },
+                NDJSON: {
+                    "schema": ScooterBulkCreate.model_json_schema(),
+                    "example": '{"latitude": 40.4093, "longitude": 49.8671, "count": 3}',
+                },
+                CSV: {
+                    "schema": {"type": "string"},
+                    "example": "latitude,longitude,count\n40.4093,49.8671,3",
+                },
+            },
+        },
+    },
+)
 @container.autowire
 async def create_bulk(
-    scooters: List[ScooterBulkCreate],
+    request: Request,
     scooter_service: Annotated[ScooterService, Inject()],
 ):
-    await scooter_service.create_bulk(scooters)
-    return {"message": "Scooters created successfully"}
\ No newline at end of file
+    # NDJSON and CSV bodies are parsed and copied into the database as they
+    # arrive, so large fleet imports never sit in memory.
+    media_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    if media_type == NDJSON:
+        created = await scooter_service.ingest(ndjson_points(request.stream()))
+    elif media_type == CSV:
+        created = await scooter_service.ingest(csv_points(request.stream()))
+    elif media_type == "application/json":
+        try:
+            scooters = BULK_ADAPTER.validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+        created = await scooter_service.create_bulk(scooters)
+    else:
+        raise UnsupportedMediaTypeError(media_type)
+
+    return {"message": "Scooters created successfully", "created": created}
+
+
+@router.post("/telemetry", status_code=status.HTTP_202_ACCEPTED)
+@container.autowire
+async def post_telemetry(
+    readings: List[ScooterTelemetry],
+    telemetry: Annotated[TelemetryWriter, Inject()],
+):
+    # Accepted readings are written with the next flush; a full queue is
+    # answered with 503 and Retry-After rather than held in memory, and a
+    # batch larger than the queue with 413.
+    telemetry.offer([_reading(reading) for reading in readings])
+    return {"message": "Telemetry accepted", "accepted": len(readings)}
+
+
+@router.websocket("/telemetry/ws")
+@container.autowire
+async def stream_telemetry(
+    websocket: WebSocket,
+    telemetry: Annotated[TelemetryWriter, Inject()],
+):
+    # Each message is one reading or an array of them. The next message is
+    # only read once the previous one is queued, so a full queue pushes back
+    # on the sender through the socket instead of buffering here.
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                readings = TELEMETRY_ADAPTER.validate_json(message)
+            except ValidationError as e:
+                await websocket.send_json({"detail": jsonable_encoder(e.errors(include_url=False))})
+                continue
+            if not isinstance(readings, list):
+                readings = [readings]
+            await telemetry.put(_reading(reading) for reading in readings)
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/telemetry/stats")
+@container.autowire
+async def get_telemetry_stats(
+    telemetry: Annotated[TelemetryWriter, Inject()],
+) -> TelemetryStats:
+    return TelemetryStats(**telemetry.stats())
+
+
+def _reading(reading: ScooterTelemetry) -> Reading:
+    return reading.id, reading.latitude, reading.longitude, reading.charge, reading.distance
+
+
+def _coordinate(latitude: float, longitude: float) -> str:
+    return json.dumps({"latitude": latitude, "longitude": longitude}, separators=(",", ":"))
+
+
+async def _ndjson(batches: AsyncIterator[List[Tuple[float, float]]]) -> AsyncIterator[str]:
+    async for batch in batches:
+        yield "".join(f"{_coordinate(*row)}\n" for row in batch)
+
+
+async def _binary(batches: AsyncIterator[List[Tuple[float, float]]]) -> AsyncIterator[bytes]:
+    yield wire.coordinates_header()
+    async for batch in batches:
+        yield wire.pack_coordinates(batch)
+
+
+async def _json_array(batches: AsyncIterator[List[Tuple[float, float]]]) -> AsyncIterator[str]:
+    separator = "["
+    async for batch in batches:
+        if batch:
+            yield separator + ",".join(_coordinate(*row) for row in batch)
+            separator = ","
+    yield "[]" if separator == "[" else "]"
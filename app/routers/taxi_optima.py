@@ -1,8 +1,9 @@
 from typing import Annotated, List
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Query, Request, Response, status
 from wireup import Inject
 
+from app.core import wire
 from app.core.container import container
 from app.schemas.coordinate import Coordinate
 from app.schemas.taxi_optima import TaxiOptimaRequest, TaxiOptimaResponse
@@ -12,10 +13,19 @@ from app.services.taxi_optima import TaxiOptimaService
 router = APIRouter(prefix="/taxi-optima", tags=["taxi-optima"])
 
 
-@router.post("/request", status_code=status.HTTP_200_OK)
+@router.post(
+    "/request",
+    status_code=status.HTTP_200_OK,
+    response_model=TaxiOptimaResponse,
+    responses={200: {"content": {wire.MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}}},
+)
 @container.autowire
 async def create_taxi_optima(
+    request: Request,
     taxi_optima: TaxiOptimaRequest,
     taxi_optima_service: Annotated[TaxiOptimaService, Inject()],
-) -> TaxiOptimaResponse:
-    return taxi_optima_service.request_taxi_optima(taxi_optima)
\ No newline at end of file
+):
+    response = await taxi_optima_service.request_taxi_optima(taxi_optima)
+    if wire.MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(wire.encode_taxi_optima(response), media_type=wire.MEDIA_TYPE)
+    return response
\ No newline at end of file
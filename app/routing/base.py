@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+from app.schemas.routing import RouteLeg
+
+
+Point = Tuple[float, float]
+
+MODES = ("driving", "walking", "bicycling")
+
+
+class RoutingBackend(ABC):
+    """Point-to-point routing for the road modes used by the app."""
+
+    @abstractmethod
+    async def route(self, origin: Point, destination: Point, mode: str) -> Optional[RouteLeg]:
+        """Shortest-time route, or None when the points are not connected."""
+
+    @abstractmethod
+    async def durations(
+        self,
+        origins: Sequence[Point],
+        destinations: Sequence[Point],
+        mode: str
+    ) -> List[List[Optional[float]]]:
+        """Travel times in seconds as rows[origin][destination]; None when unreachable."""
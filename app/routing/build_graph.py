@@ -0,0 +1,196 @@
+"""
+Build a RoadGraph from an OpenStreetMap XML extract.
+
+    python -m app.routing.build_graph baku.osm data/graph
+
+The output directory is what ROUTING_GRAPH_PATH should point at.
+"""
+import argparse
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.haversine import EARTH_RADIUS_M
+from app.routing.graph import ACCESS, RoadGraph
+
+
+# km/h, used when a way has no usable maxspeed tag
+DRIVE_SPEEDS = {
+    "motorway": 90,
+    "motorway_link": 50,
+    "trunk": 80,
+    "trunk_link": 40,
+    "primary": 60,
+    "primary_link": 40,
+    "secondary": 50,
+    "secondary_link": 35,
+    "tertiary": 40,
+    "tertiary_link": 30,
+    "unclassified": 30,
+    "residential": 30,
+    "living_street": 10,
+    "service": 15,
+}
+
+NO_WALKING = {"motorway", "motorway_link", "trunk", "trunk_link"}
+NO_BICYCLING = NO_WALKING | {"footway", "pedestrian", "steps"}
+WALKABLE = {"footway", "pedestrian", "path", "steps", "track", "cycleway", "bridleway", "corridor"}
+CYCLABLE = {"cycleway", "path", "track"}
+
+DENIED = {"no", "private"}
+ALLOWED = {"yes", "designated", "permissive", "destination"}
+
+MPH = 1.609344
+
+
+def way_access(tags: Dict[str, str]) -> int:
+    highway = tags.get("highway")
+    if highway is None or tags.get("area") == "yes":
+        return 0
+
+    access = 0
+    if highway in DRIVE_SPEEDS:
+        access |= ACCESS["driving"]
+    if highway not in NO_WALKING and (highway in DRIVE_SPEEDS or highway in WALKABLE):
+        access |= ACCESS["walking"]
+    if highway not in NO_BICYCLING and (highway in DRIVE_SPEEDS or highway in CYCLABLE):
+        access |= ACCESS["bicycling"]
+
+    if tags.get("access") in DENIED:
+        access = 0
+
+    for mode, keys in (
+        ("driving", ("motor_vehicle", "motorcar")),
+        ("walking", ("foot",)),
+        ("bicycling", ("bicycle",)),
+    ):
+        values = [tags[key] for key in keys if key in tags]
+        if any(value in DENIED for value in values):
+            access &= ~ACCESS[mode]
+        elif any(value in ALLOWED for value in values) and not (mode == "driving" and highway not in DRIVE_SPEEDS):
+            access |= ACCESS[mode]
+
+    return access
+
+
+def way_speed(tags: Dict[str, str]) -> float:
+    """Driving speed in m/s."""
+    default = DRIVE_SPEEDS.get(tags.get("highway"), 30)
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*(mph)?", tags.get("maxspeed", ""))
+    if match is None:
+        return default / 3.6
+
+    speed = float(match.group(1)) * (MPH if match.group(2) else 1)
+    return min(speed, default * 1.5) / 3.6 if speed > 0 else default / 3.6
+
+
+def way_oneway(tags: Dict[str, str]) -> int:
+    """1 for forward-only, -1 for backward-only, 0 for both directions."""
+    oneway = tags.get("oneway")
+    if oneway in ("yes", "1", "true"):
+        return 1
+    if oneway == "-1":
+        return -1
+    if oneway is None and (tags.get("junction") == "roundabout" or tags.get("highway") == "motorway"):
+        return 1
+    return 0
+
+
+def parse(path: str) -> Tuple[Dict[int, Tuple[float, float]], List[Tuple[List[int], Dict[str, str]]]]:
+    nodes: Dict[int, Tuple[float, float]] = {}
+    ways: List[Tuple[List[int], Dict[str, str]]] = []
+
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag == "node":
+            nodes[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+        elif elem.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}
+            if "highway" in tags:
+                ways.append(([int(nd.get("ref")) for nd in elem.iter("nd")], tags))
+        else:
+            continue
+        elem.clear()
+
+    return nodes, ways
+
+
+def build(path: str) -> RoadGraph:
+    nodes, ways = parse(path)
+
+    ids: Dict[int, int] = {}
+    lat: List[float] = []
+    lon: List[float] = []
+    sources: List[int] = []
+    targets: List[int] = []
+    speeds: List[float] = []
+    accesses: List[int] = []
+
+    def node_index(osm_id: int) -> Optional[int]:
+        index = ids.get(osm_id)
+        if index is None:
+            point = nodes.get(osm_id)
+            if point is None:
+                return None
+            index = ids[osm_id] = len(lat)
+            lat.append(point[0])
+            lon.append(point[1])
+        return index
+
+    for refs, tags in ways:
+        access = way_access(tags)
+        if not access:
+            continue
+
+        speed = way_speed(tags)
+        oneway = way_oneway(tags)
+        one_direction = ACCESS["driving"]
+        if tags.get("oneway:bicycle") != "no":
+            one_direction |= ACCESS["bicycling"]
+        forward_access = access & ~one_direction if oneway == -1 else access
+        backward_access = access & ~one_direction if oneway == 1 else access
+
+        for a, b in zip(refs, refs[1:]):
+            u, v = node_index(a), node_index(b)
+            if u is None or v is None or u == v:
+                continue
+            for tail, head, edge_access in ((u, v, forward_access), (v, u, backward_access)):
+                if edge_access:
+                    sources.append(tail)
+                    targets.append(head)
+                    speeds.append(speed)
+                    accesses.append(edge_access)
+
+    lat_arr, lon_arr = np.array(lat), np.array(lon)
+    sources_arr, targets_arr = np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64)
+
+    lat1, lat2 = np.radians(lat_arr[sources_arr]), np.radians(lat_arr[targets_arr])
+    dlon = np.radians(lon_arr[targets_arr] - lon_arr[sources_arr])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    length = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    return RoadGraph.from_edges(
+        lat_arr,
+        lon_arr,
+        sources_arr,
+        targets_arr,
+        length,
+        np.array(speeds),
+        np.array(accesses, dtype=np.uint8),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("osm", help="OpenStreetMap XML extract")
+    parser.add_argument("out", help="output directory")
+    args = parser.parse_args()
+
+    graph = build(args.osm)
+    graph.save(args.out)
+    print(f"{graph.node_count} nodes, {graph.meta['edges']} edges -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Build contraction hierarchies for a saved RoadGraph.
+
+    python -m app.routing.build_hierarchy data/graph --modes driving walking
+
+Each mode is written to `<graph>/ch_<mode>/` and picked up by the local
+routing backend at startup.
+"""
+import argparse
+import time
+
+from app.routing.base import MODES
+from app.routing.contraction import WITNESS_SETTLE_LIMIT, contract
+from app.routing.graph import RoadGraph
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("graph", help="directory written by app.routing.build_graph")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--settle-limit", type=int, default=WITNESS_SETTLE_LIMIT)
+    args = parser.parse_args()
+
+    graph = RoadGraph.load(args.graph, mmap=False)
+    for mode in args.modes:
+        started = time.perf_counter()
+        hierarchy = contract(graph, mode, args.settle_limit)
+        hierarchy.save(f"{args.graph}/ch_{mode}")
+        print(
+            f"{mode}: {hierarchy.meta['edges']} edges ({hierarchy.meta['shortcuts']} shortcuts)"
+            f" in {time.perf_counter() - started:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
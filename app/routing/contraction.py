@@ -0,0 +1,334 @@
+import heapq
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.routing.graph import RoadGraph
+
+
+INF = float("inf")
+
+WITNESS_SETTLE_LIMIT = 60
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy for one travel mode of a RoadGraph.
+
+    Every node has a rank; queries only relax edges towards higher ranks,
+    so both halves of a bidirectional search stay tiny. `up_*` holds the
+    edges u -> v with rank[v] > rank[u] stored at u, `down_*` holds the
+    edges v -> u with rank[v] > rank[u] stored at u (pointing at v).
+    Shortcut edges carry the node they bypass in `middle` (-1 for road
+    edges) so paths can be unpacked back to road nodes.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict) -> None:
+        self.arrays = arrays
+        self.meta = meta
+        self.mode = meta["mode"]
+        self.rank = arrays["rank"]
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "ContractionHierarchy":
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        arrays = {
+            file.stem: np.load(file, mmap_mode="r" if mmap else None)
+            for file in path.glob("*.npy")
+        }
+        return cls(arrays, meta)
+
+    @classmethod
+    def load_all(cls, graph_path: Union[str, Path]) -> Dict[str, "ContractionHierarchy"]:
+        """Every hierarchy built next to a saved graph, keyed by mode."""
+        hierarchies = {}
+        for path in sorted(Path(graph_path).glob("ch_*")):
+            hierarchy = cls.load(path)
+            hierarchies[hierarchy.mode] = hierarchy
+        return hierarchies
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(path / f"{name}.npy", np.asarray(array))
+        (path / "meta.json").write_text(json.dumps(self.meta))
+
+    def query(self, source: int, target: int) -> Optional[Tuple[float, float, List[int]]]:
+        """(seconds, meters, nodes) of the fastest path, or None if unreachable."""
+        if source == target:
+            return 0.0, 0.0, [source]
+
+        forward = _UpwardSearch(self, source, "up")
+        backward = _UpwardSearch(self, target, "down")
+        best, meeting = INF, None
+
+        # A side stops once its smallest key cannot improve on `best`.
+        while forward.heap or backward.heap:
+            if not backward.heap or (forward.heap and forward.heap[0][0] <= backward.heap[0][0]):
+                this, other = forward, backward
+            else:
+                this, other = backward, forward
+
+            if this.heap[0][0] >= best:
+                this.heap.clear()
+                continue
+
+            u = this.step()
+            if u is not None and u in other.dist and this.dist[u] + other.dist[u] < best:
+                best, meeting = this.dist[u] + other.dist[u], u
+
+        if meeting is None:
+            return None
+        parents_f, parents_r = forward.parents, backward.parents
+
+        # Hierarchy edges along the path as (tail, head, edge); `down_`
+        # edges are encoded as ~index.
+        edges: List[Tuple[int, int, int]] = []
+        u = meeting
+        while u in parents_f:
+            prev, edge = parents_f[u]
+            edges.append((prev, u, edge))
+            u = prev
+        edges.reverse()
+
+        u = meeting
+        while u in parents_r:
+            nxt, edge = parents_r[u]
+            edges.append((u, nxt, ~edge))
+            u = nxt
+
+        meters = 0.0
+        path = [source]
+        for tail, head, edge in edges:
+            meters += float(self.arrays["down_length"][~edge] if edge < 0 else self.arrays["up_length"][edge])
+            path.extend(self._unpack(tail, head, edge)[1:])
+
+        return best, meters, path
+
+    def many_to_many(self, sources: Sequence[Optional[int]], targets: Sequence[Optional[int]]) -> List[List[Optional[float]]]:
+        """Travel times as rows[source][target] using bucket-based searches."""
+        buckets: Dict[int, List[Tuple[int, float]]] = {}
+        for j, target in enumerate(targets):
+            if target is None:
+                continue
+            for u, d in _UpwardSearch(self, target, "down").run().items():
+                buckets.setdefault(u, []).append((j, d))
+
+        rows: List[List[Optional[float]]] = []
+        for source in sources:
+            row: List[Optional[float]] = [None] * len(targets)
+            if source is not None:
+                for u, du in _UpwardSearch(self, source, "up").run().items():
+                    for j, dv in buckets.get(u, ()):
+                        if row[j] is None or du + dv < row[j]:
+                            row[j] = du + dv
+            rows.append(row)
+
+        return rows
+
+    def _unpack(self, tail: int, head: int, edge: int) -> List[int]:
+        """Road nodes from tail to head along one hierarchy edge."""
+        nodes = [tail]
+        stack = [(tail, head, edge)]
+
+        while stack:
+            u, v, e = stack.pop()
+            middle = int(self.arrays["down_middle"][~e] if e < 0 else self.arrays["up_middle"][e])
+            if middle < 0:
+                nodes.append(v)
+                continue
+            stack.append((middle, v, self._edge(middle, v)))
+            stack.append((u, middle, self._edge(u, middle)))
+
+        return nodes
+
+    def _edge(self, u: int, v: int) -> int:
+        # A hierarchy edge between u and v is stored at the lower ranked end.
+        if self.rank[u] < self.rank[v]:
+            direction, at, other = "up", u, v
+        else:
+            direction, at, other = "down", v, u
+
+        start, end = int(self.arrays[f"{direction}_indptr"][at]), int(self.arrays[f"{direction}_indptr"][at + 1])
+        indices = self.arrays[f"{direction}_indices"][start:end].tolist()
+        weights = self.arrays[f"{direction}_weight"][start:end].tolist()
+        _, edge = min((w, start + i) for i, (x, w) in enumerate(zip(indices, weights)) if x == other)
+        return edge if direction == "up" else ~edge
+
+
+class _UpwardSearch:
+    """
+    One side of a hierarchy query. Nodes reached more cheaply from above
+    are stalled (not expanded): they cannot lie on a shortest path
+    through this side's search space.
+    """
+
+    __slots__ = ("indptr", "indices", "weights", "stall_indptr", "stall_indices", "stall_weights", "dist", "parents", "settled", "heap")
+
+    def __init__(self, hierarchy: ContractionHierarchy, root: int, direction: str) -> None:
+        opposite = "down" if direction == "up" else "up"
+        self.indptr = hierarchy.arrays[f"{direction}_indptr"]
+        self.indices = hierarchy.arrays[f"{direction}_indices"]
+        self.weights = hierarchy.arrays[f"{direction}_weight"]
+        self.stall_indptr = hierarchy.arrays[f"{opposite}_indptr"]
+        self.stall_indices = hierarchy.arrays[f"{opposite}_indices"]
+        self.stall_weights = hierarchy.arrays[f"{opposite}_weight"]
+        self.dist: Dict[int, float] = {root: 0.0}
+        # node -> (previous node, edge index in this direction's arrays)
+        self.parents: Dict[int, Tuple[int, int]] = {}
+        self.settled: Dict[int, float] = {}
+        self.heap: List[Tuple[float, int]] = [(0.0, root)]
+
+    def step(self) -> Optional[int]:
+        du, u = heapq.heappop(self.heap)
+        if u in self.settled:
+            return None
+        self.settled[u] = du
+
+        start, end = int(self.stall_indptr[u]), int(self.stall_indptr[u + 1])
+        for x, w in zip(self.stall_indices[start:end].tolist(), self.stall_weights[start:end].tolist()):
+            if self.dist.get(x, INF) + w < du:
+                return u
+
+        start, end = int(self.indptr[u]), int(self.indptr[u + 1])
+        for edge, v, w in zip(range(start, end), self.indices[start:end].tolist(), self.weights[start:end].tolist()):
+            dv = du + w
+            if dv < self.dist.get(v, INF):
+                self.dist[v] = dv
+                self.parents[v] = (u, edge)
+                heapq.heappush(self.heap, (dv, v))
+
+        return u
+
+    def run(self) -> Dict[int, float]:
+        while self.heap:
+            self.step()
+        return self.settled
+
+
+def contract(graph: RoadGraph, mode: str, settle_limit: int = WITNESS_SETTLE_LIMIT) -> ContractionHierarchy:
+    """
+    Contract every node of `graph` for `mode`, cheapest first by edge
+    difference with lazy priority updates. Witness searches are capped at
+    `settle_limit` settled nodes; a capped search only adds a redundant
+    shortcut, never a wrong one.
+    """
+    node_count = graph.node_count
+    out_edges: List[Dict[int, Tuple[float, float, int]]] = [{} for _ in range(node_count)]
+    in_edges: List[Dict[int, Tuple[float, float, int]]] = [{} for _ in range(node_count)]
+
+    times = graph.edge_times("fwd", mode)
+    indptr = np.asarray(graph.arrays["fwd_indptr"])
+    sources = np.repeat(np.arange(node_count), np.diff(indptr))
+    usable = np.isfinite(times) & (sources != np.asarray(graph.arrays["fwd_indices"]))
+    for u, v, w, length in zip(
+        sources[usable].tolist(),
+        np.asarray(graph.arrays["fwd_indices"])[usable].tolist(),
+        times[usable].tolist(),
+        np.asarray(graph.arrays["fwd_length"], dtype=np.float64)[usable].tolist(),
+    ):
+        if w < out_edges[u].get(v, (INF,))[0]:
+            out_edges[u][v] = in_edges[v][u] = (w, length, -1)
+
+    # Every edge ever present, original or shortcut: (u, v) -> (weight, length, middle)
+    all_edges: Dict[Tuple[int, int], Tuple[float, float, int]] = {
+        (u, v): edge for u in range(node_count) for v, edge in out_edges[u].items()
+    }
+    contracted = np.zeros(node_count, dtype=bool)
+    deleted_neighbours = [0] * node_count
+    rank = np.zeros(node_count, dtype=np.int32)
+
+    def witness(u: int, skip: int, limit: float) -> Dict[int, float]:
+        dist = {u: 0.0}
+        heap = [(0.0, u)]
+        settled = 0
+        while heap and settled < settle_limit:
+            du, x = heapq.heappop(heap)
+            if du > dist.get(x, INF):
+                continue
+            if du > limit:
+                break
+            settled += 1
+            for y, (w, _, _) in out_edges[x].items():
+                if y == skip:
+                    continue
+                dy = du + w
+                if dy < dist.get(y, INF):
+                    dist[y] = dy
+                    heapq.heappush(heap, (dy, y))
+        return dist
+
+    def shortcuts(v: int) -> List[Tuple[int, int, float, float]]:
+        found = []
+        outgoing = out_edges[v]
+        if not outgoing:
+            return found
+        max_out = max(w for w, _, _ in outgoing.values())
+        for u, (w_in, l_in, _) in in_edges[v].items():
+            dist = witness(u, v, w_in + max_out)
+            for x, (w_out, l_out, _) in outgoing.items():
+                if x == u:
+                    continue
+                if w_in + w_out < dist.get(x, INF):
+                    found.append((u, x, w_in + w_out, l_in + l_out))
+        return found
+
+    def priority(v: int) -> int:
+        return len(shortcuts(v)) - len(in_edges[v]) - len(out_edges[v]) + deleted_neighbours[v]
+
+    heap = [(priority(v), v) for v in range(node_count)]
+    heapq.heapify(heap)
+    order = 0
+
+    while heap:
+        _, v = heapq.heappop(heap)
+        if contracted[v]:
+            continue
+        current = priority(v)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+
+        for u, x, w, length in shortcuts(v):
+            if w < out_edges[u].get(x, (INF,))[0]:
+                out_edges[u][x] = in_edges[x][u] = (w, length, v)
+                if w < all_edges.get((u, x), (INF,))[0]:
+                    all_edges[(u, x)] = (w, length, v)
+
+        for u in in_edges[v]:
+            del out_edges[u][v]
+            deleted_neighbours[u] += 1
+        for x in out_edges[v]:
+            del in_edges[x][v]
+            deleted_neighbours[x] += 1
+        out_edges[v].clear()
+        in_edges[v].clear()
+
+        contracted[v] = True
+        rank[v] = order
+        order += 1
+
+    arrays: Dict[str, np.ndarray] = {"rank": rank}
+    up = [(u, v, edge) for (u, v), edge in all_edges.items() if rank[v] > rank[u]]
+    down = [(v, u, edge) for (u, v), edge in all_edges.items() if rank[u] > rank[v]]
+    for direction, edges in (("up", up), ("down", down)):
+        edges.sort(key=lambda item: item[0])
+        at = np.array([e[0] for e in edges], dtype=np.int64)
+        arrays[f"{direction}_indptr"] = np.concatenate((
+            [0], np.cumsum(np.bincount(at, minlength=node_count))
+        )).astype(np.int64)
+        arrays[f"{direction}_indices"] = np.array([e[1] for e in edges], dtype=np.int32)
+        arrays[f"{direction}_weight"] = np.array([e[2][0] for e in edges], dtype=np.float64)
+        arrays[f"{direction}_length"] = np.array([e[2][1] for e in edges], dtype=np.float32)
+        arrays[f"{direction}_middle"] = np.array([e[2][2] for e in edges], dtype=np.int32)
+
+    return ContractionHierarchy(arrays, {
+        "mode": mode,
+        "nodes": node_count,
+        "edges": len(up) + len(down),
+        "shortcuts": sum(1 for edge in all_edges.values() if edge[2] >= 0),
+    })
@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from app.core.http_client import HttpClient
+from app.core.route_cache import RouteCache
+from app.exceptions.infrastructure import RoutingProviderError
+from app.routing.base import Point, RoutingBackend
+from app.routing.graph import BICYCLING_SPEED
+from app.schemas.routing import RouteLeg
+from app.services.google_maps import GoogleMapsService
+from configs.settings import Settings
+
+
+class GoogleRoutingBackend(RoutingBackend):
+    """
+    Google Maps Platform routing.
+
+    Driving uses the Routes API, walking the Directions API. Google has no
+    scooter profile, so bicycling takes the driving geometry and re-times it
+    at BICYCLING_SPEED.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        maps: GoogleMapsService,
+        http_client: HttpClient,
+        route_cache: RouteCache
+    ) -> None:
+        self.settings = settings
+        self.maps = maps
+        self.http_client = http_client
+        self.route_cache = route_cache
+
+    async def route(self, origin: Point, destination: Point, mode: str) -> Optional[RouteLeg]:
+        if mode == "walking":
+            routes = await self.maps.directions(_location(origin), _location(destination), mode="walking")
+            if not routes:
+                return None
+            leg = routes[0]["legs"][0]
+            return RouteLeg(
+                distance=leg["distance"]["value"],
+                duration=leg["duration"]["value"],
+                polyline=routes[0]["overview_polyline"]["points"],
+            )
+
+        leg = await self._drive(origin, destination)
+        if leg is not None and mode == "bicycling":
+            leg.duration = int(leg.distance / BICYCLING_SPEED)
+        return leg
+
+    async def durations(
+        self,
+        origins: Sequence[Point],
+        destinations: Sequence[Point],
+        mode: str
+    ) -> List[List[Optional[float]]]:
+        rows = await self.maps.distance_matrix(
+            [_location(point) for point in origins],
+            [_location(point) for point in destinations],
+            mode="driving" if mode == "bicycling" else mode
+        )
+
+        def seconds(element: Dict) -> Optional[float]:
+            if element["status"] != "OK":
+                return None
+            if mode == "bicycling":
+                return element["distance"]["value"] / BICYCLING_SPEED
+            return float(element["duration"]["value"])
+
+        return [[seconds(element) for element in row] for row in rows]
+
+    async def _drive(self, origin: Point, destination: Point) -> Optional[RouteLeg]:
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.settings.GOOGLE_MAPS_API_KEY,
+            "X-Goog-FieldMask": "routes.duration,routes.distanceMeters,routes.polyline.encodedPolyline"
+        }
+        data = {
+            "origin": {"location": {"latLng": {"latitude": origin[0], "longitude": origin[1]}}},
+            "destination": {"location": {"latLng": {"latitude": destination[0], "longitude": destination[1]}}},
+            "travelMode": "DRIVE",
+            "routingPreference": "TRAFFIC_AWARE",
+            "computeAlternativeRoutes": False,
+            "routeModifiers": {
+                "avoidTolls": False,
+                "avoidHighways": False,
+                "avoidFerries": False
+            },
+            "languageCode": "en-US",
+            "units": "IMPERIAL"
+        }
+
+        async def fetch() -> Dict:
+            try:
+                response = await self.http_client.post(self.settings.GOOGLE_MAPS_DRIVE_API_URL, headers=headers, json=data)
+            except httpx.HTTPError as e:
+                raise RoutingProviderError(type(e).__name__) from e
+            if response.status_code != 200:
+                raise RoutingProviderError(f"HTTP {response.status_code}")
+            return response.json()
+
+        route_data = await self.route_cache.get_or_fetch("driving", origin, destination, fetch)
+        routes = route_data.get("routes")
+        if not routes:
+            return None
+
+        route = routes[0]
+        return RouteLeg(
+            distance=route["distanceMeters"],
+            duration=int(route["duration"].rstrip("s")),
+            polyline=route["polyline"]["encodedPolyline"],
+        )
+
+
+def _location(point: Point) -> str:
+    return f"{point[0]},{point[1]}"
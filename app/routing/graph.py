@@ -0,0 +1,170 @@
+import json
+from math import asin, cos, floor, radians, sin, sqrt
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from app.core.haversine import EARTH_RADIUS_M
+
+
+ACCESS = {"driving": 1, "walking": 2, "bicycling": 4}
+
+WALKING_SPEED = 5 / 3.6  # m/s
+BICYCLING_SPEED = 23.5 / 3.6  # m/s, same assumption as the scooter leg in /fast/
+
+SNAP_CELL_SIZE = 0.002  # degrees
+SNAP_MAX_RING = 5
+
+
+class RoadGraph:
+    """
+    Directed road graph in CSR form, kept as flat NumPy arrays.
+
+    Both the forward (`fwd_*`) and the reversed (`rev_*`) adjacency are
+    stored so bidirectional searches never have to scan for incoming
+    edges. Every edge carries its length in meters, its driving speed in
+    m/s and an access bitmask (see ACCESS). On disk the graph is a
+    directory of `.npy` files plus `meta.json`, loaded memory-mapped.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict) -> None:
+        self.arrays = arrays
+        self.meta = meta
+        self.lat = arrays["lat"]
+        self.lon = arrays["lon"]
+        self.node_count = len(self.lat)
+        self.max_speed = float(meta["max_speed"])
+
+        self._edge_times: Dict[str, np.ndarray] = {}
+        self._node_access = np.zeros(self.node_count, dtype=np.uint8)
+        np.bitwise_or.at(self._node_access, self._sources("fwd"), arrays["fwd_access"])
+        np.bitwise_or.at(self._node_access, self._sources("rev"), arrays["rev_access"])
+        self._build_snap_grid()
+
+    @classmethod
+    def from_edges(
+        cls,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        length: np.ndarray,
+        speed: np.ndarray,
+        access: np.ndarray,
+    ) -> "RoadGraph":
+        node_count = len(lat)
+        arrays = {
+            "lat": np.ascontiguousarray(lat, dtype=np.float64),
+            "lon": np.ascontiguousarray(lon, dtype=np.float64),
+        }
+
+        for prefix, tails, heads in (("fwd", sources, targets), ("rev", targets, sources)):
+            order = np.argsort(tails, kind="stable")
+            arrays[f"{prefix}_indptr"] = np.concatenate((
+                [0], np.cumsum(np.bincount(tails, minlength=node_count))
+            )).astype(np.int64)
+            arrays[f"{prefix}_indices"] = heads[order].astype(np.int32)
+            arrays[f"{prefix}_length"] = length[order].astype(np.float32)
+            arrays[f"{prefix}_speed"] = speed[order].astype(np.float32)
+            arrays[f"{prefix}_access"] = access[order].astype(np.uint8)
+
+        driving = access & ACCESS["driving"] != 0
+        max_speed = float(speed[driving].max()) if driving.any() else BICYCLING_SPEED
+
+        return cls(arrays, {"max_speed": max_speed, "nodes": node_count, "edges": len(sources)})
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "RoadGraph":
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        arrays = {
+            file.stem: np.load(file, mmap_mode="r" if mmap else None)
+            for file in path.glob("*.npy")
+        }
+        return cls(arrays, meta)
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(path / f"{name}.npy", np.asarray(array))
+        (path / "meta.json").write_text(json.dumps(self.meta))
+
+    def edge_times(self, direction: str, mode: str) -> np.ndarray:
+        """Per-edge travel time in seconds for `mode`; inf where the edge is closed to it."""
+        key = f"{direction}_{mode}"
+        if key not in self._edge_times:
+            length = np.asarray(self.arrays[f"{direction}_length"], dtype=np.float64)
+            if mode == "driving":
+                speed = np.asarray(self.arrays[f"{direction}_speed"], dtype=np.float64)
+            else:
+                speed = WALKING_SPEED if mode == "walking" else BICYCLING_SPEED
+
+            with np.errstate(divide="ignore"):
+                times = length / speed
+            closed = self.arrays[f"{direction}_access"] & ACCESS[mode] == 0
+            times[closed] = np.inf
+            self._edge_times[key] = times
+
+        return self._edge_times[key]
+
+    def top_speed(self, mode: str) -> float:
+        if mode == "driving":
+            return self.max_speed
+        return WALKING_SPEED if mode == "walking" else BICYCLING_SPEED
+
+    def distance(self, u: int, latitude: float, longitude: float) -> float:
+        lat1, lat2 = radians(self.lat[u]), radians(latitude)
+        a = (
+            sin((lat2 - lat1) / 2) ** 2
+            + cos(lat1) * cos(lat2) * sin((radians(longitude) - radians(self.lon[u])) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_M * asin(sqrt(min(a, 1.0)))
+
+    def snap(self, latitude: float, longitude: float, mode: str) -> Optional[int]:
+        """Nearest node usable by `mode`, searching at most SNAP_MAX_RING cells away."""
+        ci, cj = floor(latitude / SNAP_CELL_SIZE), floor(longitude / SNAP_CELL_SIZE)
+        bit = ACCESS[mode]
+        best, best_distance, found_ring = None, float("inf"), None
+
+        for ring in range(SNAP_MAX_RING + 1):
+            if found_ring is not None and ring > found_ring + 1:
+                break
+
+            for i in range(ci - ring, ci + ring + 1):
+                for j in range(cj - ring, cj + ring + 1):
+                    if max(abs(i - ci), abs(j - cj)) != ring:
+                        continue
+                    bounds = self._snap_cells.get((i, j))
+                    if bounds is None:
+                        continue
+                    for u in self._snap_order[bounds[0]:bounds[1]].tolist():
+                        if not self._node_access[u] & bit:
+                            continue
+                        d = self.distance(u, latitude, longitude)
+                        if d < best_distance:
+                            best, best_distance = u, d
+                            if found_ring is None:
+                                found_ring = ring
+
+        return best
+
+    def _sources(self, direction: str) -> np.ndarray:
+        indptr = np.asarray(self.arrays[f"{direction}_indptr"])
+        return np.repeat(np.arange(self.node_count), np.diff(indptr))
+
+    def _build_snap_grid(self) -> None:
+        ci = np.floor(np.asarray(self.lat) / SNAP_CELL_SIZE).astype(np.int64)
+        cj = np.floor(np.asarray(self.lon) / SNAP_CELL_SIZE).astype(np.int64)
+        order = np.lexsort((cj, ci))
+        ci, cj = ci[order], cj[order]
+
+        starts = np.flatnonzero(np.concatenate(([True], (ci[1:] != ci[:-1]) | (cj[1:] != cj[:-1]))))
+        ends = np.append(starts[1:], len(order))
+
+        self._snap_order = order
+        self._snap_cells = {
+            (int(ci[s]), int(cj[s])): (int(s), int(e))
+            for s, e in zip(starts, ends)
+        }
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.core import polyline
+from app.routing.base import Point, RoutingBackend
+from app.routing.contraction import ContractionHierarchy
+from app.routing.graph import RoadGraph
+from app.schemas.routing import RouteLeg
+
+
+INF = float("inf")
+
+
+class _Search:
+    """State of one direction of the bidirectional search."""
+
+    __slots__ = ("indptr", "indices", "times", "sign", "offset", "dist", "parents", "settled", "heap")
+
+    def __init__(self, graph: RoadGraph, direction: str, mode: str, root: int, offset: float) -> None:
+        self.indptr = graph.arrays[f"{direction}_indptr"]
+        self.indices = graph.arrays[f"{direction}_indices"]
+        self.times = graph.edge_times(direction, mode)
+        self.sign = 1.0 if direction == "fwd" else -1.0
+        self.offset = offset
+        self.dist: Dict[int, float] = {root: 0.0}
+        # node -> (previous node, edge index in this direction's arrays)
+        self.parents: Dict[int, Tuple[int, int]] = {}
+        self.settled: Set[int] = set()
+        self.heap: List[Tuple[float, int]] = [(0.0, root)]
+
+
+class LocalRoutingBackend(RoutingBackend):
+    """
+    Routes over a preprocessed OSM road graph (see `app.routing.build_graph`).
+
+    Point-to-point queries run a bidirectional A* with the average
+    potential of the forward and backward haversine estimates, which keeps
+    both heuristics consistent so the usual bidirectional stopping rule
+    holds. Modes with a contraction hierarchy (see
+    `app.routing.build_hierarchy`) are answered from it instead. Searches
+    are CPU bound and run in a worker thread.
+    """
+
+    def __init__(self, graph: RoadGraph, hierarchies: Optional[Dict[str, ContractionHierarchy]] = None) -> None:
+        self.graph = graph
+        self.hierarchies = hierarchies or {}
+
+    async def route(self, origin: Point, destination: Point, mode: str) -> Optional[RouteLeg]:
+        return await asyncio.to_thread(self.route_sync, origin, destination, mode)
+
+    async def durations(
+        self,
+        origins: Sequence[Point],
+        destinations: Sequence[Point],
+        mode: str
+    ) -> List[List[Optional[float]]]:
+        return await asyncio.to_thread(self.durations_sync, origins, destinations, mode)
+
+    def route_sync(self, origin: Point, destination: Point, mode: str) -> Optional[RouteLeg]:
+        source = self.graph.snap(*origin, mode)
+        target = self.graph.snap(*destination, mode)
+        if source is None or target is None:
+            return None
+
+        hierarchy = self.hierarchies.get(mode)
+        if hierarchy is not None:
+            found = hierarchy.query(source, target)
+        else:
+            found = self.shortest_path(source, target, mode)
+        if found is None:
+            return None
+
+        seconds, meters, path = found
+        return RouteLeg(
+            distance=round(meters),
+            duration=round(seconds),
+            polyline=polyline.encode_arrays(self.graph.lat[path], self.graph.lon[path]),
+        )
+
+    def durations_sync(
+        self,
+        origins: Sequence[Point],
+        destinations: Sequence[Point],
+        mode: str
+    ) -> List[List[Optional[float]]]:
+        sources = [self.graph.snap(*point, mode) for point in origins]
+        targets = [self.graph.snap(*point, mode) for point in destinations]
+
+        hierarchy = self.hierarchies.get(mode)
+        if hierarchy is not None:
+            return hierarchy.many_to_many(sources, targets)
+
+        rows: List[List[Optional[float]]] = [[None] * len(targets) for _ in sources]
+
+        # One-to-many searches from whichever side has fewer points.
+        if len(sources) <= len(targets):
+            for i, source in enumerate(sources):
+                if source is None:
+                    continue
+                reached = self.one_to_many(source, targets, mode, "fwd")
+                for j, target in enumerate(targets):
+                    rows[i][j] = reached.get(target)
+        else:
+            for j, target in enumerate(targets):
+                if target is None:
+                    continue
+                reached = self.one_to_many(target, sources, mode, "rev")
+                for i, source in enumerate(sources):
+                    rows[i][j] = reached.get(source)
+
+        return rows
+
+    def shortest_path(self, source: int, target: int, mode: str) -> Optional[Tuple[float, float, List[int]]]:
+        """(seconds, meters, nodes) of the fastest path, or None if unreachable."""
+        if source == target:
+            return 0.0, 0.0, [source]
+
+        graph = self.graph
+        speed = graph.top_speed(mode)
+        s_lat, s_lon = float(graph.lat[source]), float(graph.lon[source])
+        t_lat, t_lon = float(graph.lat[target]), float(graph.lon[target])
+        potentials: Dict[int, float] = {}
+
+        def potential(u: int) -> float:
+            p = potentials.get(u)
+            if p is None:
+                p = (graph.distance(u, t_lat, t_lon) - graph.distance(u, s_lat, s_lon)) / (2 * speed)
+                potentials[u] = p
+            return p
+
+        forward = _Search(graph, "fwd", mode, source, -potential(source))
+        backward = _Search(graph, "rev", mode, target, potential(target))
+
+        # Keys are reduced distances: forward d(v) + p(v) - p(s), backward
+        # d(v) - p(v) + p(t). A path's reduced length is its real length
+        # plus p(t) - p(s) from either side.
+        shift = potential(target) - potential(source)
+        best, meeting = INF, None
+
+        while forward.heap and backward.heap:
+            if forward.heap[0][0] + backward.heap[0][0] >= best + shift:
+                break
+
+            this, other = (forward, backward) if forward.heap[0][0] <= backward.heap[0][0] else (backward, forward)
+            _, u = heapq.heappop(this.heap)
+            if u in this.settled:
+                continue
+            this.settled.add(u)
+
+            du = this.dist[u]
+            start, end = int(this.indptr[u]), int(this.indptr[u + 1])
+            for edge, v, w in zip(range(start, end), this.indices[start:end].tolist(), this.times[start:end].tolist()):
+                if w == INF:
+                    continue
+                dv = du + w
+                if dv < this.dist.get(v, INF):
+                    this.dist[v] = dv
+                    this.parents[v] = (u, edge)
+                    heapq.heappush(this.heap, (dv + this.sign * potential(v) + this.offset, v))
+                    if v in other.dist and dv + other.dist[v] < best:
+                        best, meeting = dv + other.dist[v], v
+
+        if meeting is None:
+            return None
+
+        meters = 0.0
+
+        path = [meeting]
+        u = meeting
+        while u in forward.parents:
+            u, edge = forward.parents[u]
+            meters += float(graph.arrays["fwd_length"][edge])
+            path.append(u)
+        path.reverse()
+
+        u = meeting
+        while u in backward.parents:
+            u, edge = backward.parents[u]
+            meters += float(graph.arrays["rev_length"][edge])
+            path.append(u)
+
+        return best, meters, path
+
+    def one_to_many(self, root: int, goals: Sequence[Optional[int]], mode: str, direction: str) -> Dict[int, float]:
+        """Dijkstra from `root` that stops once every goal is settled."""
+        indptr = self.graph.arrays[f"{direction}_indptr"]
+        indices = self.graph.arrays[f"{direction}_indices"]
+        times = self.graph.edge_times(direction, mode)
+
+        pending = {goal for goal in goals if goal is not None}
+        dist = {root: 0.0}
+        settled: Dict[int, float] = {}
+        heap = [(0.0, root)]
+
+        while heap and pending:
+            du, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled[u] = du
+            pending.discard(u)
+
+            start, end = int(indptr[u]), int(indptr[u + 1])
+            for v, w in zip(indices[start:end].tolist(), times[start:end].tolist()):
+                dv = du + w
+                if dv < dist.get(v, INF):
+                    dist[v] = dv
+                    heapq.heappush(heap, (dv, v))
+
+        return settled
@@ -1,11 +1,35 @@
-from pydantic import BaseModel
+from typing import List
+
+from pydantic import BaseModel, Field, model_validator
+
+
+# Neighbours one /scooters/nearest:batch request may ask for (points × k).
+MAX_BATCH_NEIGHBOURS = 100000
 
 
 class Coordinate(BaseModel):
-    latitude: str
-    longitude: str
+    latitude: float
+    longitude: float
 
 
 class ScooterDist(BaseModel):
     coordinate: Coordinate
     distance: int
+
+
+class ScooterCluster(BaseModel):
+    latitude: float
+    longitude: float
+    count: int
+
+
+class NearestBatchRequest(BaseModel):
+    points: List[Coordinate] = Field(max_length=10000)
+    k: int = Field(1, ge=1, le=100)
+    min_range: int = Field(0, ge=0, le=100000, description="Remaining range, in meters, every returned scooter must have")
+
+    @model_validator(mode="after")
+    def _bounded(self) -> "NearestBatchRequest":
+        if len(self.points) * self.k > MAX_BATCH_NEIGHBOURS:
+            raise ValueError(f"points × k must not exceed {MAX_BATCH_NEIGHBOURS}")
+        return self
@@ -8,10 +8,10 @@ from app.enums.transport_type import TransportType
 class Path(BaseModel):
     distance: str
     duration: str
-    start_latitude: str
-    start_longitude: str
-    end_latitude: str
-    end_longitude: str
+    start_latitude: float
+    start_longitude: float
+    end_latitude: float
+    end_longitude: float
     polyline: str
     type: TransportType
 
@@ -20,5 +20,6 @@ class Path(BaseModel):
 
 class FastResponse(BaseModel):
     paths: List[Path] = []
+    duration: int = 0  # seconds, door to door
 
 
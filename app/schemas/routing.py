@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class RouteLeg(BaseModel):
+    distance: int  # meters
+    duration: int  # seconds
+    polyline: str
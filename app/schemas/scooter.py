@@ -4,9 +4,13 @@ from uuid import UUID
 from pydantic import BaseModel, Field
 
 
+# Scooters one bulk record may create at its point; each becomes a COPY row.
+MAX_BULK_COUNT = 1000
+
+
 class ScooterCreateRequest(BaseModel):
-    latitude: str
-    longitude: str
+    latitude: float
+    longitude: float
 
 
 class ScooterCreate(ScooterCreateRequest):
@@ -15,8 +19,8 @@ class ScooterCreate(ScooterCreateRequest):
 
 
 class ScooterUpdate(BaseModel):
-    latitude: str
-    longitude: str
+    latitude: float
+    longitude: float
 
     charge: int
     distance: int
@@ -27,4 +31,32 @@ class ScooterGet(ScooterCreate):
 
 
 class ScooterBulkCreate(ScooterCreateRequest):
-    count: int
+    # Same bounds as NDJSON and CSV records (see app.core.ingest).
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    count: int = Field(gt=0, le=MAX_BULK_COUNT)
+
+
+class ScooterTelemetry(BaseModel):
+    id: UUID
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+
+    charge: int = Field(ge=0, le=100)
+    distance: int = Field(ge=0)
+
+
+class TelemetryStats(BaseModel):
+    queue_depth: int
+    queue_capacity: int
+    pending: int
+    received: int
+    rejected: int
+    coalesced: int
+    written: int
+    flushes: int
+    failed_flushes: int
+    last_flush_rows: int
+    last_flush_ms: float
+    mean_flush_ms: float
+    max_flush_ms: float
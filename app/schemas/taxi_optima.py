@@ -1,19 +1,20 @@
 from pydantic import BaseModel, Field
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 
 
 class TaxiOptimaRequest(BaseModel):
-    user_latitude: str
-    user_longitude: str
-    destination_latitude: str
-    destination_longitude: str
+    user_latitude: float
+    user_longitude: float
+    destination_latitude: float
+    destination_longitude: float
+    zoom: Optional[int] = Field(None, ge=0, le=22, description="Map zoom to simplify geometry for")
     
     
 class TaxiOptimaResponse(BaseModel):
-    optimal_start_latitude: str
-    optimal_start_longitude: str
-    destination_latitude: str
-    destination_longitude: str
+    optimal_start_latitude: float
+    optimal_start_longitude: float
+    destination_latitude: float
+    destination_longitude: float
     trip_distance: float
     trip_duration: float
     user_to_pickup_distance: float
@@ -0,0 +1,168 @@
+import asyncio
+from typing import Dict, List
+
+import httpx
+from wireup import service
+
+from app.core.http_client import HttpClient
+from app.core.route_cache import RouteCache
+from app.core.tracing import Tracer
+from app.exceptions.infrastructure import RoutingProviderError
+from configs.settings import Settings
+
+
+# Distance Matrix request limits.
+MATRIX_MAX_SIDE = 25
+MATRIX_MAX_ELEMENTS = 100
+
+
+@service
+class GoogleMapsService:
+    def __init__(self, settings: Settings, http_client: HttpClient, route_cache: RouteCache, tracer: Tracer) -> None:
+        self.settings = settings
+        self.http_client = http_client
+        self.route_cache = route_cache
+        self.tracer = tracer
+
+    async def _request(self, url: str, params: Dict) -> Dict:
+        try:
+            response = await self.http_client.get(
+                url,
+                params={**params, "key": self.settings.GOOGLE_MAPS_API_KEY}
+            )
+        except httpx.HTTPError as e:
+            raise RoutingProviderError(type(e).__name__) from e
+
+        if response.status_code != 200:
+            raise RoutingProviderError(f"HTTP {response.status_code}")
+
+        data = response.json()
+        if data["status"] not in ("OK", "ZERO_RESULTS"):
+            raise RoutingProviderError(data["status"])
+
+        return data
+
+    async def geocode(self, address: str) -> List[Dict]:
+        with self.tracer.span("maps.geocode") as span:
+            data = await self._request(
+                self.settings.GOOGLE_MAPS_GEOCODE_API_URL,
+                {"address": address}
+            )
+            span.set_attribute("results", len(data["results"]))
+        return data["results"]
+
+    async def places_nearby(self, location: str, radius: int) -> List[Dict]:
+        with self.tracer.span("maps.places_nearby", radius=radius) as span:
+            data = await self._request(
+                self.settings.GOOGLE_MAPS_PLACES_NEARBY_API_URL,
+                {"location": location, "radius": radius}
+            )
+            span.set_attribute("results", len(data["results"]))
+        return data["results"]
+
+    async def directions(
+        self,
+        origin: str,
+        destination: str,
+        mode: str = "driving",
+        departure_time: str = "now"
+    ) -> List[Dict]:
+        async def fetch() -> List[Dict]:
+            data = await self._request(
+                self.settings.GOOGLE_MAPS_DIRECTIONS_API_URL,
+                {
+                    "origin": origin,
+                    "destination": destination,
+                    "mode": mode,
+                    "departure_time": departure_time,
+                }
+            )
+            return data["routes"]
+
+        with self.tracer.span("maps.directions", mode=mode):
+            return await self.route_cache.get_or_fetch(
+                mode,
+                origin,
+                destination,
+                fetch,
+                variant="" if departure_time == "now" else departure_time
+            )
+
+    async def distance_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str],
+        mode: str = "driving",
+        departure_time: str = "now"
+    ) -> List[List[Dict]]:
+        """
+        Elements for every origin/destination pair as rows[origin][destination].
+        Pairs found in the route cache are not requested again.
+        """
+        variant = "matrix" if departure_time == "now" else f"matrix:{departure_time}"
+        with self.tracer.span(
+            "maps.distance_matrix", mode=mode, origins=len(origins), destinations=len(destinations)
+        ) as span:
+            rows = [
+                [self.route_cache.get(mode, origin, destination, variant) for destination in destinations]
+                for origin in origins
+            ]
+
+            missing_origins = [i for i, row in enumerate(rows) if None in row]
+            span.set_attribute("cache.hits", sum(element is not None for row in rows for element in row))
+            if not missing_origins:
+                return rows
+
+            missing_destinations = sorted({
+                j for i in missing_origins for j, element in enumerate(rows[i]) if element is None
+            })
+            fetched = await self._distance_matrix(
+                [origins[i] for i in missing_origins],
+                [destinations[j] for j in missing_destinations],
+                mode,
+                departure_time
+            )
+
+        for i, fetched_row in zip(missing_origins, fetched):
+            for j, element in zip(missing_destinations, fetched_row):
+                rows[i][j] = element
+                if element["status"] == "OK":
+                    self.route_cache.put(mode, origins[i], destinations[j], element, variant)
+
+        return rows
+
+    async def _distance_matrix(
+        self,
+        origins: List[str],
+        destinations: List[str],
+        mode: str,
+        departure_time: str
+    ) -> List[List[Dict]]:
+        # Split into as few requests as the API limits allow.
+        dest_step = min(len(destinations), MATRIX_MAX_SIDE) or 1
+        origin_step = min(MATRIX_MAX_ELEMENTS // dest_step, MATRIX_MAX_SIDE)
+        blocks = [
+            (o, d)
+            for o in range(0, len(origins), origin_step)
+            for d in range(0, len(destinations), dest_step)
+        ]
+
+        responses = await asyncio.gather(*(
+            self._request(
+                self.settings.GOOGLE_MAPS_DISTANCE_MATRIX_API_URL,
+                {
+                    "origins": "|".join(origins[o:o + origin_step]),
+                    "destinations": "|".join(destinations[d:d + dest_step]),
+                    "mode": mode,
+                    "departure_time": departure_time,
+                }
+            )
+            for o, d in blocks
+        ))
+
+        rows = [[] for _ in origins]
+        for (o, _), data in zip(blocks, responses):
+            for i, row in enumerate(data["rows"]):
+                rows[o + i].extend(row["elements"])
+
+        return rows
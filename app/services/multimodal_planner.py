@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, List, Optional, Tuple
+
+from wireup import service
+
+from app.core import polyline
+from app.enums.transport_type import TransportType
+from app.routing.base import RoutingBackend
+from app.schemas.fast import FastResponse, Path
+from app.schemas.routing import RouteLeg
+from app.services.google_maps import GoogleMapsService
+from app.services.scooter_service import ScooterService
+from app.services.transit_planner import TransitPlanner
+from app.transit.directions import TransitRoute, transit_routes
+from configs.settings import Settings
+
+
+Point = Tuple[float, float]
+
+# Scooters further than this from either end are not worth walking to.
+SCOOTER_MAX_WALK_METERS = 500
+SCOOTER_MAX_RIDE_METERS = 20000
+# Remaining range a scooter needs, relative to the straight-line ride: roads
+# are longer than the crow flies, and the battery should not run flat.
+SCOOTER_RANGE_FACTOR = 1.5
+
+TRANSIT_TYPES = {"SUBWAY": TransportType.SUBWAY, "METRO_RAIL": TransportType.SUBWAY}
+
+logger = logging.getLogger(__name__)
+
+
+@service
+class MultimodalPlanner:
+    """
+    Door-to-door alternatives for /fast/: walking, scooter (walk, ride,
+    walk), transit and taxi are planned concurrently under one latency
+    budget. A mode that fails or misses the budget is left out of the
+    answer instead of failing the request.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        scooter_service: ScooterService,
+        routing: RoutingBackend,
+        transit: TransitPlanner,
+        maps: GoogleMapsService
+    ) -> None:
+        self.budget = settings.FAST_BUDGET
+        self.scooter_service = scooter_service
+        self.routing = routing
+        self.transit = transit
+        self.maps = maps
+
+    async def plan(self, origin: Point, destination: Point, zoom: Optional[int] = None) -> List[FastResponse]:
+        """
+        Alternatives ranked by total duration, fastest first. With a `zoom`,
+        path geometry is simplified for display at that map zoom.
+        """
+        deadline = asyncio.get_running_loop().time() + self.budget
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [
+                group.create_task(self._guard(option, deadline))
+                for option in (
+                    self._walk(origin, destination),
+                    self._scooter(origin, destination),
+                    self._transit(origin, destination),
+                    self._taxi(origin, destination),
+                )
+            ]
+
+        options = [task.result() for task in tasks if task.result() is not None]
+        options.sort(key=lambda option: option.duration)
+        if zoom is not None:
+            # Visvalingam runs point by point in Python: in a thread it does not
+            # hold up the other requests on the loop.
+            await asyncio.to_thread(_simplify, options, zoom)
+        return options
+
+    @staticmethod
+    async def _guard(option: Awaitable[Optional[FastResponse]], deadline: float) -> Optional[FastResponse]:
+        # Never raise into the TaskGroup: that would cancel the other modes.
+        try:
+            async with asyncio.timeout_at(deadline):
+                return await option
+        except TimeoutError:
+            return None
+        except Exception:
+            logger.exception("fast option failed", extra={"option": getattr(option, "__qualname__", repr(option))})
+            return None
+
+    async def _walk(self, origin: Point, destination: Point) -> Optional[FastResponse]:
+        leg = await self.routing.route(origin, destination, "walking")
+        return _response([_path(leg, origin, destination, TransportType.WALKING)]) if leg else None
+
+    async def _taxi(self, origin: Point, destination: Point) -> Optional[FastResponse]:
+        leg = await self.routing.route(origin, destination, "driving")
+        return _response([_path(leg, origin, destination, TransportType.DRIVE)]) if leg else None
+
+    async def _scooter(self, origin: Point, destination: Point) -> Optional[FastResponse]:
+        # Only scooters that can finish the ride are offered for pick-up; the
+        # drop-off is any parking spot near the destination.
+        ride = self.scooter_service.calc_dist(*origin, *destination) + 2 * SCOOTER_MAX_WALK_METERS
+        pick_ups, drop_offs = await self.scooter_service.get_nearby_many(
+            [origin, destination],
+            min_ranges=[ride * SCOOTER_RANGE_FACTOR, 0],
+        )
+        if not pick_ups or not drop_offs:
+            return None
+        pick_up, drop_off = pick_ups[0], drop_offs[0]
+
+        start = (pick_up.coordinate.latitude, pick_up.coordinate.longitude)
+        end = (drop_off.coordinate.latitude, drop_off.coordinate.longitude)
+        if (
+            pick_up.distance > SCOOTER_MAX_WALK_METERS
+            or drop_off.distance > SCOOTER_MAX_WALK_METERS
+            or self.scooter_service.calc_dist(*start, *end) >= SCOOTER_MAX_RIDE_METERS
+        ):
+            return None
+
+        async with asyncio.TaskGroup() as group:
+            walk_to = group.create_task(self.routing.route(origin, start, "walking"))
+            ride = group.create_task(self.routing.route(start, end, "bicycling"))
+            walk_from = group.create_task(self.routing.route(end, destination, "walking"))
+
+        if ride.result() is None:
+            return None
+
+        paths = [_path(ride.result(), start, end, TransportType.BICYCLE)]
+        if walk_to.result() is not None:
+            paths.insert(0, _path(walk_to.result(), origin, start, TransportType.WALKING))
+        if walk_from.result() is not None:
+            paths.append(_path(walk_from.result(), end, destination, TransportType.WALKING))
+        return _response(paths)
+
+    async def _transit(self, origin: Point, destination: Point) -> Optional[FastResponse]:
+        if self.transit.available:
+            # RAPTOR is CPU-bound: in a thread the other modes keep running and
+            # the budget can still give up on it.
+            routes = (await asyncio.to_thread(self.transit.directions, origin, destination))["routes"]
+        else:
+            routes = await self.maps.directions(
+                f"{origin[0]},{origin[1]}",
+                f"{destination[0]},{destination[1]}",
+                mode="transit"
+            )
+        if not routes:
+            return None
+
+        now = time.time()
+
+        def arrival(route: TransitRoute) -> float:
+            return route.arrival if route.arrival is not None else now + route.duration
+
+        route = min(transit_routes(routes), key=arrival)
+        paths = []
+        for step in route.steps:
+            if step.travel_mode == "TRANSIT":
+                transport = TRANSIT_TYPES.get(step.vehicle, TransportType.BUS)
+            else:
+                transport = TransportType.WALKING
+            paths.append(Path(
+                distance=str(step.distance),
+                duration=f"{step.duration}s",
+                start_latitude=step.start_lat,
+                start_longitude=step.start_lng,
+                end_latitude=step.end_lat,
+                end_longitude=step.end_lng,
+                polyline=step.polyline,
+                type=transport,
+            ))
+
+        # Waiting for the first departure counts towards the total.
+        return _response(paths, duration=max(int(arrival(route) - now), 0))
+
+
+def _path(leg: RouteLeg, start: Point, end: Point, transport: TransportType) -> Path:
+    return Path(
+        distance=str(leg.distance),
+        duration=f"{leg.duration}s",
+        start_latitude=start[0],
+        start_longitude=start[1],
+        end_latitude=end[0],
+        end_longitude=end[1],
+        polyline=leg.polyline,
+        type=transport,
+    )
+
+
+def _response(paths: List[Path], duration: Optional[int] = None) -> FastResponse:
+    if duration is None:
+        duration = sum(int(path.duration.rstrip("s")) for path in paths)
+    return FastResponse(paths=paths, duration=duration)
+
+
+def _simplify(options: List[FastResponse], zoom: int) -> None:
+    for option in options:
+        for path in option.paths:
+            path.polyline = polyline.simplify_encoded(path.polyline, zoom)
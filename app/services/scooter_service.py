@@ -1,20 +1,35 @@
-from ast import Tuple
-from math import radians, sin, cos, sqrt, atan2
+import asyncio
+import logging
 from random import randint
-from typing import List, Optional
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import uuid4
 
 from sqlmodel import all_
 from wireup import service
 
+from app.core import haversine
+from app.core.ingest import BulkPoint
+from app.core.spatial_index import Neighbour
+from app.core.store import FleetSnapshot, FleetStore
 from app.repositories.scooter_repository import ScooterRepository
-from app.schemas.coordinate import Coordinate, ScooterDist
+from app.schemas.coordinate import Coordinate, ScooterCluster, ScooterDist
 from app.schemas.scooter import ScooterBulkCreate, ScooterCreate, ScooterCreateRequest, ScooterGet
 
 
+# Tolerance for matching a coordinate against stored scooters; absorbs
+# differences in how clients format the same point.
+GEO_MATCH_METERS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
 @service
 class ScooterService:
-    def __init__(self, repository: ScooterRepository) -> None:
+    def __init__(self, repository: ScooterRepository, store: FleetStore) -> None:
         self.repository = repository
+        # Positions are read from the shared fleet snapshot, which follows
+        # every write (ours and other workers') through NOTIFY.
+        self.store = store
 
     async def create_scooter(self, scooter: ScooterCreateRequest) -> ScooterGet:
         rand_charge = randint(60, 100)
@@ -27,62 +42,118 @@ class ScooterService:
         return ScooterGet.model_validate(await self.repository.create(scooter_create), from_attributes=True)
 
 
-    async def get_by_geo(self, latitude: str, longitude: str) -> List[ScooterGet]:
+    async def get_by_geo(self, latitude: float, longitude: float) -> List[ScooterGet]:
+        return [
+            ScooterGet.model_validate(scooter, from_attributes=True)
+            for scooter, _
+            in await self.repository.within_radius(latitude, longitude, GEO_MATCH_METERS)
+        ]
+
+    async def get_within_radius(self, latitude: float, longitude: float, meters: float) -> List[ScooterGet]:
+        return [
+            ScooterGet.model_validate(scooter, from_attributes=True)
+            for scooter, _
+            in await self.repository.within_radius(latitude, longitude, meters)
+        ]
+
+    async def get_in_bbox(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float
+    ) -> List[ScooterGet]:
         return [
             ScooterGet.model_validate(scooter, from_attributes=True)
             for scooter
-            in await self.repository.get_by_geo(latitude, longitude)
+            in await self.repository.within_bbox(min_latitude, min_longitude, max_latitude, max_longitude)
         ]
 
-    async def get_all_coords(self) -> List[Coordinate]:
-        return await self.repository.get_all_coords()
-
-    async def create_bulk(self, scooters: List[ScooterBulkCreate]) -> List[ScooterGet]:
-        scooters_bulked = []
-        for scooter in scooters:
-            scooters_bulked_inner = []
-            for _ in range (scooter.count):
-                num = randint(60, 100)
-                scooters_bulked_inner.append(
-                    ScooterCreate.model_validate(
-                        {**scooter.model_dump(),
-                         "charge": num,
-                         "distance": 400 * num + randint(0, 400)}
-                    )
-                )
-            scooters_bulked.extend(scooters_bulked_inner
-            )
-        print(scooters_bulked)
-        await self.repository.create_bulk(scooters_bulked)
-        #return await [ScooterGet.model_validate(scooter, from_attributes=True) for scooter in await self.repository.create_bulk(scooters_bulked)]
-
-    async def get_nearby(self, latitude: float, longitude: float) -> ScooterDist:
-        all_scooters_coords = await self.get_all_coords()
-        
-        R = 6371.0
-
-        min = 100000000
-        min_coords = None
-
-        for coords in all_scooters_coords:
-            distance = self.calc_dist(latitude, longitude, float(coords.latitude), float(coords.longitude))
-            coord = Coordinate(latitude=coords.latitude, longitude=coords.longitude)
-            if distance < min:
-                min = distance
-                min_coords = coord
-        return ScooterDist(distance=min, coords=min_coords) if min_coords else None
+    def stream_coords(self) -> AsyncIterator[List[Tuple[float, float]]]:
+        return self.repository.stream_coords()
+
+    async def create_bulk(self, scooters: List[ScooterBulkCreate]) -> int:
+        return await self.ingest(_aiter((scooter.latitude, scooter.longitude, scooter.count) for scooter in scooters))
+
+    async def ingest(self, points: AsyncIterable[BulkPoint]) -> int:
+        """Create `count` scooters at every streamed point, COPYing rows as they are parsed."""
+        async def rows() -> AsyncIterator[Tuple]:
+            async for latitude, longitude, count in points:
+                for _ in range(count):
+                    charge = randint(60, 100)
+                    yield uuid4(), latitude, longitude, charge, 400 * charge + randint(0, 400)
+
+        created = await self.repository.copy_bulk(rows())
+        logger.info("scooters ingested", extra={"count": created})
+        return created
+
+    async def get_nearby(self, latitude: float, longitude: float, min_range: float = 0) -> Optional[ScooterDist]:
+        found = await self.get_k_nearby(latitude, longitude, 1, min_range)
+        return found[0] if found else None
+
+    async def get_k_nearby(self, latitude: float, longitude: float, k: int, min_range: float = 0) -> List[ScooterDist]:
+        """The `k` nearest scooters with at least `min_range` meters of remaining range."""
+        snapshot = await self.store.reaching(min_range)
+
+        return [_scooter_dist(neighbour) for neighbour in snapshot.k_nearest(latitude, longitude, k)]
+
+    async def get_nearby_many(
+        self,
+        points: Sequence[Tuple[float, float]],
+        k: int = 1,
+        min_ranges: Optional[Sequence[float]] = None
+    ) -> List[List[ScooterDist]]:
+        """
+        The `k` nearest scooters of every (latitude, longitude) point, in
+        input order, optionally with a minimum remaining range per point.
+        """
+        await self.store.current()
+        if min_ranges is None:
+            min_ranges = [0] * len(points)
+
+        # Points that need the same range layer are answered in one pass.
+        groups: Dict[int, Tuple[FleetSnapshot, List[int]]] = {}
+        for index, meters in enumerate(min_ranges):
+            snapshot = self.store.layer(meters)
+            groups.setdefault(id(snapshot), (snapshot, []))[1].append(index)
+
+        # Snapshots never change once published, so a large batch can be
+        # answered in a thread without holding up the loop.
+        return await asyncio.to_thread(_nearest_many, points, k, list(groups.values()))
+
+    async def get_tile(self, z: int, x: int, y: int) -> List[ScooterCluster]:
+        await self.store.current()
+
+        return [
+            ScooterCluster(latitude=cluster.latitude, longitude=cluster.longitude, count=cluster.count)
+            for cluster in self.store.tiles.tile(z, x, y)
+        ]
 
     def calc_dist(self, orig_latitude: float, orig_longitude: float, dest_latiude: float, dest_longitude: float) -> int:
-        R = 6371.0
-        lat1 = radians(orig_latitude)
-        lon1 = radians(orig_longitude)
-        lat2 = radians(dest_latiude)
-        lon2 = radians(dest_longitude)
+        return int(haversine.distance(orig_latitude, orig_longitude, dest_latiude, dest_longitude))
+
+
+def _nearest_many(
+    points: Sequence[Tuple[float, float]],
+    k: int,
+    groups: List[Tuple[FleetSnapshot, List[int]]]
+) -> List[List[ScooterDist]]:
+    found: List[List[ScooterDist]] = [[] for _ in points]
+    for snapshot, indexes in groups:
+        latitudes = [points[index][0] for index in indexes]
+        longitudes = [points[index][1] for index in indexes]
+        for index, neighbours in zip(indexes, snapshot.k_nearest_many(latitudes, longitudes, k)):
+            found[index] = [_scooter_dist(neighbour) for neighbour in neighbours]
+    return found
+
 
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
+def _scooter_dist(neighbour: Neighbour) -> ScooterDist:
+    return ScooterDist(
+        distance=int(neighbour.distance),
+        coordinate=Coordinate(latitude=neighbour.latitude, longitude=neighbour.longitude),
+    )
 
-        a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
 
-        return int(R * c * 1000)
+async def _aiter(items: Iterable) -> AsyncIterator:
+    for item in items:
+        yield item
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from wireup import service
+
+from app.core import haversine, polyline
+from app.routing.graph import WALKING_SPEED
+from app.schemas.transit import TransitModel
+from app.transit.raptor import Journey, Leg, Raptor
+from app.transit.timetable import Timetable
+from configs.settings import Settings
+
+
+ACCESS_RADIUS_METERS = 800
+
+# GTFS route_type -> (Directions API vehicle type, display name)
+VEHICLES = {
+    0: ("TRAM", "Tram"),
+    1: ("SUBWAY", "Subway"),
+    2: ("HEAVY_RAIL", "Train"),
+    3: ("BUS", "Bus"),
+    11: ("TROLLEYBUS", "Trolleybus"),
+}
+
+Point = Tuple[float, float]
+
+
+@service
+class TransitPlanner:
+    """
+    Transit directions from the local GTFS timetable, shaped like the
+    Directions API response (`TransitModel`) the transit router returns.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.timetable: Optional[Timetable] = None
+        self.raptor: Optional[Raptor] = None
+
+        path = Path(settings.TRANSIT_TIMETABLE_PATH)
+        if settings.TRANSIT_BACKEND == "gtfs" and (path / "meta.json").exists():
+            self.timetable = Timetable.load(path)
+            self.raptor = Raptor(self.timetable)
+            self.zone = ZoneInfo(self.timetable.meta["timezone"])
+            self._stop_lat, self._stop_lon = haversine.to_radians(self.timetable.stop_lat, self.timetable.stop_lon)
+
+    @property
+    def available(self) -> bool:
+        return self.raptor is not None
+
+    def journeys(self, origin: Point, destination: Point, departure: Optional[datetime] = None) -> List[Journey]:
+        departure = (departure or datetime.now(self.zone)).astimezone(self.zone)
+        midnight = departure.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        return self.raptor.plan(
+            self._nearby_stops(origin),
+            self._nearby_stops(destination),
+            int((departure - midnight).total_seconds()),
+            self.timetable.active_trips(departure.date()),
+        )
+
+    def plan(self, origin: Point, destination: Point, departure: Optional[datetime] = None) -> TransitModel:
+        return TransitModel.model_validate(self.directions(origin, destination, departure))
+
+    def directions(self, origin: Point, destination: Point, departure: Optional[datetime] = None) -> Dict:
+        """`plan` as the plain Directions payload, without building the models."""
+        departure = (departure or datetime.now(self.zone)).astimezone(self.zone)
+        midnight = departure.replace(hour=0, minute=0, second=0, microsecond=0)
+        routes = [
+            self._route(journey, origin, destination, midnight)
+            for journey in self.journeys(origin, destination, departure)
+        ]
+
+        return {
+            "geocoded_waypoints": [{"geocoder_status": "OK", "place_id": "", "types": []}] * 2,
+            "routes": routes,
+            "status": "OK" if routes else "ZERO_RESULTS",
+        }
+
+    def summary(self, journey: Journey) -> List[Dict]:
+        """The rides of a journey as {type, duration, polyline}, as served by /transit/fast-transit."""
+        rides = []
+        for leg in journey.legs:
+            if leg.mode != "transit":
+                continue
+            route = self.timetable.routes[int(self.timetable.arrays["pattern_route"][leg.pattern])]
+            stops = self.timetable.pattern_stops[leg.pattern][leg.board:leg.alight + 1]
+            rides.append({
+                "type": VEHICLES.get(route["type"], ("BUS", "Bus"))[0].lower(),
+                "duration": f"{round((leg.arrival - leg.departure) / 60)}m",
+                "polyline": polyline.encode(
+                    (float(self.timetable.stop_lat[stop]), float(self.timetable.stop_lon[stop])) for stop in stops
+                ),
+            })
+        return rides
+
+    def _nearby_stops(self, point: Point) -> Dict[int, int]:
+        meters = haversine.one_to_many(np.radians(point[0]), np.radians(point[1]), self._stop_lat, self._stop_lon)
+        stops = np.flatnonzero(meters <= ACCESS_RADIUS_METERS)
+        return {int(stop): int(meters[stop] / WALKING_SPEED) for stop in stops}
+
+    def _stop_point(self, stop: Optional[int], fallback: Point) -> Point:
+        if stop is None:
+            return fallback
+        return float(self.timetable.stop_lat[stop]), float(self.timetable.stop_lon[stop])
+
+    def _time(self, midnight: datetime, seconds: int) -> Dict:
+        moment = midnight + timedelta(seconds=seconds)
+        return {
+            "text": moment.strftime("%-I:%M %p"),
+            "time_zone": self.timetable.meta["timezone"],
+            "value": int(moment.timestamp()),
+        }
+
+    def _route(self, journey: Journey, origin: Point, destination: Point, midnight: datetime) -> Dict:
+        steps = [self._step(leg, origin, destination, midnight) for leg in journey.legs]
+        overview = polyline.concat(step["polyline"]["points"] for step in steps)
+        lats, lngs = polyline.decode_arrays(overview)
+        rides = [step for step in steps if step["travel_mode"] == "TRANSIT"]
+
+        return {
+            "bounds": {
+                "northeast": {"lat": float(lats.max()), "lng": float(lngs.max())},
+                "southwest": {"lat": float(lats.min()), "lng": float(lngs.min())},
+            },
+            "copyrights": "GTFS",
+            "legs": [{
+                "arrival_time": self._time(midnight, journey.arrival),
+                "departure_time": self._time(midnight, journey.departure),
+                "distance": _distance(sum(step["distance"]["value"] for step in steps)),
+                "duration": _duration(journey.arrival - journey.departure),
+                "end_address": f"{destination[0]},{destination[1]}",
+                "end_location": {"lat": destination[0], "lng": destination[1]},
+                "start_address": f"{origin[0]},{origin[1]}",
+                "start_location": {"lat": origin[0], "lng": origin[1]},
+                "steps": steps,
+                "traffic_speed_entry": [],
+                "via_waypoint": [],
+            }],
+            "overview_polyline": {"points": overview},
+            "summary": ", ".join(step["transit_details"]["line"]["name"] for step in rides),
+            "warnings": [],
+            "waypoint_order": [],
+        }
+
+    def _step(self, leg: Leg, origin: Point, destination: Point, midnight: datetime) -> Dict:
+        tt = self.timetable
+        start = self._stop_point(leg.from_stop, origin)
+        end = self._stop_point(leg.to_stop, destination)
+
+        if leg.mode == "walk":
+            target = "destination" if leg.to_stop is None else tt.stop_names[leg.to_stop]
+            return {
+                "distance": _distance(haversine.distance(*start, *end)),
+                "duration": _duration(leg.arrival - leg.departure),
+                "end_location": {"lat": end[0], "lng": end[1]},
+                "html_instructions": f"Walk to {target}",
+                "polyline": {"points": polyline.encode([start, end])},
+                "start_location": {"lat": start[0], "lng": start[1]},
+                "travel_mode": "WALKING",
+            }
+
+        stops = tt.pattern_stops[leg.pattern][leg.board:leg.alight + 1]
+        points = [self._stop_point(stop, origin) for stop in stops]
+        route = tt.routes[int(tt.arrays["pattern_route"][leg.pattern])]
+        vehicle_type, vehicle_name = VEHICLES.get(route["type"], ("BUS", "Bus"))
+        headsign = tt.headsigns[leg.trip]
+
+        return {
+            "distance": _distance(sum(haversine.distance(*a, *b) for a, b in zip(points, points[1:]))),
+            "duration": _duration(leg.arrival - leg.departure),
+            "end_location": {"lat": end[0], "lng": end[1]},
+            "html_instructions": f"{vehicle_name} towards {headsign}",
+            "polyline": {"points": polyline.encode(points)},
+            "start_location": {"lat": start[0], "lng": start[1]},
+            "travel_mode": "TRANSIT",
+            "transit_details": {
+                "arrival_stop": {"location": {"lat": end[0], "lng": end[1]}, "name": tt.stop_names[leg.to_stop]},
+                "arrival_time": self._time(midnight, leg.arrival),
+                "departure_stop": {"location": {"lat": start[0], "lng": start[1]}, "name": tt.stop_names[leg.from_stop]},
+                "departure_time": self._time(midnight, leg.departure),
+                "headsign": headsign,
+                "line": {
+                    "agencies": [route["agency"]],
+                    "name": route["long_name"] or route["short_name"],
+                    "short_name": route["short_name"] or None,
+                    "vehicle": {"icon": "", "name": vehicle_name, "type": vehicle_type},
+                    "color": f"#{route['color']}" if route["color"] else None,
+                    "text_color": f"#{route['text_color']}" if route["text_color"] else None,
+                },
+                "num_stops": leg.alight - leg.board,
+            },
+        }
+
+
+def _distance(meters: float) -> Dict:
+    return {"text": f"{meters / 1000:.1f} km", "value": int(meters)}
+
+
+def _duration(seconds: int) -> Dict:
+    return {"text": f"{max(round(seconds / 60), 1)} mins", "value": int(seconds)}
@@ -0,0 +1,29 @@
+"""
+Build the RAPTOR timetable from one or more GTFS feeds.
+
+    python -m app.transit.build_timetable metro.zip bus.zip --out data/transit
+
+The output directory is what TRANSIT_TIMETABLE_PATH should point at.
+"""
+import argparse
+
+from app.transit.gtfs import TRANSFER_RADIUS_METERS, build
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("feeds", nargs="+", help="GTFS feeds, zipped or unpacked")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--transfer-radius", type=float, default=TRANSFER_RADIUS_METERS)
+    args = parser.parse_args()
+
+    timetable = build(args.feeds, args.transfer_radius)
+    timetable.save(args.out)
+    print(
+        f"{timetable.stop_count} stops, {timetable.pattern_count} patterns,"
+        f" {len(timetable.headsigns)} trips -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional
+
+from app.core.projection import field_mask, project
+from app.schemas.transit import TransitModel
+
+
+# Everything TransitModel keeps from a Directions API transit response.
+TRANSIT_MASK = field_mask(TransitModel)
+
+
+def project_transit(data: Dict) -> Dict:
+    """
+    The response as TransitModel would serialize it, without building the
+    models: a Directions response carries several hundred nested objects,
+    and validating each of them cost more than the request itself.
+    Raises ProjectionError when a field TransitModel requires is missing.
+    """
+    return project(data, TRANSIT_MASK)
+
+
+class TransitStep:
+    __slots__ = (
+        "travel_mode", "vehicle", "distance", "duration",
+        "start_lat", "start_lng", "end_lat", "end_lng", "polyline",
+    )
+
+    def __init__(self, step: Dict) -> None:
+        self.travel_mode: str = step["travel_mode"]
+        self.vehicle: Optional[str] = (
+            step["transit_details"]["line"]["vehicle"]["type"] if self.travel_mode == "TRANSIT" else None
+        )
+        self.distance: int = step["distance"]["value"]
+        self.duration: int = step["duration"]["value"]
+        self.start_lat: float = step["start_location"]["lat"]
+        self.start_lng: float = step["start_location"]["lng"]
+        self.end_lat: float = step["end_location"]["lat"]
+        self.end_lng: float = step["end_location"]["lng"]
+        self.polyline: str = step["polyline"]["points"]
+
+
+class TransitRoute:
+    """The first leg of a Directions route, reduced to what journey planning reads."""
+
+    __slots__ = ("arrival", "duration", "steps")
+
+    def __init__(self, route: Dict) -> None:
+        leg = route["legs"][0]
+        arrival = leg.get("arrival_time")
+        self.arrival: Optional[int] = arrival["value"] if arrival else None
+        self.duration: int = leg["duration"]["value"]
+        self.steps: List[TransitStep] = [TransitStep(step) for step in leg["steps"]]
+
+
+def transit_routes(routes: List[Dict]) -> List[TransitRoute]:
+    return [TransitRoute(route) for route in routes]
@@ -0,0 +1,250 @@
+import csv
+import io
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.haversine import many_to_many, to_radians
+from app.routing.graph import WALKING_SPEED
+from app.transit.timetable import Timetable
+
+
+TRANSFER_RADIUS_METERS = 250
+MIN_TRANSFER_SECONDS = 60
+
+
+class Feed:
+    """Read access to the text files of one GTFS feed, zipped or unpacked."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path) if self.path.suffix == ".zip" else None
+
+    def rows(self, name: str) -> Iterator[Dict[str, str]]:
+        if self._zip is not None:
+            if name not in self._zip.namelist():
+                return
+            with self._zip.open(name) as raw:
+                yield from csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig"))
+        else:
+            file = self.path / name
+            if not file.exists():
+                return
+            with file.open(encoding="utf-8-sig", newline="") as handle:
+                yield from csv.DictReader(handle)
+
+
+def parse_time(value: str) -> int:
+    hours, minutes, seconds = value.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def build(paths: Sequence[str], transfer_radius: float = TRANSFER_RADIUS_METERS) -> Timetable:
+    """Merge GTFS feeds (e.g. metro and bus) into one Timetable."""
+    stops: Dict[str, int] = {}
+    stop_lat: List[float] = []
+    stop_lon: List[float] = []
+    stop_names: List[str] = []
+    routes: List[Dict] = []
+    route_index: Dict[str, int] = {}
+    services: List[Dict] = []
+    service_index: Dict[str, int] = {}
+    # (route, stop sequence) -> [(arrivals, departures, service, headsign)]
+    patterns: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[List[int], List[int], int, str]]] = defaultdict(list)
+    transfers: Dict[Tuple[int, int], int] = {}
+    timezone: Optional[str] = None
+
+    for feed_number, path in enumerate(paths):
+        feed = Feed(path)
+        prefix = f"{feed_number}:" if len(paths) > 1 else ""
+
+        agencies = {}
+        for row in feed.rows("agency.txt"):
+            agencies[row.get("agency_id", "")] = {"name": row["agency_name"], "url": row["agency_url"]}
+            timezone = timezone or row.get("agency_timezone")
+
+        for row in feed.rows("stops.txt"):
+            if row.get("location_type", "0") not in ("", "0"):
+                continue
+            stops[prefix + row["stop_id"]] = len(stop_lat)
+            stop_lat.append(float(row["stop_lat"]))
+            stop_lon.append(float(row["stop_lon"]))
+            stop_names.append(row["stop_name"])
+
+        for row in feed.rows("routes.txt"):
+            agency = agencies.get(row.get("agency_id", ""), next(iter(agencies.values()), {"name": "", "url": ""}))
+            route_index[prefix + row["route_id"]] = len(routes)
+            routes.append({
+                "short_name": row.get("route_short_name", ""),
+                "long_name": row.get("route_long_name", ""),
+                "type": int(row["route_type"]),
+                "color": row.get("route_color", ""),
+                "text_color": row.get("route_text_color", ""),
+                "agency": agency,
+            })
+
+        def service(service_id: str) -> Dict:
+            key = prefix + service_id
+            if key not in service_index:
+                service_index[key] = len(services)
+                services.append({"days": [0] * 7, "start": 0, "end": 0, "added": [], "removed": []})
+            return services[service_index[key]]
+
+        for row in feed.rows("calendar.txt"):
+            entry = service(row["service_id"])
+            entry["days"] = [
+                int(row[day])
+                for day in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+            ]
+            entry["start"], entry["end"] = int(row["start_date"]), int(row["end_date"])
+
+        for row in feed.rows("calendar_dates.txt"):
+            entry = service(row["service_id"])
+            entry["added" if row["exception_type"] == "1" else "removed"].append(int(row["date"]))
+
+        trips = {}
+        for row in feed.rows("trips.txt"):
+            service(row["service_id"])
+            trips[row["trip_id"]] = (
+                route_index[prefix + row["route_id"]],
+                service_index[prefix + row["service_id"]],
+                row.get("trip_headsign", ""),
+            )
+
+        stop_times: Dict[str, List[Tuple[int, int, int, int]]] = defaultdict(list)
+        for row in feed.rows("stop_times.txt"):
+            if not row["arrival_time"] and not row["departure_time"]:
+                continue
+            arrival = parse_time(row["arrival_time"] or row["departure_time"])
+            departure = parse_time(row["departure_time"] or row["arrival_time"])
+            stop_times[row["trip_id"]].append((
+                int(row["stop_sequence"]), stops[prefix + row["stop_id"]], arrival, departure
+            ))
+
+        for trip_id, times in stop_times.items():
+            if trip_id not in trips or len(times) < 2:
+                continue
+            times.sort()
+            route, service_id, headsign = trips[trip_id]
+            patterns[(route, tuple(t[1] for t in times))].append((
+                [t[2] for t in times], [t[3] for t in times], service_id, headsign
+            ))
+
+        for row in feed.rows("transfers.txt"):
+            if row.get("transfer_type") == "3":
+                continue
+            a, b = stops.get(prefix + row["from_stop_id"]), stops.get(prefix + row["to_stop_id"])
+            if a is not None and b is not None and a != b:
+                transfers[(a, b)] = max(int(row.get("min_transfer_time") or 0), MIN_TRANSFER_SECONDS)
+
+    _add_walking_transfers(stop_lat, stop_lon, transfers, transfer_radius)
+    return _assemble(stop_lat, stop_lon, patterns, transfers, {
+        "stop_names": stop_names,
+        "routes": routes,
+        "services": services,
+        "timezone": timezone or "UTC",
+    })
+
+
+def _add_walking_transfers(
+    stop_lat: List[float],
+    stop_lon: List[float],
+    transfers: Dict[Tuple[int, int], int],
+    radius: float,
+    chunk: int = 1024
+) -> None:
+    lat, lon = to_radians(stop_lat, stop_lon)
+    for start in range(0, len(lat), chunk):
+        meters = many_to_many(lat[start:start + chunk], lon[start:start + chunk], lat, lon)
+        rows, cols = np.nonzero(meters <= radius)
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            a = start + i
+            if a != j:
+                seconds = max(int(meters[i, j] / WALKING_SPEED), MIN_TRANSFER_SECONDS)
+                transfers.setdefault((a, j), seconds)
+
+
+def _split_fifo(trips: List[Tuple[List[int], List[int], int, str]]) -> List[List[Tuple[List[int], List[int], int, str]]]:
+    # RAPTOR picks the first catchable trip by binary search, which needs
+    # trips that never overtake each other; overtaking trips get their own pattern.
+    groups: List[List[Tuple[List[int], List[int], int, str]]] = []
+    for trip in sorted(trips, key=lambda t: t[1][0]):
+        for group in groups:
+            last = group[-1]
+            if all(a <= b for a, b in zip(last[0], trip[0])) and all(a <= b for a, b in zip(last[1], trip[1])):
+                group.append(trip)
+                break
+        else:
+            groups.append([trip])
+    return groups
+
+
+def _assemble(
+    stop_lat: List[float],
+    stop_lon: List[float],
+    patterns: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[List[int], List[int], int, str]]],
+    transfers: Dict[Tuple[int, int], int],
+    meta: Dict
+) -> Timetable:
+    pattern_route: List[int] = []
+    pattern_stops: List[int] = []
+    stops_ptr, trips_ptr, times_ptr = [0], [0], [0]
+    arrivals: List[int] = []
+    departures: List[int] = []
+    trip_service: List[int] = []
+    headsigns: List[str] = []
+
+    for (route, sequence), trips in patterns.items():
+        for group in _split_fifo(trips):
+            pattern_route.append(route)
+            pattern_stops.extend(sequence)
+            stops_ptr.append(len(pattern_stops))
+            for trip_arrivals, trip_departures, service, headsign in group:
+                arrivals.extend(trip_arrivals)
+                departures.extend(trip_departures)
+                trip_service.append(service)
+                headsigns.append(headsign)
+            trips_ptr.append(len(trip_service))
+            times_ptr.append(len(arrivals))
+
+    stop_count = len(stop_lat)
+    stop_patterns: List[List[Tuple[int, int]]] = [[] for _ in range(stop_count)]
+    for p in range(len(pattern_route)):
+        for position, stop in enumerate(pattern_stops[stops_ptr[p]:stops_ptr[p + 1]]):
+            stop_patterns[stop].append((p, position))
+
+    stop_transfers: List[List[Tuple[int, int]]] = [[] for _ in range(stop_count)]
+    for (a, b), seconds in sorted(transfers.items()):
+        stop_transfers[a].append((b, seconds))
+
+    def csr(rows: List[List[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ptr = np.concatenate(([0], np.cumsum([len(row) for row in rows]))).astype(np.int64)
+        first = np.array([a for row in rows for a, _ in row], dtype=np.int32)
+        second = np.array([b for row in rows for _, b in row], dtype=np.int32)
+        return ptr, first, second
+
+    stop_patterns_ptr, stop_patterns_idx, stop_patterns_pos = csr(stop_patterns)
+    transfer_ptr, transfer_to, transfer_time = csr(stop_transfers)
+
+    arrays = {
+        "stop_lat": np.array(stop_lat, dtype=np.float64),
+        "stop_lon": np.array(stop_lon, dtype=np.float64),
+        "pattern_route": np.array(pattern_route, dtype=np.int32),
+        "pattern_stops_ptr": np.array(stops_ptr, dtype=np.int64),
+        "pattern_stops": np.array(pattern_stops, dtype=np.int32),
+        "pattern_trips_ptr": np.array(trips_ptr, dtype=np.int64),
+        "pattern_times_ptr": np.array(times_ptr, dtype=np.int64),
+        "arrivals": np.array(arrivals, dtype=np.int32),
+        "departures": np.array(departures, dtype=np.int32),
+        "trip_service": np.array(trip_service, dtype=np.int32),
+        "stop_patterns_ptr": stop_patterns_ptr,
+        "stop_patterns": stop_patterns_idx,
+        "stop_patterns_pos": stop_patterns_pos,
+        "transfer_ptr": transfer_ptr,
+        "transfer_to": transfer_to,
+        "transfer_time": transfer_time,
+    }
+    return Timetable(arrays, {**meta, "headsigns": headsigns})
@@ -0,0 +1,205 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.transit.timetable import Timetable
+
+
+INF = float("inf")
+
+MAX_ROUNDS = 6
+
+
+class Leg:
+    __slots__ = ("mode", "from_stop", "to_stop", "departure", "arrival", "pattern", "trip", "board", "alight")
+
+    def __init__(
+        self,
+        mode: str,
+        from_stop: Optional[int],
+        to_stop: Optional[int],
+        departure: int,
+        arrival: int,
+        pattern: int = -1,
+        trip: int = -1,
+        board: int = -1,
+        alight: int = -1
+    ) -> None:
+        # from_stop is None for the walk from the origin, to_stop for the walk to the destination.
+        self.mode = mode
+        self.from_stop = from_stop
+        self.to_stop = to_stop
+        self.departure = departure
+        self.arrival = arrival
+        self.pattern = pattern
+        self.trip = trip
+        self.board = board
+        self.alight = alight
+
+
+class Journey:
+    __slots__ = ("legs", "departure", "arrival", "rides")
+
+    def __init__(self, legs: List[Leg]) -> None:
+        self.legs = legs
+        self.departure = legs[0].departure
+        self.arrival = legs[-1].arrival
+        self.rides = sum(1 for leg in legs if leg.mode == "transit")
+
+
+class Raptor:
+    """
+    Round-based public transit routing (Delling et al., "Round-Based Public
+    Transit Routing"). Round k finds the earliest arrival at every stop
+    using at most k vehicles, so the journeys recorded whenever the
+    destination improves form the Pareto set over arrival time and number
+    of rides.
+    """
+
+    def __init__(self, timetable: Timetable) -> None:
+        self.timetable = timetable
+        # Per pattern, per stop position: the times of all trips as compact
+        # int arrays, which index and bisect much faster than NumPy scalars.
+        self._departures = [_columns(times) for times in timetable.pattern_departures]
+        self._arrivals = [_columns(times) for times in timetable.pattern_arrivals]
+
+    def plan(
+        self,
+        access: Dict[int, int],
+        egress: Dict[int, int],
+        departure: int,
+        active: np.ndarray,
+        max_rounds: int = MAX_ROUNDS
+    ) -> List[Journey]:
+        """
+        Pareto-optimal journeys leaving at `departure` (seconds after
+        midnight), fewest rides first. `access` and `egress` map stops to
+        the walking seconds from the origin / to the destination, and
+        `active` masks the trips running on the service day.
+        """
+        tt = self.timetable
+        active = active.tolist()
+
+        labels: Dict[int, int] = {stop: departure + seconds for stop, seconds in access.items()}
+        best: Dict[int, int] = dict(labels)
+        # Per round: how each stop improved in that round was reached.
+        parents: List[Dict[int, tuple]] = [{stop: ("access", seconds) for stop, seconds in access.items()}]
+        trip_parents: List[Dict[int, tuple]] = [{}]
+        marked = set(labels)
+        best_target = INF
+        journeys: List[Journey] = []
+
+        for k in range(1, max_rounds + 1):
+            queue: Dict[int, int] = {}
+            for stop in marked:
+                for pattern, position in tt.stop_patterns[stop]:
+                    if position < queue.get(pattern, INF):
+                        queue[pattern] = position
+
+            previous = labels
+            labels = dict(previous)
+            round_parents: Dict[int, tuple] = {}
+            round_trips: Dict[int, tuple] = {}
+            arrived: Dict[int, int] = {}
+
+            for pattern, start in queue.items():
+                stops = tt.pattern_stops[pattern]
+                arrivals = self._arrivals[pattern]
+                departures = self._departures[pattern]
+                first_trip = tt.pattern_first_trip[pattern]
+                trip = board = -1
+
+                for i in range(start, len(stops)):
+                    stop = stops[i]
+                    if trip >= 0:
+                        arrival = arrivals[i][trip]
+                        if arrival < best.get(stop, INF) and arrival < best_target:
+                            labels[stop] = best[stop] = arrived[stop] = arrival
+                            round_parents[stop] = round_trips[stop] = ("trip", pattern, trip, board, i, arrival)
+
+                    # Only search when an earlier trip than the current one is catchable.
+                    reached = previous.get(stop)
+                    if reached is not None and (trip < 0 or trip > 0 and departures[i][trip - 1] >= reached):
+                        column = departures[i]
+                        candidate = bisect_left(column, reached)
+                        while candidate < len(column) and not active[first_trip + candidate]:
+                            candidate += 1
+                        if candidate < len(column) and candidate != trip:
+                            trip, board = candidate, i
+
+            marked = set(arrived)
+            for stop, arrival in arrived.items():
+                for target, seconds in tt.transfers[stop]:
+                    walked = arrival + seconds
+                    if walked < best.get(target, INF) and walked < best_target:
+                        labels[target] = best[target] = walked
+                        round_parents[target] = ("walk", stop, seconds)
+                        marked.add(target)
+
+            parents.append(round_parents)
+            trip_parents.append(round_trips)
+
+            improved = None
+            for stop, seconds in egress.items():
+                if stop in round_parents and labels[stop] + seconds < best_target:
+                    best_target = labels[stop] + seconds
+                    improved = stop
+            if improved is not None:
+                journeys.append(self._journey(k, improved, egress[improved], labels, parents, trip_parents))
+
+            if not marked:
+                break
+
+        return journeys
+
+    def _journey(
+        self,
+        k: int,
+        stop: int,
+        egress: int,
+        labels: Dict[int, int],
+        parents: List[Dict[int, tuple]],
+        trip_parents: List[Dict[int, tuple]]
+    ) -> Journey:
+        tt = self.timetable
+        legs = [Leg("walk", stop, None, labels[stop], labels[stop] + egress)]
+
+        while True:
+            while stop not in parents[k]:
+                k -= 1
+            parent = parents[k][stop]
+
+            if parent[0] == "walk":
+                _, origin, seconds = parent
+                parent = trip_parents[k][origin]
+                legs.append(Leg("walk", origin, stop, parent[5], parent[5] + seconds))
+                stop = origin
+
+            if parent[0] == "access":
+                first = legs[-1].departure
+                legs.append(Leg("walk", None, stop, first - parent[1], first))
+                break
+
+            _, pattern, trip, board, alight, arrival = parent
+            legs.append(Leg(
+                "transit",
+                tt.pattern_stops[pattern][board],
+                stop,
+                int(tt.pattern_departures[pattern][trip, board]),
+                arrival,
+                pattern,
+                tt.pattern_first_trip[pattern] + trip,
+                board,
+                alight,
+            ))
+            stop = tt.pattern_stops[pattern][board]
+            k -= 1
+
+        legs.reverse()
+        return Journey(legs)
+
+
+def _columns(times: np.ndarray) -> List[array]:
+    return [array("i", np.ascontiguousarray(column, dtype=np.int32).tobytes()) for column in np.asarray(times).T]
@@ -0,0 +1,100 @@
+import json
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+
+class Timetable:
+    """
+    Array-backed timetable in the layout RAPTOR scans.
+
+    Trips with the same stop sequence (and no overtaking) form a pattern.
+    For pattern p, `pattern_stops[pattern_stops_ptr[p]:pattern_stops_ptr[p + 1]]`
+    are its stops and `arrivals`/`departures` from `pattern_times_ptr[p]`
+    hold a trips x stops matrix, trips sorted by departure. Times are
+    seconds after midnight of the service day and may exceed 24h.
+    `stop_patterns*` index the patterns serving each stop (with the stop's
+    position in them) and `transfer_*` the footpaths between stops.
+    Names, routes and calendars that are only read when formatting a
+    journey live in `meta.json`.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict) -> None:
+        self.arrays = arrays
+        self.meta = meta
+        self.stop_lat = arrays["stop_lat"]
+        self.stop_lon = arrays["stop_lon"]
+        self.stop_count = len(self.stop_lat)
+        self.pattern_count = len(arrays["pattern_route"])
+
+        self.stop_names: List[str] = meta["stop_names"]
+        self.routes: List[Dict] = meta["routes"]
+        self.headsigns: List[str] = meta["headsigns"]
+
+        # Python-level views RAPTOR touches in its inner loops.
+        stops_ptr = arrays["pattern_stops_ptr"].tolist()
+        trips_ptr = arrays["pattern_trips_ptr"].tolist()
+        times_ptr = arrays["pattern_times_ptr"].tolist()
+        self.pattern_stops = [
+            arrays["pattern_stops"][stops_ptr[p]:stops_ptr[p + 1]].tolist()
+            for p in range(self.pattern_count)
+        ]
+        self.pattern_first_trip = trips_ptr[:-1]
+        self.pattern_departures = []
+        self.pattern_arrivals = []
+        for p in range(self.pattern_count):
+            shape = (trips_ptr[p + 1] - trips_ptr[p], stops_ptr[p + 1] - stops_ptr[p])
+            start, end = times_ptr[p], times_ptr[p + 1]
+            self.pattern_departures.append(arrays["departures"][start:end].reshape(shape))
+            self.pattern_arrivals.append(arrays["arrivals"][start:end].reshape(shape))
+
+        ptr = arrays["stop_patterns_ptr"].tolist()
+        patterns = arrays["stop_patterns"].tolist()
+        positions = arrays["stop_patterns_pos"].tolist()
+        self.stop_patterns = [
+            list(zip(patterns[ptr[s]:ptr[s + 1]], positions[ptr[s]:ptr[s + 1]]))
+            for s in range(self.stop_count)
+        ]
+
+        ptr = arrays["transfer_ptr"].tolist()
+        targets = arrays["transfer_to"].tolist()
+        seconds = arrays["transfer_time"].tolist()
+        self.transfers = [
+            list(zip(targets[ptr[s]:ptr[s + 1]], seconds[ptr[s]:ptr[s + 1]]))
+            for s in range(self.stop_count)
+        ]
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "Timetable":
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        arrays = {
+            file.stem: np.load(file, mmap_mode="r" if mmap else None)
+            for file in path.glob("*.npy")
+        }
+        return cls(arrays, meta)
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(path / f"{name}.npy", np.asarray(array))
+        (path / "meta.json").write_text(json.dumps(self.meta))
+
+    def active_trips(self, day: date) -> np.ndarray:
+        """Boolean mask over all trips running on `day` (calendar plus calendar_dates)."""
+        key = int(day.strftime("%Y%m%d"))
+        weekday = day.weekday()
+        active = np.zeros(len(self.meta["services"]), dtype=bool)
+
+        for i, service in enumerate(self.meta["services"]):
+            running = service["start"] <= key <= service["end"] and service["days"][weekday] == 1
+            if key in service["added"]:
+                running = True
+            elif key in service["removed"]:
+                running = False
+            active[i] = running
+
+        return active[np.asarray(self.arrays["trip_service"])]
@@ -0,0 +1,92 @@
+"""
+Rows/sec of bulk scooter creation: the old ORM path (ScooterCreate models,
+revalidated into Scooter rows, session.add_all) against streaming COPY.
+
+    python -m benchmarks.bulk_ingest [--rows 50000] [--points 500]
+
+Runs against the database configured in .env. Every run happens inside a
+transaction that is rolled back, so the scooter table is left untouched.
+"""
+import argparse
+import asyncio
+import time
+from random import randint, uniform
+from typing import List, Tuple
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models.scooter import Scooter
+from app.repositories.scooter_repository import COPY_COLUMNS
+from app.schemas.scooter import ScooterBulkCreate, ScooterCreate
+from configs.settings import Settings
+
+
+def groups(rows: int, points: int) -> List[ScooterBulkCreate]:
+    per_point = max(rows // points, 1)
+    return [
+        ScooterBulkCreate(
+            latitude=round(uniform(40.35, 40.45), 6),
+            longitude=round(uniform(49.80, 49.95), 6),
+            count=per_point,
+        )
+        for _ in range(points)
+    ]
+
+
+async def orm(session: AsyncSession, scooters: List[ScooterBulkCreate]) -> int:
+    created = []
+    for scooter in scooters:
+        for _ in range(scooter.count):
+            num = randint(60, 100)
+            created.append(ScooterCreate.model_validate(
+                {**scooter.model_dump(), "charge": num, "distance": 400 * num + randint(0, 400)}
+            ))
+    session.add_all([Scooter.model_validate(scooter, from_attributes=True) for scooter in created])
+    await session.flush()
+    return len(created)
+
+
+async def copy(session: AsyncSession, scooters: List[ScooterBulkCreate]) -> int:
+    async def rows():
+        for scooter in scooters:
+            for _ in range(scooter.count):
+                charge = randint(60, 100)
+                yield uuid4(), scooter.latitude, scooter.longitude, charge, 400 * charge + randint(0, 400)
+
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    status = await raw.driver_connection.copy_records_to_table(
+        Scooter.__tablename__, records=rows(), columns=COPY_COLUMNS
+    )
+    return int(status.split()[-1])
+
+
+async def run(rows: int, points: int) -> None:
+    engine = create_async_engine(Settings().POSTGRES_URI)
+    scooters = groups(rows, points)
+    results: List[Tuple[str, float]] = []
+
+    for name, path in (("orm add_all", orm), ("copy", copy)):
+        async with AsyncSession(engine) as session:
+            started = time.perf_counter()
+            written = await path(session, scooters)
+            elapsed = time.perf_counter() - started
+            await session.rollback()
+        results.append((name, written / elapsed))
+        print(f"{name:12} {written} rows in {elapsed:.2f}s   {written / elapsed:,.0f} rows/s")
+
+    print(f"speedup {results[1][1] / results[0][1]:.1f}x")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--points", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.points))
+
+
+if __name__ == "__main__":
+    main()
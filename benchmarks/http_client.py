@@ -0,0 +1,78 @@
+"""
+Per-request latency of a fresh httpx client per call (the old router code)
+against the shared pooled HttpClient, both talking to a local stub server.
+
+    python -m benchmarks.http_client [requests]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+
+from app.core.http_client import HttpClient
+from app.core.metrics import Metrics
+from app.core.tracing import Tracer
+from configs.settings import Settings
+
+
+BODY = b'{"routes": [{"distanceMeters": 1200, "duration": "300s", "polyline": {"encodedPolyline": "_p~iF~ps|U"}}]}'
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(BODY)).encode() + b"\r\n"
+    b"\r\n" + BODY
+)
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    await reader.readexactly(int(line.split(b":")[1]))
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def fresh_client(url: str, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        async with httpx.AsyncClient() as client:
+            (await client.post(url, json={})).json()
+    return (time.perf_counter() - start) / n
+
+
+async def pooled_client(url: str, n: int) -> float:
+    settings = Settings()
+    client = HttpClient(settings, Metrics(), Tracer(settings))
+    try:
+        start = time.perf_counter()
+        for _ in range(n):
+            (await client.post(url, json={})).json()
+        return (time.perf_counter() - start) / n
+    finally:
+        await client.aclose()
+
+
+async def main(n: int) -> None:
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/directions/v2:computeRoutes"
+
+    async with server:
+        fresh = await fresh_client(url, n)
+        pooled = await pooled_client(url, n)
+
+    print(f"requests:      {n}")
+    print(f"fresh client:  {fresh * 1000:.3f} ms/request")
+    print(f"pooled client: {pooled * 1000:.3f} ms/request ({fresh / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
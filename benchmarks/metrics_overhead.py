@@ -0,0 +1,110 @@
+"""
+Cost of the metrics in app.core.metrics: a request through MetricsMiddleware
+against the same app without it, a SQL statement with and without the
+engine hooks (in-memory SQLite standing in for Postgres), and a single
+upstream observation. Overheads are reported per call and relative to a
+request of --request-ms, the order of a /fast/ or /transit/ answer.
+
+    python -m benchmarks.metrics_overhead [--requests 5000] [--request-ms 50]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import Metrics, MetricsMiddleware
+
+
+def application(metrics: Metrics = None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/scooters/{scooter_id}")
+    async def scooter(scooter_id: str):
+        return {"id": scooter_id, "latitude": 40.4, "longitude": 49.85}
+
+    if metrics is not None:
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+
+async def requests_per_call(app: FastAPI, count: int) -> float:
+    # The ASGI app is called directly: a client in between adds more noise
+    # than the middleware costs.
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(index: int):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/scooters/{index}", "raw_path": f"/scooters/{index}".encode(),
+            "root_path": "", "query_string": b"", "headers": [], "client": None, "server": None,
+        }
+
+    for index in range(200):
+        await app(scope(index), receive, send)
+    started = time.perf_counter()
+    for index in range(count):
+        await app(scope(index), receive, send)
+    return (time.perf_counter() - started) / count
+
+
+def statements_per_call(metrics: Metrics, count: int) -> float:
+    engine = create_engine("sqlite://")
+    if metrics is not None:
+        metrics.instrument_engine(engine)
+    with engine.connect() as connection:
+        statement = text("SELECT 1")
+        started = time.perf_counter()
+        for _ in range(count):
+            connection.execute(statement).scalar()
+        return (time.perf_counter() - started) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--statements", type=int, default=50000)
+    parser.add_argument("--request-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    reference = args.request_ms / 1000
+    report = "{:24} {:8.2f} us -> {:8.2f} us   +{:6.2f} us  {:6.3f}% of a {:g} ms request"
+
+    # Alternated so drift in the machine's speed hits both sides alike.
+    bare, measured = [], []
+    for _ in range(3):
+        bare.append(asyncio.run(requests_per_call(application(), args.requests)))
+        measured.append(asyncio.run(requests_per_call(application(Metrics()), args.requests)))
+    before, after = min(bare), min(measured)
+    print(report.format("request", before * 1e6, after * 1e6, (after - before) * 1e6,
+                        (after - before) / reference * 100, args.request_ms))
+
+    bare, measured = [], []
+    for _ in range(3):
+        bare.append(statements_per_call(None, args.statements))
+        measured.append(statements_per_call(Metrics(), args.statements))
+    before, after = min(bare), min(measured)
+    print(report.format("statement (SQLite)", before * 1e6, after * 1e6, (after - before) * 1e6,
+                        (after - before) / reference * 100, args.request_ms))
+
+    metrics = Metrics()
+    url = "https://maps.googleapis.com/maps/api/directions/json"
+    count = 200000
+    started = time.perf_counter()
+    for _ in range(count):
+        metrics.observe_upstream(url, "GET", "200", 0.08)
+    elapsed = (time.perf_counter() - started) / count
+    print(f"{'upstream observation':24} {elapsed * 1e6:8.2f} us   {elapsed / reference * 100:6.3f}% of a "
+          f"{args.request_ms:g} ms request")
+
+    print(f"\n/metrics with {len(metrics.upstream._counts)} upstream series: "
+          f"{len(metrics.render()):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Encoded polyline codec and simplification: the per-point encode/decode
+against the array versions in app.core.polyline, concat against a decode
+and re-encode of every leg, and the size of a route simplified per zoom.
+
+    python -m benchmarks.polyline [--points 2000] [--repeat 200]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from app.core import polyline
+
+
+def route(rng: random.Random, points: int) -> List[Tuple[float, float]]:
+    # Street-like: straight runs with an occasional turn.
+    lat, lon = 40.40, 49.85
+    heading = rng.uniform(0, 2 * np.pi)
+    track = []
+    for _ in range(points):
+        if rng.random() < 0.05:
+            heading += rng.uniform(-1.6, 1.6)
+        lat += 0.00008 * np.sin(heading) + rng.uniform(-0.000005, 0.000005)
+        lon += 0.00008 * np.cos(heading) + rng.uniform(-0.000005, 0.000005)
+        track.append((round(lat, 5), round(lon, 5)))
+    return track
+
+
+def timed(run: Callable[[], object], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    track = route(rng, args.points)
+    lat = np.array([point[0] for point in track])
+    lon = np.array([point[1] for point in track])
+    encoded = polyline.encode(track)
+    legs = [polyline.encode(track[start:start + 200]) for start in range(0, len(track), 200)]
+
+    cases = [
+        ("encode", lambda: polyline.encode(track), lambda: polyline.encode_arrays(lat, lon)),
+        ("decode", lambda: polyline.decode(encoded), lambda: polyline.decode_arrays(encoded)),
+        (
+            f"concat {len(legs)} legs",
+            lambda: polyline.encode([point for leg in legs for point in polyline.decode(leg)]),
+            lambda: polyline.concat(legs),
+        ),
+    ]
+    for name, scalar, vectorized in cases:
+        before, after = timed(scalar, args.repeat), timed(vectorized, args.repeat)
+        print(f"{name:16} {before:8.3f} ms -> {after:8.3f} ms   {before / after:5.1f}x")
+
+    print(f"\n{args.points} points, {len(encoded):,} characters")
+    for zoom in (10, 12, 14, 16, 18):
+        elapsed = timed(lambda: polyline.simplify_encoded(encoded, zoom), max(args.repeat // 10, 1))
+        simplified = polyline.simplify_encoded(encoded, zoom)
+        print(
+            f"zoom {zoom:2}  {len(polyline.decode(simplified)):6,} points"
+            f"  {len(simplified):7,} characters  {elapsed:7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Point-to-point query latency and memory of plain Dijkstra, bidirectional
+A* and the contraction hierarchy on the same road graph.
+
+    python -m benchmarks.routing [--graph data/graph] [--queries 200]
+
+Without a graph directory a synthetic perturbed grid city is generated.
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.core.haversine import EARTH_RADIUS_M
+from app.routing.contraction import ContractionHierarchy, contract
+from app.routing.graph import ACCESS, RoadGraph
+from app.routing.local import LocalRoutingBackend
+
+
+MODE = "driving"
+
+
+def synthetic_graph(side: int = 100, seed: int = 7) -> RoadGraph:
+    rng = np.random.default_rng(seed)
+    count = side * side
+    lat = np.repeat(40.35 + np.arange(side) * 0.0009, side) + rng.normal(0, 0.0001, count)
+    lon = np.tile(49.80 + np.arange(side) * 0.0012, side) + rng.normal(0, 0.0001, count)
+
+    nodes = np.arange(count).reshape(side, side)
+    tails = np.concatenate((nodes[:, :-1].ravel(), nodes[:-1, :].ravel()))
+    heads = np.concatenate((nodes[:, 1:].ravel(), nodes[1:, :].ravel()))
+    keep = rng.random(len(tails)) > 0.08
+    tails, heads = tails[keep], heads[keep]
+    sources, targets = np.concatenate((tails, heads)), np.concatenate((heads, tails))
+
+    lat1, lat2 = np.radians(lat[sources]), np.radians(lat[targets])
+    dlon = np.radians(lon[targets] - lon[sources])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    length = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+    # Every tenth row and column is an arterial road.
+    arterial = (sources // side % 10 == 0) & (targets // side % 10 == 0) | (sources % 10 == 0) & (targets % 10 == 0)
+    speed = np.where(arterial, 60 / 3.6, rng.choice([20 / 3.6, 30 / 3.6], len(sources)))
+    access = np.full(len(sources), ACCESS["driving"] | ACCESS["walking"] | ACCESS["bicycling"], dtype=np.uint8)
+
+    return RoadGraph.from_edges(lat, lon, sources, targets, length, speed, access)
+
+
+def array_bytes(arrays: Dict[str, np.ndarray]) -> int:
+    return sum(np.asarray(array).nbytes for array in arrays.values())
+
+
+def measure(name: str, query: Callable[[int, int], object], pairs: List) -> List:
+    results, timings = [], []
+    for source, target in pairs:
+        started = time.perf_counter()
+        results.append(query(source, target))
+        timings.append(time.perf_counter() - started)
+
+    # Tracing slows the searches down a lot, so memory gets its own pass.
+    tracemalloc.start()
+    for source, target in pairs[:20]:
+        query(source, target)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    print(
+        f"{name:<14} median {statistics.median(timings) * 1000:8.2f} ms"
+        f"   p95 {timings[int(len(timings) * 0.95)] * 1000:8.2f} ms"
+        f"   peak query memory {peak / 1024:8.0f} KiB"
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--graph", help="graph directory; a synthetic grid is used when omitted")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.graph:
+        graph = RoadGraph.load(args.graph)
+        hierarchy = ContractionHierarchy.load_all(args.graph).get(MODE)
+    else:
+        graph, hierarchy = synthetic_graph(), None
+
+    if hierarchy is None:
+        started = time.perf_counter()
+        hierarchy = contract(graph, MODE)
+        print(f"contraction: {time.perf_counter() - started:.1f}s")
+
+    print(
+        f"graph: {graph.node_count} nodes, {graph.meta['edges']} edges, {array_bytes(graph.arrays) / 2**20:.1f} MiB;"
+        f" hierarchy: {hierarchy.meta['edges']} edges, {array_bytes(hierarchy.arrays) / 2**20:.1f} MiB"
+    )
+
+    backend = LocalRoutingBackend(graph)
+    random.seed(1)
+    pairs = [(random.randrange(graph.node_count), random.randrange(graph.node_count)) for _ in range(args.queries)]
+
+    dijkstra = measure("dijkstra", lambda s, t: backend.one_to_many(s, [t], MODE, "fwd").get(t), pairs)
+    astar = measure("bidir a*", lambda s, t: backend.shortest_path(s, t, MODE), pairs)
+    ch = measure("hierarchy", hierarchy.query, pairs)
+
+    for reference, a, c in zip(dijkstra, astar, ch):
+        if reference is None:
+            assert a is None and c is None
+        else:
+            assert abs(a[0] - reference) < 1e-6 and abs(c[0] - reference) < 1e-6
+
+
+if __name__ == "__main__":
+    main()
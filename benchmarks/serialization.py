@@ -0,0 +1,137 @@
+"""
+Payload size and encode time of the Pydantic JSON responses against the
+binary encoding in app.core.wire, for the fleet coordinates, /fast/ and
+/taxi-optima/request payloads.
+
+    python -m benchmarks.serialization [--scooters 20000] [--repeat 50]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core import polyline, wire
+from app.enums.transport_type import TransportType
+from app.schemas.coordinate import Coordinate
+from app.schemas.fast import FastResponse, Path
+from app.schemas.taxi_optima import TaxiOptimaResponse
+
+
+def walk(rng: random.Random, points: int) -> List[Tuple[float, float]]:
+    lat, lon = rng.uniform(40.35, 40.45), rng.uniform(49.80, 49.95)
+    track = []
+    for _ in range(points):
+        lat += rng.uniform(-0.0004, 0.0004)
+        lon += rng.uniform(-0.0004, 0.0004)
+        track.append((round(lat, 6), round(lon, 6)))
+    return track
+
+
+def fast_options(rng: random.Random) -> List[FastResponse]:
+    walking = walk(rng, 40)
+    options = []
+    for transport in (TransportType.WALKING, TransportType.BICYCLE, TransportType.BUS, TransportType.DRIVE):
+        legs = [(TransportType.WALKING, walking), (transport, walk(rng, 150))]
+        options.append(FastResponse(
+            duration=rng.randint(600, 3600),
+            paths=[
+                Path(
+                    distance=str(rng.randint(100, 9000)),
+                    duration=f"{rng.randint(60, 1800)}s",
+                    start_latitude=track[0][0],
+                    start_longitude=track[0][1],
+                    end_latitude=track[-1][0],
+                    end_longitude=track[-1][1],
+                    polyline=polyline.encode(track),
+                    type=kind,
+                )
+                for kind, track in legs
+            ],
+        ))
+    return options
+
+
+def taxi_response(rng: random.Random) -> TaxiOptimaResponse:
+    route, coming = walk(rng, 120), walk(rng, 80)
+    return TaxiOptimaResponse(
+        optimal_start_latitude=route[0][0],
+        optimal_start_longitude=route[0][1],
+        destination_latitude=route[-1][0],
+        destination_longitude=route[-1][1],
+        trip_distance=8421.0,
+        trip_duration=1260.0,
+        user_to_pickup_distance=140.0,
+        user_to_pickup_polyline=polyline.encode(walk(rng, 10)),
+        taxi_to_pickup_distance=2300.0,
+        pickup_to_dest_distance=8421.0,
+        coordinates=route,
+        instructions=[
+            {"instruction": f"Turn <b>left</b> onto street {i}", "distance": "0.3 km", "duration": "1 min"}
+            for i in range(30)
+        ],
+        pickup_to_dest_polyline=polyline.encode(route),
+        taxi_to_pickup_polyline=polyline.encode(coming),
+        taxi_coming_coordinates=coming,
+        taxi_wait_time=240.0,
+        taxi_wait_distance=2300.0,
+    )
+
+
+def fastapi_json(adapter: TypeAdapter, payload) -> bytes:
+    # What FastAPI does with a response_model: validate, jsonable_encoder, json.dumps.
+    return json.dumps(jsonable_encoder(adapter.dump_python(adapter.validate_python(payload)))).encode()
+
+
+def timed(encode: Callable[[], bytes], repeat: int) -> Tuple[int, float]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        data = encode()
+    return len(data), (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scooters", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    coords = [(round(rng.uniform(40.35, 40.45), 6), round(rng.uniform(49.80, 49.95), 6)) for _ in range(args.scooters)]
+    models = [Coordinate(latitude=lat, longitude=lon) for lat, lon in coords]
+    options = fast_options(rng)
+    taxi = taxi_response(rng)
+
+    cases = [
+        (
+            f"/scooters/geo ({args.scooters})",
+            lambda: fastapi_json(TypeAdapter(List[Coordinate]), models),
+            lambda: wire.coordinates_header() + wire.pack_coordinates(coords),
+        ),
+        (
+            "/fast/",
+            lambda: fastapi_json(TypeAdapter(List[FastResponse]), options),
+            lambda: wire.encode_fast(options),
+        ),
+        (
+            "/taxi-optima/request",
+            lambda: fastapi_json(TypeAdapter(TaxiOptimaResponse), taxi),
+            lambda: wire.encode_taxi_optima(taxi),
+        ),
+    ]
+
+    for name, as_json, as_binary in cases:
+        json_size, json_time = timed(as_json, args.repeat)
+        binary_size, binary_time = timed(as_binary, args.repeat)
+        print(
+            f"{name:24} json {json_size:>9,} B {json_time * 1000:8.3f} ms"
+            f"   binary {binary_size:>9,} B {binary_time * 1000:8.3f} ms"
+            f"   {json_size / binary_size:5.1f}x smaller {json_time / binary_time:5.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Critical path and parallelism of traces written to TRACE_EXPORT_PATH.
+
+For every trace (slowest first) prints the root's wall time, the summed
+time of its upstream calls (`http.request` spans), their ratio as the
+effective parallelism, cache hits on the routing calls, and the critical
+path: the chain of spans each parent was waiting on.
+
+    python -m benchmarks.trace_report traces.jsonl [--traces 5] [--root taxi_optima.request]
+"""
+import argparse
+import json
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+
+def load(path: str) -> Dict[str, List[Dict]]:
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as spans:
+        for line in spans:
+            span = json.loads(line)
+            traces[span["traceId"]].append(span)
+    return traces
+
+
+def milliseconds(span: Dict) -> float:
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6
+
+
+def critical_path(span: Dict, children: Dict[str, List[Dict]], depth: int = 0) -> List[Tuple[int, Dict]]:
+    # Walking back from the end: the child that finished last, then the one
+    # that finished last before that child started, and so on.
+    chosen = []
+    cursor = span["endTimeUnixNano"]
+    for child in sorted(children.get(span["spanId"], []), key=lambda child: child["endTimeUnixNano"], reverse=True):
+        if not chosen or child["endTimeUnixNano"] <= cursor:
+            chosen.append(child)
+            cursor = child["startTimeUnixNano"]
+
+    path = [(depth, span)]
+    for child in reversed(chosen):
+        path.extend(critical_path(child, children, depth + 1))
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--traces", type=int, default=5)
+    parser.add_argument("--root", default="taxi_optima.request")
+    args = parser.parse_args()
+
+    roots = []
+    for spans in load(args.path).values():
+        children = defaultdict(list)
+        root = None
+        for span in spans:
+            if span["parentSpanId"]:
+                children[span["parentSpanId"]].append(span)
+            elif span["name"] == args.root:
+                root = span
+        if root is not None:
+            roots.append((root, spans, children))
+
+    roots.sort(key=lambda entry: milliseconds(entry[0]), reverse=True)
+    print(f"{len(roots)} traces rooted at {args.root}")
+    for root, spans, children in roots[:args.traces]:
+        upstream = [span for span in spans if span["name"] == "http.request"]
+        upstream_ms = sum(milliseconds(span) for span in upstream)
+        cache = Counter(span["attributes"]["cache"] for span in spans if "cache" in span["attributes"])
+        wall = milliseconds(root)
+
+        print(f"\n{root['traceId']}  {wall:.1f} ms, {len(spans)} spans, status {root['status']['code']}")
+        print(f"  {len(upstream)} upstream calls, {upstream_ms:.1f} ms in total, "
+              f"parallelism {upstream_ms / wall if wall else 0:.1f}x")
+        if cache:
+            print("  cache " + ", ".join(f"{outcome} {count}" for outcome, count in cache.most_common()))
+        for depth, span in critical_path(root, children):
+            attributes = ", ".join(f"{key}={value}" for key, value in span["attributes"].items())
+            print(f"  {'  ' * depth}{span['name']:<{32 - 2 * depth}} {milliseconds(span):8.1f} ms  {attributes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+RAPTOR query latency over a synthetic Baku-sized GTFS feed: a grid of bus
+lines plus two metro lines, a trip every few minutes from 06:00 to 24:00.
+The earliest arrival of every query is checked against a connection scan
+over the same timetable.
+
+    python -m benchmarks.transit [--queries 300]
+"""
+import argparse
+import csv
+import random
+import statistics
+import tempfile
+import time
+from bisect import bisect_left
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.transit.gtfs import build
+from app.transit.raptor import INF, Raptor
+from app.transit.timetable import Timetable
+
+# (departure, arrival, from stop, to stop, trip) of one hop between consecutive stops.
+Connection = Tuple[int, int, int, int, int]
+
+
+def write_feed(path: Path, lines: int = 40, stops_per_line: int = 30, seed: int = 5) -> None:
+    rng = random.Random(seed)
+    files = {
+        "agency.txt": [["agency_id", "agency_name", "agency_url", "agency_timezone"], ["bb", "BakuBus", "https://bakubus.az", "Asia/Baku"]],
+        "calendar.txt": [
+            ["service_id", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday", "start_date", "end_date"],
+            ["all", 1, 1, 1, 1, 1, 1, 1, 20240101, 20301231],
+        ],
+        "stops.txt": [["stop_id", "stop_name", "stop_lat", "stop_lon"]],
+        "routes.txt": [["route_id", "agency_id", "route_short_name", "route_long_name", "route_type"]],
+        "trips.txt": [["route_id", "service_id", "trip_id", "trip_headsign"]],
+        "stop_times.txt": [["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"]],
+    }
+
+    def hms(seconds: int) -> str:
+        return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+    for line in range(lines + 2):
+        metro = line >= lines
+        horizontal = line % 2 == 0
+        offset = 0.3 if metro else (line // 2) / (lines // 2)
+        stop_ids = []
+        for k in range(stops_per_line):
+            along = k / (stops_per_line - 1)
+            lat, lon = (offset, along) if horizontal else (along, offset)
+            if metro and line == lines + 1:
+                lat, lon = along, along
+            stop_id = f"s{line}_{k}"
+            files["stops.txt"].append([stop_id, f"Stop {line}/{k}", 40.33 + lat * 0.12, 49.75 + lon * 0.2])
+            stop_ids.append(stop_id)
+
+        route_id = f"r{line}"
+        files["routes.txt"].append([route_id, "bb", "M" if metro else str(line), f"Line {line}", 1 if metro else 3])
+        hop = 90 if metro else rng.randint(100, 160)
+        headway = 240 if metro else rng.choice((360, 480, 600))
+
+        for direction in (0, 1):
+            sequence = stop_ids if direction == 0 else stop_ids[::-1]
+            for start in range(6 * 3600 + rng.randint(0, headway), 24 * 3600, headway):
+                trip_id = f"{route_id}_{direction}_{start}"
+                files["trips.txt"].append([route_id, "all", trip_id, sequence[-1]])
+                for k, stop_id in enumerate(sequence):
+                    at = start + k * hop
+                    files["stop_times.txt"].append([trip_id, hms(at), hms(at + 20), stop_id, k + 1])
+
+    for name, rows in files.items():
+        with (path / name).open("w", newline="") as handle:
+            csv.writer(handle).writerows(rows)
+
+
+def connections(timetable: Timetable) -> List[Connection]:
+    hops = []
+    for pattern, stops in enumerate(timetable.pattern_stops):
+        departures = np.asarray(timetable.pattern_departures[pattern]).tolist()
+        arrivals = np.asarray(timetable.pattern_arrivals[pattern]).tolist()
+        first_trip = timetable.pattern_first_trip[pattern]
+        for trip, (leaving, arriving) in enumerate(zip(departures, arrivals)):
+            for i in range(len(stops) - 1):
+                hops.append((leaving[i], arriving[i + 1], stops[i], stops[i + 1], first_trip + trip))
+    hops.sort()
+    return hops
+
+
+def connection_scan(
+    timetable: Timetable,
+    hops: List[Connection],
+    access: Dict[int, int],
+    egress: Dict[int, int],
+    departure: int,
+    active: List[bool]
+) -> float:
+    """
+    Earliest arrival at the destination by the Connection Scan Algorithm,
+    with RAPTOR's footpath rules: one footpath after leaving a vehicle, and
+    a stop counts as reached by a vehicle only if that beats walking there
+    from the origin.
+    """
+    reached: Dict[int, float] = {stop: departure + seconds for stop, seconds in access.items()}
+    on_board = set()
+    target = INF
+
+    def arrive(stop: int, at: int) -> None:
+        nonlocal target
+        if at < reached.get(stop, INF):
+            reached[stop] = at
+            if stop in egress:
+                target = min(target, at + egress[stop])
+
+    for leaving, arriving, origin, destination, trip in hops[bisect_left(hops, (departure,)):]:
+        if leaving >= target:
+            break
+        if not active[trip]:
+            continue
+        if trip in on_board or reached.get(origin, INF) <= leaving:
+            on_board.add(trip)
+            if arriving < reached.get(destination, INF):
+                arrive(destination, arriving)
+                for stop, seconds in timetable.transfers[destination]:
+                    arrive(stop, arriving + seconds)
+    return target
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_feed(Path(tmp))
+        started = time.perf_counter()
+        timetable = build([tmp])
+        print(
+            f"build: {time.perf_counter() - started:.1f}s  {timetable.stop_count} stops,"
+            f" {timetable.pattern_count} patterns, {len(timetable.headsigns)} trips"
+        )
+
+    raptor = Raptor(timetable)
+    active = timetable.active_trips(date(2025, 5, 14))
+    hops, running = connections(timetable), active.tolist()
+    rng = random.Random(1)
+
+    timings, rides, checked = [], [], 0
+    for _ in range(args.queries):
+        origin = rng.sample(range(timetable.stop_count), 3)
+        destination = rng.sample(range(timetable.stop_count), 3)
+        access = {stop: rng.randint(60, 600) for stop in origin}
+        egress = {stop: rng.randint(60, 600) for stop in destination}
+        departure = rng.randint(7 * 3600, 21 * 3600)
+
+        started = time.perf_counter()
+        journeys = raptor.plan(access, egress, departure, active)
+        timings.append(time.perf_counter() - started)
+        rides.append(len(journeys))
+
+        earliest = journeys[-1].arrival if journeys else INF
+        expected = connection_scan(timetable, hops, access, egress, departure, running)
+        assert earliest == expected, (access, egress, departure, earliest, expected)
+        checked += 1
+
+    timings.sort()
+    print(
+        f"raptor  median {statistics.median(timings) * 1000:.2f} ms"
+        f"   p95 {timings[int(len(timings) * 0.95)] * 1000:.2f} ms"
+        f"   max {timings[-1] * 1000:.2f} ms"
+        f"   pareto journeys/query {statistics.mean(rides):.2f}"
+    )
+    print(f"earliest arrivals match the connection scan on {checked} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Directions API transit responses: TransitModel.model_validate followed by
+the serialization FastAPI does for a returned model, against the field-mask
+projection in app.transit.directions. The responses are synthetic but shaped
+like recorded ones, upstream-only fields included, and the projection is
+checked to serialize to the same JSON as the models.
+
+    python -m benchmarks.transit_parsing [--alternatives 6] [--steps 9] [--repeat 200]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.transit import TransitModel
+from app.transit.directions import project_transit, transit_routes
+
+
+def text(value: int, unit: str) -> Dict:
+    return {"text": f"{value} {unit}", "value": value}
+
+
+def place(rng: random.Random) -> Dict:
+    return {"lat": 40.35 + rng.random() * 0.1, "lng": 49.8 + rng.random() * 0.15}
+
+
+def timestamp(value: int) -> Dict:
+    return {"text": "8:15 AM", "time_zone": "Asia/Baku", "value": value}
+
+
+def walking(rng: random.Random, substeps: int) -> Dict:
+    return {
+        "distance": text(rng.randint(50, 900), "m"),
+        "duration": text(rng.randint(60, 700), "s"),
+        "end_location": place(rng),
+        "html_instructions": "Walk to 28 May",
+        "polyline": {"points": "ixnuFmt{oH?h@{CEU?_@?o@?A?cCEMCA\\?T@LBXf@\\HDJDH@bBAB?vA?vA?pB"},
+        "start_location": place(rng),
+        "steps": [
+            {
+                "distance": text(rng.randint(5, 200), "m"),
+                "duration": text(rng.randint(5, 150), "s"),
+                "end_location": place(rng),
+                "html_instructions": "Head <b>north</b> on <b>Nizami St</b>",
+                "maneuver": "turn-left",
+                "polyline": {"points": "_p~iF~ps|U_ulLnnqC_mqNvxq`@"},
+                "start_location": place(rng),
+                "travel_mode": "WALKING",
+                "building_level": {"number": 0},
+            }
+            for _ in range(substeps)
+        ],
+        "travel_mode": "WALKING",
+    }
+
+
+def riding(rng: random.Random, departure: int) -> Dict:
+    return {
+        "distance": text(rng.randint(1000, 9000), "m"),
+        "duration": text(rng.randint(200, 1500), "s"),
+        "end_location": place(rng),
+        "html_instructions": "Subway towards Hazi Aslanov",
+        "polyline": {"points": "evmuF}bgoHaB_@qCq@}@Sg@Ie@Ee@?exAlGyABuAAoAMiAWkAc@y@]y@a@m@_@" * 4},
+        "start_location": place(rng),
+        "transit_details": {
+            "arrival_stop": {"location": place(rng), "name": "Koroglu"},
+            "arrival_time": timestamp(departure + 900),
+            "departure_stop": {"location": place(rng), "name": "Icherisheher"},
+            "departure_time": timestamp(departure),
+            "headsign": "Hazi Aslanov",
+            "headway": 300,
+            "line": {
+                "agencies": [{"name": "Baku Metro", "phone": "011 994 12 490 00 00", "url": "https://metro.gov.az/"}],
+                "color": "#ff0000",
+                "name": "Red Line",
+                "short_name": "1",
+                "text_color": "#ffffff",
+                "url": "https://metro.gov.az/en/lines/1",
+                "vehicle": {
+                    "icon": "//maps.gstatic.com/mapfiles/transit/iw2/6/subway2.png",
+                    "local_icon": "//maps.gstatic.com/mapfiles/transit/iw2/6/az-baku-metro.png",
+                    "name": "Subway",
+                    "type": "SUBWAY",
+                },
+            },
+            "num_stops": rng.randint(1, 12),
+            "trip_short_name": "",
+        },
+        "travel_mode": "TRANSIT",
+    }
+
+
+def response(rng: random.Random, alternatives: int, steps: int, substeps: int) -> Dict:
+    routes = []
+    for _ in range(alternatives):
+        departure = 1760000000 + rng.randint(0, 3600)
+        routes.append({
+            "bounds": {"northeast": place(rng), "southwest": place(rng)},
+            "copyrights": "Map data ©2025",
+            "fare": {"currency": "AZN", "text": "AZN 0.60", "value": 0.6},
+            "legs": [{
+                "arrival_time": timestamp(departure + 2400),
+                "departure_time": timestamp(departure),
+                "distance": text(rng.randint(3000, 20000), "m"),
+                "duration": text(rng.randint(900, 3600), "s"),
+                "end_address": "Hazi Aslanov, Baku, Azerbaijan",
+                "end_location": place(rng),
+                "start_address": "Icherisheher, Baku, Azerbaijan",
+                "start_location": place(rng),
+                "steps": [
+                    riding(rng, departure) if index % 2 else walking(rng, substeps)
+                    for index in range(steps)
+                ],
+                "traffic_speed_entry": [],
+                "via_waypoint": [],
+            }],
+            "overview_polyline": {"points": "evmuF}bgoHaB_@qCq@}@Sg@Ie@Ee@?exAlGyABuAAoAMiAWkAc@y@]" * 20},
+            "summary": "",
+            "warnings": ["Walking directions are in beta. Use caution – This route may be missing sidewalks."],
+            "waypoint_order": [],
+        })
+    return {
+        "geocoded_waypoints": [
+            {"geocoder_status": "OK", "place_id": "ChIJ" + "x" * 23, "types": ["street_address"]},
+            {"geocoder_status": "OK", "place_id": "ChIJ" + "y" * 23, "types": ["subway_station", "transit_station"]},
+        ],
+        "routes": routes,
+        "status": "OK",
+    }
+
+
+def timed(run: Callable[[], object], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alternatives", type=int, default=6)
+    parser.add_argument("--steps", type=int, default=9)
+    parser.add_argument("--substeps", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    payload = json.dumps(response(rng, args.alternatives, args.steps, args.substeps)).encode()
+    data = json.loads(payload)
+
+    def validated() -> bytes:
+        return json.dumps(jsonable_encoder(TransitModel.model_validate(data))).encode()
+
+    def projected() -> bytes:
+        return json.dumps(project_transit(data)).encode()
+
+    if json.loads(validated()) != json.loads(projected()):
+        raise SystemExit("projection and TransitModel disagree")
+
+    print(f"{len(payload):,} byte response, {args.alternatives} routes of {args.steps} steps")
+    cases: List = [
+        ("decode", lambda: json.loads(payload), None),
+        ("parse + serialize", validated, projected),
+        (
+            "journey planning",
+            lambda: TransitModel.model_validate(data).model_dump()["routes"],
+            lambda: transit_routes(data["routes"]),
+        ),
+    ]
+    for name, before, after in cases:
+        if after is None:
+            print(f"{name:18} {timed(before, args.repeat):8.3f} ms")
+            continue
+        slow, fast = timed(before, args.repeat), timed(after, args.repeat)
+        print(f"{name:18} {slow:8.3f} ms -> {fast:8.3f} ms   {slow / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,8 +17,55 @@ class Settings(BaseSettings):
     GOOGLE_MAPS_WALKING_API_URL: str
     GOOGLE_MAPS_DRIVE_API_URL: str
     GOOGLE_MAPS_TRANSIT_API_URL: str
+    GOOGLE_MAPS_DIRECTIONS_API_URL: str = "https://maps.googleapis.com/maps/api/directions/json"
+    GOOGLE_MAPS_GEOCODE_API_URL: str = "https://maps.googleapis.com/maps/api/geocode/json"
+    GOOGLE_MAPS_PLACES_NEARBY_API_URL: str = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    GOOGLE_MAPS_DISTANCE_MATRIX_API_URL: str = "https://maps.googleapis.com/maps/api/distancematrix/json"
     GOOGLE_MAPS_API_KEY: str
 
+    HTTP_HTTP2: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+
+    ROUTE_CACHE_MAX_ENTRIES: int = 10000
+    ROUTE_CACHE_PRECISION: int = 4
+    ROUTE_CACHE_DEPARTURE_BUCKET: int = 300
+    ROUTE_CACHE_TTL_DRIVING: int = 120
+    ROUTE_CACHE_TTL_WALKING: int = 86400
+    ROUTE_CACHE_TTL_BICYCLING: int = 86400
+    ROUTE_CACHE_TTL_TRANSIT: int = 600
+    ROUTE_CACHE_REDIS_URL: Optional[str] = None
+
+    TAXI_OPTIMA_MODE: str = "matrix"
+    TAXI_OPTIMA_CONCURRENCY: int = 16
+    TAXI_OPTIMA_LEG_TIMEOUT: float = 5.0
+    TAXI_OPTIMA_BUDGET: float = 8.0
+
+    ROUTING_BACKEND: str = "google"  # "google" or "local"
+    ROUTING_GRAPH_PATH: str = "data/graph"
+
+    FAST_BUDGET: float = 6.0
+
+    TRANSIT_BACKEND: str = "google"  # "google" or "gtfs"
+    TRANSIT_TIMETABLE_PATH: str = "data/transit"
+
+    FLEET_REFRESH_DELAY: float = 0.25  # coalescing window for change notifications
+    FLEET_POLL_INTERVAL: float = 30.0  # full re-read, bounds staleness without notifications
+
+    TELEMETRY_QUEUE_SIZE: int = 10000
+    TELEMETRY_MAX_PENDING: int = 50000  # distinct scooters buffered between flushes
+    TELEMETRY_FLUSH_INTERVAL: float = 0.5
+
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000  # entries waiting for output before new ones are dropped
+    SQL_ECHO: bool = False
+
+    TRACE_EXPORT_PATH: Optional[str] = None  # JSONL file spans are appended to; unset disables tracing
+    TRACE_SAMPLE_RATE: float = 1.0  # share of root spans whose trace is recorded
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -34,6 +34,14 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# Columns and indexes that exist only in migrations (maintained by Postgres
+# itself) and must not be dropped by autogenerate.
+DATABASE_MANAGED = {"geog", "ix_scooter_geog"}
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    return not (type_ in ("column", "index") and name in DATABASE_MANAGED)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -54,6 +62,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -61,7 +70,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,48 @@
+"""Scooter geography
+
+Revision ID: 4b0d2c7e9a13
+Revises: e781f584b354
+Create Date: 2026-10-18 10:12:37.481203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b0d2c7e9a13'
+down_revision: Union[str, None] = 'e781f584b354'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    # Generated from the string columns, so existing rows are backfilled by
+    # the ALTER itself and every later INSERT/UPDATE keeps it in sync.
+    op.execute(
+        """
+        ALTER TABLE scooter
+        ADD COLUMN geog geography(Point, 4326)
+        GENERATED ALWAYS AS (
+            ST_SetSRID(
+                ST_MakePoint(longitude::double precision, latitude::double precision),
+                4326
+            )::geography
+        ) STORED
+        """
+    )
+    op.create_index(
+        'ix_scooter_geog',
+        'scooter',
+        [sa.text('geog')],
+        postgresql_using='gist',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scooter_geog', table_name='scooter')
+    op.drop_column('scooter', 'geog')
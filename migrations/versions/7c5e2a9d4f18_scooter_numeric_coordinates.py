@@ -0,0 +1,75 @@
+"""Scooter numeric coordinates
+
+Revision ID: 7c5e2a9d4f18
+Revises: 4b0d2c7e9a13
+Create Date: 2026-10-18 14:03:51.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c5e2a9d4f18'
+down_revision: Union[str, None] = '4b0d2c7e9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+GEOG = (
+    "ALTER TABLE scooter "
+    "ADD COLUMN geog geography(Point, 4326) "
+    "GENERATED ALWAYS AS ("
+    "ST_SetSRID(ST_MakePoint({longitude}, {latitude}), 4326)::geography"
+    ") STORED"
+)
+
+
+def upgrade() -> None:
+    # The generated column depends on the string columns, so it has to go
+    # before their type can change; it is recreated from the numeric ones.
+    op.drop_index('ix_scooter_geog', table_name='scooter')
+    op.drop_column('scooter', 'geog')
+
+    for column in ('latitude', 'longitude'):
+        op.alter_column(
+            'scooter',
+            column,
+            type_=sa.Double(),
+            existing_type=sqlmodel.sql.sqltypes.AutoString(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::double precision',
+        )
+
+    op.execute(GEOG.format(latitude='latitude', longitude='longitude'))
+    op.create_index('ix_scooter_geog', 'scooter', [sa.text('geog')], postgresql_using='gist')
+
+    # Bounding-box range scans: whichever axis is more selective leads.
+    op.create_index('ix_scooter_latitude_longitude', 'scooter', ['latitude', 'longitude'])
+    op.create_index('ix_scooter_longitude_latitude', 'scooter', ['longitude', 'latitude'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scooter_longitude_latitude', table_name='scooter')
+    op.drop_index('ix_scooter_latitude_longitude', table_name='scooter')
+    op.drop_index('ix_scooter_geog', table_name='scooter')
+    op.drop_column('scooter', 'geog')
+
+    for column in ('latitude', 'longitude'):
+        op.alter_column(
+            'scooter',
+            column,
+            type_=sqlmodel.sql.sqltypes.AutoString(),
+            existing_type=sa.Double(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::varchar',
+        )
+
+    op.execute(GEOG.format(
+        latitude='latitude::double precision',
+        longitude='longitude::double precision',
+    ))
+    op.create_index('ix_scooter_geog', 'scooter', [sa.text('geog')], postgresql_using='gist')
@@ -0,0 +1,85 @@
+"""Scooter change notify
+
+Revision ID: 9e4b7d1c2a65
+Revises: 7c5e2a9d4f18
+Create Date: 2026-10-18 15:41:09.327815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7d1c2a65'
+down_revision: Union[str, None] = '7c5e2a9d4f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One NOTIFY per statement on the `scooter_changes` channel carrying the
+    # affected rows as {"op": "upsert" | "delete", "rows": [[id, lat, lon], ...]}.
+    # Payloads are capped at 8000 bytes, so a large statement (a bulk COPY)
+    # or a TRUNCATE sends {"op": "reload"} and listeners re-read the table.
+    op.execute(
+        """
+        CREATE FUNCTION scooter_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changed json;
+            payload text;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT json_agg(json_build_array(id, latitude, longitude)) INTO changed FROM old_rows;
+            ELSE
+                SELECT json_agg(json_build_array(id, latitude, longitude)) INTO changed FROM new_rows;
+            END IF;
+
+            IF changed IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            payload := json_build_object(
+                'op', CASE WHEN TG_OP = 'DELETE' THEN 'delete' ELSE 'upsert' END,
+                'rows', changed
+            )::text;
+            IF octet_length(payload) > 7900 THEN
+                payload := '{"op": "reload"}';
+            END IF;
+
+            PERFORM pg_notify('scooter_changes', payload);
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    # Transition tables allow a single event per trigger.
+    for event, table in (('INSERT', 'new_rows'), ('UPDATE', 'new_rows'), ('DELETE', 'old_rows')):
+        side = 'OLD' if table == 'old_rows' else 'NEW'
+        op.execute(
+            f"""
+            CREATE TRIGGER scooter_notify_{event.lower()}
+            AFTER {event} ON scooter
+            REFERENCING {side} TABLE AS {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION scooter_notify()
+            """
+        )
+    op.execute(
+        """
+        CREATE TRIGGER scooter_notify_truncate
+        AFTER TRUNCATE ON scooter
+        FOR EACH STATEMENT EXECUTE FUNCTION scooter_notify()
+        """
+    )
+
+
+def downgrade() -> None:
+    for event in ('insert', 'update', 'delete', 'truncate'):
+        op.execute(f"DROP TRIGGER scooter_notify_{event} ON scooter")
+    op.execute("DROP FUNCTION scooter_notify()")
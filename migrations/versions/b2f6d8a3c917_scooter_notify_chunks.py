@@ -0,0 +1,110 @@
+"""Scooter notify chunks
+
+Revision ID: b2f6d8a3c917
+Revises: 9e4b7d1c2a65
+Create Date: 2026-10-18 17:12:44.503921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f6d8a3c917'
+down_revision: Union[str, None] = '9e4b7d1c2a65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Batched telemetry upserts change hundreds of rows per statement, which
+    # overflowed the single 8000 byte payload and made every listener re-read
+    # the table. Rows are now sent in chunks of 80 (about 7000 bytes); only
+    # statements beyond 10000 rows, i.e. bulk imports, still ask for a reload.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION scooter_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            total bigint;
+            changed json;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT count(*) INTO total FROM old_rows;
+            ELSE
+                SELECT count(*) INTO total FROM new_rows;
+            END IF;
+
+            IF total = 0 THEN
+                RETURN NULL;
+            ELSIF total > 10000 THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                FOR changed IN
+                    SELECT json_agg(json_build_array(id, latitude, longitude))
+                    FROM (SELECT *, (row_number() OVER () - 1) / 80 AS chunk FROM old_rows) numbered
+                    GROUP BY chunk
+                LOOP
+                    PERFORM pg_notify('scooter_changes', json_build_object('op', 'delete', 'rows', changed)::text);
+                END LOOP;
+            ELSE
+                FOR changed IN
+                    SELECT json_agg(json_build_array(id, latitude, longitude))
+                    FROM (SELECT *, (row_number() OVER () - 1) / 80 AS chunk FROM new_rows) numbered
+                    GROUP BY chunk
+                LOOP
+                    PERFORM pg_notify('scooter_changes', json_build_object('op', 'upsert', 'rows', changed)::text);
+                END LOOP;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION scooter_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changed json;
+            payload text;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT json_agg(json_build_array(id, latitude, longitude)) INTO changed FROM old_rows;
+            ELSE
+                SELECT json_agg(json_build_array(id, latitude, longitude)) INTO changed FROM new_rows;
+            END IF;
+
+            IF changed IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            payload := json_build_object(
+                'op', CASE WHEN TG_OP = 'DELETE' THEN 'delete' ELSE 'upsert' END,
+                'rows', changed
+            )::text;
+            IF octet_length(payload) > 7900 THEN
+                payload := '{"op": "reload"}';
+            END IF;
+
+            PERFORM pg_notify('scooter_changes', payload);
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
@@ -0,0 +1,121 @@
+"""Scooter notify range
+
+Revision ID: d5a9c3e7f041
+Revises: b2f6d8a3c917
+Create Date: 2026-10-18 18:26:03.771490
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9c3e7f041'
+down_revision: Union[str, None] = 'b2f6d8a3c917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows carry the remaining range for the fleet store's range layers:
+    # [id, lat, lon, distance]. Chunks of 80 rows stay below 7600 bytes.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION scooter_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            total bigint;
+            changed json;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT count(*) INTO total FROM old_rows;
+            ELSE
+                SELECT count(*) INTO total FROM new_rows;
+            END IF;
+
+            IF total = 0 THEN
+                RETURN NULL;
+            ELSIF total > 10000 THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                FOR changed IN
+                    SELECT json_agg(json_build_array(id, latitude, longitude, distance))
+                    FROM (SELECT *, (row_number() OVER () - 1) / 80 AS chunk FROM old_rows) numbered
+                    GROUP BY chunk
+                LOOP
+                    PERFORM pg_notify('scooter_changes', json_build_object('op', 'delete', 'rows', changed)::text);
+                END LOOP;
+            ELSE
+                FOR changed IN
+                    SELECT json_agg(json_build_array(id, latitude, longitude, distance))
+                    FROM (SELECT *, (row_number() OVER () - 1) / 80 AS chunk FROM new_rows) numbered
+                    GROUP BY chunk
+                LOOP
+                    PERFORM pg_notify('scooter_changes', json_build_object('op', 'upsert', 'rows', changed)::text);
+                END LOOP;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION scooter_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            total bigint;
+            changed json;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT count(*) INTO total FROM old_rows;
+            ELSE
+                SELECT count(*) INTO total FROM new_rows;
+            END IF;
+
+            IF total = 0 THEN
+                RETURN NULL;
+            ELSIF total > 10000 THEN
+                PERFORM pg_notify('scooter_changes', '{"op": "reload"}');
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                FOR changed IN
+                    SELECT json_agg(json_build_array(id, latitude, longitude))
+                    FROM (SELECT *, (row_number() OVER () - 1) / 80 AS chunk FROM old_rows) numbered
+                    GROUP BY chunk
+                LOOP
+                    PERFORM pg_notify('scooter_changes', json_build_object('op', 'delete', 'rows', changed)::text);
+                END LOOP;
+            ELSE
+                FOR changed IN
+                    SELECT json_agg(json_build_array(id, latitude, longitude))
+                    FROM (SELECT *, (row_number() OVER () - 1) / 80 AS chunk FROM new_rows) numbered
+                    GROUP BY chunk
+                LOOP
+                    PERFORM pg_notify('scooter_changes', json_build_object('op', 'upsert', 'rows', changed)::text);
+                END LOOP;
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+
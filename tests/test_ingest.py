@@ -0,0 +1,56 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.ingest import csv_points, ndjson_points
+from app.exceptions.infrastructure import InvalidPayloadError
+from app.schemas.scooter import MAX_BULK_COUNT, ScooterBulkCreate
+
+
+BULK = TypeAdapter(List[ScooterBulkCreate])
+
+RECORDS = [
+    ({"latitude": 40.4, "longitude": 49.85, "count": 3}, True),
+    ({"latitude": 90, "longitude": -180, "count": MAX_BULK_COUNT}, True),
+    ({"latitude": 500, "longitude": 49.85, "count": 3}, False),
+    ({"latitude": 40.4, "longitude": 181, "count": 3}, False),
+    ({"latitude": 40.4, "longitude": 49.85, "count": 0}, False),
+    ({"latitude": 40.4, "longitude": 49.85, "count": -5}, False),
+    ({"latitude": 40.4, "longitude": 49.85, "count": MAX_BULK_COUNT + 1}, False),
+]
+
+
+async def chunks(body: str):
+    yield body.encode()
+
+
+async def collect(points):
+    return [point async for point in points]
+
+
+def accepted_as_json(record) -> bool:
+    try:
+        BULK.validate_json(json.dumps([record]))
+    except ValidationError:
+        return False
+    return True
+
+
+def accepted_as_stream(parse, body: str) -> bool:
+    try:
+        asyncio.run(collect(parse(chunks(body))))
+    except InvalidPayloadError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize("record, valid", RECORDS)
+def test_every_bulk_format_validates_records_alike(record, valid):
+    csv_body = "latitude,longitude,count\n" + ",".join(str(record[key]) for key in ("latitude", "longitude", "count"))
+
+    assert accepted_as_json(record) is valid
+    assert accepted_as_stream(ndjson_points, json.dumps(record)) is valid
+    assert accepted_as_stream(csv_points, csv_body) is valid
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+
+from app.services.multimodal_planner import MultimodalPlanner
+
+
+def test_guard_drops_an_option_that_misses_the_budget(caplog):
+    async def scenario():
+        deadline = asyncio.get_running_loop().time() + 0.01
+        return await MultimodalPlanner._guard(asyncio.sleep(1), deadline)
+
+    with caplog.at_level(logging.ERROR, logger="app.services.multimodal_planner"):
+        assert asyncio.run(scenario()) is None
+    assert not caplog.records
+
+
+def test_guard_logs_an_option_that_fails(caplog):
+    async def failing():
+        raise KeyError("legs")
+
+    async def scenario():
+        deadline = asyncio.get_running_loop().time() + 1
+        return await MultimodalPlanner._guard(failing(), deadline)
+
+    with caplog.at_level(logging.ERROR, logger="app.services.multimodal_planner"):
+        assert asyncio.run(scenario()) is None
+    [record] = caplog.records
+    assert record.exc_info[0] is KeyError
+    assert record.option.endswith("failing")
+
+
+def test_guard_gives_up_on_local_transit_at_the_deadline():
+    class SlowTransit:
+        available = True
+
+        def directions(self, origin, destination):
+            time.sleep(0.3)
+            return {"routes": []}
+
+    planner = MultimodalPlanner.__new__(MultimodalPlanner)
+    planner.transit = SlowTransit()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        ticks = 0
+
+        async def ticking():
+            nonlocal ticks
+            while loop.time() - started < 0.1:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        result, _ = await asyncio.gather(
+            MultimodalPlanner._guard(planner._transit((40.4, 49.85), (40.38, 49.89)), started + 0.05),
+            ticking(),
+        )
+        return result, loop.time() - started, ticks
+
+    result, elapsed, ticks = asyncio.run(scenario())
+    assert result is None
+    # The loop kept running while RAPTOR was busy.
+    assert ticks > 3
+    assert elapsed < 0.25
@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.core import polyline
+
+
+def reference_douglas_peucker(x, y, tolerance, first, last, keep):
+    if last - first < 2:
+        return
+    ax, ay, bx, by = x[first], y[first], x[last], y[last]
+    farthest, split = -1.0, None
+    for i in range(first + 1, last):
+        dx, dy = bx - ax, by - ay
+        length = dx * dx + dy * dy
+        t = 0.0 if length == 0 else min(max(((x[i] - ax) * dx + (y[i] - ay) * dy) / length, 0.0), 1.0)
+        offset = np.hypot(x[i] - (ax + t * dx), y[i] - (ay + t * dy))
+        if offset > farthest:
+            farthest, split = offset, i
+    if farthest > tolerance:
+        keep[split] = True
+        reference_douglas_peucker(x, y, tolerance, first, split, keep)
+        reference_douglas_peucker(x, y, tolerance, split, last, keep)
+
+
+@pytest.mark.parametrize("points", [2, 3, 10, 500])
+@pytest.mark.parametrize("tolerance", [0.0, 0.5, 5.0])
+def test_douglas_peucker_matches_the_recursive_definition(points, tolerance):
+    rng = random.Random(points)
+    # Rounded to a grid so there are ties and repeated points.
+    x = np.round(np.cumsum([rng.uniform(-3, 3) for _ in range(points)]))
+    y = np.round(np.cumsum([rng.uniform(-3, 3) for _ in range(points)]))
+
+    expected = np.zeros(points, dtype=bool)
+    expected[0] = expected[-1] = True
+    reference_douglas_peucker(x, y, tolerance, 0, points - 1, expected)
+
+    assert (polyline.douglas_peucker(x, y, tolerance) == expected).all()
+
+
+def test_simplify_encoded_keeps_the_end_points():
+    track = [(round(40.4 + 0.0001 * i, 5), round(49.85 + 0.0001 * (i % 7), 5)) for i in range(200)]
+    encoded = polyline.encode(track)
+
+    simplified = polyline.decode(polyline.simplify_encoded(encoded, 14))
+
+    assert len(simplified) < len(track)
+    assert simplified[0] == track[0] and simplified[-1] == track[-1]
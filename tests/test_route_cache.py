@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from app.core.route_cache import RouteCache, SharedCacheBackend
+from configs.settings import Settings
+
+
+ORIGIN = (40.4093, 49.8671)
+DESTINATION = (40.3777, 49.8920)
+
+
+def test_waiter_survives_cancelled_leader():
+    async def scenario():
+        cache = RouteCache(Settings())
+        started = asyncio.Event()
+        calls = []
+
+        async def slow_fetch():
+            calls.append("leader")
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fetch():
+            calls.append("follower")
+            return {"routes": ["ok"]}
+
+        leader = asyncio.create_task(cache.get_or_fetch("driving", ORIGIN, DESTINATION, slow_fetch))
+        await started.wait()
+        follower = asyncio.create_task(cache.get_or_fetch("driving", ORIGIN, DESTINATION, fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        result = await asyncio.wait_for(follower, 1)
+
+        assert leader.cancelled()
+        assert result == {"routes": ["ok"]}
+        assert calls == ["leader", "follower"]
+        # Cached by the waiter that took over.
+        assert await cache.get_or_fetch("driving", ORIGIN, DESTINATION, slow_fetch) == {"routes": ["ok"]}
+
+    asyncio.run(scenario())
+
+
+def test_waiters_share_one_takeover_fetch():
+    async def scenario():
+        cache = RouteCache(Settings())
+        started = asyncio.Event()
+        fetches = 0
+
+        async def slow_fetch():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fetch():
+            nonlocal fetches
+            fetches += 1
+            await asyncio.sleep(0.01)
+            return fetches
+
+        leader = asyncio.create_task(cache.get_or_fetch("driving", ORIGIN, DESTINATION, slow_fetch))
+        await started.wait()
+        followers = [
+            asyncio.create_task(cache.get_or_fetch("driving", ORIGIN, DESTINATION, fetch))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*followers), 1)
+
+        assert results == [1] * 5
+        assert fetches == 1
+
+    asyncio.run(scenario())
+
+
+def test_leader_failure_reaches_waiters():
+    async def scenario():
+        cache = RouteCache(Settings())
+        started = asyncio.Event()
+
+        async def failing_fetch():
+            started.set()
+            await asyncio.sleep(0.01)
+            raise ValueError("provider down")
+
+        leader = asyncio.create_task(cache.get_or_fetch("driving", ORIGIN, DESTINATION, failing_fetch))
+        await started.wait()
+        follower = asyncio.create_task(cache.get_or_fetch("driving", ORIGIN, DESTINATION, failing_fetch))
+
+        for task in (leader, follower):
+            with pytest.raises(ValueError):
+                await task
+
+    asyncio.run(scenario())
+
+
+class UnreachableBackend(SharedCacheBackend):
+    errors = (ConnectionError,)
+
+    async def get(self, key):
+        raise ConnectionError("shared tier down")
+
+    async def set(self, key, value, ttl):
+        raise ConnectionError("shared tier down")
+
+
+def test_shared_tier_outage_falls_back_to_fetching():
+    async def scenario():
+        cache = RouteCache(Settings())
+        cache._shared = UnreachableBackend()
+
+        async def fetch():
+            return {"routes": ["ok"]}
+
+        assert await cache.get_or_fetch("driving", ORIGIN, DESTINATION, fetch) == {"routes": ["ok"]}
+        assert cache.misses == 1
+        # Still kept in the in-process tier.
+        assert await cache.get_or_fetch("driving", ORIGIN, DESTINATION, fetch) == {"routes": ["ok"]}
+        assert cache.hits == 1
+
+    asyncio.run(scenario())
+
+
+def test_shared_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SharedCacheBackend()
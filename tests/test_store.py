@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from app.core import haversine
+from app.core.store import RANGE_EDGES, FleetStore
+from app.schemas.coordinate import MAX_BATCH_NEIGHBOURS, NearestBatchRequest
+from app.services.scooter_service import ScooterService
+from configs.settings import Settings
+
+
+class FakeRepository:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+
+    async def get_positions(self):
+        return list(self.rows)
+
+
+def fleet(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        (f"scooter-{index}", round(40.40 + rng.uniform(-0.05, 0.05), 5), round(49.85 + rng.uniform(-0.05, 0.05), 5), rng.randint(0, 60000))
+        for index in range(count)
+    ]
+
+
+def brute_force(rows, latitude: float, longitude: float, k: int, min_range: float):
+    distances = sorted(
+        haversine.distance(latitude, longitude, row_latitude, row_longitude)
+        for _, row_latitude, row_longitude, meters in rows
+        if meters >= min_range
+    )
+    return distances[:k]
+
+
+def test_requirement_beyond_the_last_edge_is_answered_exactly():
+    async def scenario():
+        rows = fleet(500)
+        store = FleetStore(Settings(), FakeRepository(rows))
+        await store._reload()
+
+        for min_range in (RANGE_EDGES[-1] + 1, 45000, 59000, 61000):
+            found = store.layer(min_range).k_nearest(40.40, 49.85, 10)
+            assert [neighbour.distance for neighbour in found] == pytest.approx(brute_force(rows, 40.40, 49.85, 10, min_range))
+        assert store.layer(45000).size == sum(1 for row in rows if row[3] >= 45000)
+
+        # A range change that moves no layer still reaches the exact answer.
+        scooter_id, latitude, longitude, _ = next(row for row in rows if row[3] < 45000)
+        await store._apply([("upsert", [(scooter_id, latitude, longitude, 50000)])])
+        assert store.layer(45000).size == sum(1 for row in rows if row[3] >= 45000) + 1
+
+    asyncio.run(scenario())
+
+
+def test_nearest_batch_answers_every_point_off_the_loop():
+    async def scenario():
+        rows = fleet(300, seed=2)
+        store = FleetStore(Settings(), FakeRepository(rows))
+        await store._reload()
+        service = ScooterService(None, store)
+        points = [(40.40 + 0.01 * index, 49.85) for index in range(5)]
+
+        found = await service.get_nearby_many(points, 3, [0, 10000, 0, 45000, 20000])
+
+        for (latitude, longitude), min_range, neighbours in zip(points, [0, 10000, 0, 45000, 20000], found):
+            expected = brute_force(rows, latitude, longitude, 3, min_range)
+            assert [neighbour.distance for neighbour in neighbours] == [int(meters) for meters in expected]
+
+    asyncio.run(scenario())
+
+
+def test_nearest_batch_caps_points_times_k():
+    points = [{"latitude": 40.4, "longitude": 49.85}] * 2000
+    NearestBatchRequest(points=points, k=MAX_BATCH_NEIGHBOURS // 2000)
+    with pytest.raises(ValidationError):
+        NearestBatchRequest(points=points, k=MAX_BATCH_NEIGHBOURS // 2000 + 1)
+
+
+def assert_matches_brute_force(store: FleetStore, rows, rng: random.Random):
+    for edge in RANGE_EDGES:
+        layer = store.layer(edge)
+        assert layer.size == sum(1 for row in rows if row[3] >= edge)
+        for _ in range(5):
+            latitude, longitude = 40.40 + rng.uniform(-0.06, 0.06), 49.85 + rng.uniform(-0.06, 0.06)
+            found = layer.k_nearest(latitude, longitude, 5)
+            assert [neighbour.distance for neighbour in found] == pytest.approx(brute_force(rows, latitude, longitude, 5, edge))
+
+
+def test_applied_changes_and_reloads_match_brute_force():
+    async def scenario():
+        rng = random.Random(7)
+        rows = {row[0]: row for row in fleet(400, seed=3)}
+        repository = FakeRepository([])
+        repository.rows = rows.values()
+        store = FleetStore(Settings(), repository)
+        await store._reload()
+        assert_matches_brute_force(store, list(rows.values()), rng)
+
+        # Small batches stay in the overlays, the large one rebuilds the indexes.
+        for size in (1, 20, 200, 900):
+            changes = []
+            for _ in range(size):
+                scooter_id = f"scooter-{rng.randrange(600)}"
+                if scooter_id in rows and rng.random() < 0.3:
+                    del rows[scooter_id]
+                    changes.append(("delete", [(scooter_id, 0.0, 0.0, 0)]))
+                else:
+                    row = (scooter_id, round(40.40 + rng.uniform(-0.05, 0.05), 5), round(49.85 + rng.uniform(-0.05, 0.05), 5), rng.randint(0, 45000))
+                    rows[scooter_id] = row
+                    changes.append(("upsert", [row]))
+            await store._apply(changes)
+            assert_matches_brute_force(store, list(rows.values()), rng)
+
+        # A reload converges on the table even after changes it was not told about.
+        for scooter_id in list(rows)[:50]:
+            del rows[scooter_id]
+        await store._reload()
+        assert_matches_brute_force(store, list(rows.values()), rng)
+
+    asyncio.run(scenario())
+
+
+class UnreachableRepository:
+    def listen(self, channel, callback):
+        raise ConnectionError("listener down")
+
+    async def get_positions(self):
+        raise ConnectionError("database down")
+
+
+def test_listener_and_reload_failures_are_logged(caplog):
+    async def scenario():
+        store = FleetStore(Settings(FLEET_POLL_INTERVAL=0.01), UnreachableRepository())
+        store._task = asyncio.create_task(store._run())
+        await asyncio.sleep(0.05)
+        await store.aclose()
+
+    with caplog.at_level(logging.ERROR, logger="app.core.store"):
+        asyncio.run(scenario())
+
+    messages = {record.getMessage() for record in caplog.records}
+    assert messages == {"fleet listener failed", "fleet reload failed"}
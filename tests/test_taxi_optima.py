@@ -0,0 +1,179 @@
+import asyncio
+import random
+from collections import Counter
+
+import httpx
+import pytest
+
+from app.core import haversine, polyline
+from app.core.http_client import HttpClient
+from app.core.metrics import Metrics
+from app.core.route_cache import RouteCache
+from app.core.tracing import Tracer
+from app.schemas.taxi_optima import TaxiOptimaRequest
+from app.services.google_maps import GoogleMapsService
+from app.services.taxi_optima import TaxiOptimaService
+from configs.settings import Settings
+
+
+USER = (40.4093, 49.8671)
+DESTINATION = (40.3777, 49.8920)
+SPEEDS = {"driving": 8.0, "walking": 1.4}
+
+
+class FakeProvider:
+    """
+    Google Maps stand-in behind httpx.MockTransport. Durations follow the
+    straight-line distance, so every API agrees on which pickup point is
+    best; upstream calls are counted per endpoint.
+    """
+
+    def __init__(self, candidates: int) -> None:
+        rng = random.Random(candidates)
+        self.places = [
+            (USER[0] + rng.uniform(-0.002, 0.002), USER[1] + rng.uniform(-0.002, 0.002))
+            for _ in range(candidates)
+        ]
+        self.calls = Counter()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path.rsplit("/", 2)[-2]
+        self.calls[endpoint] += 1
+        params = request.url.params
+
+        if endpoint == "geocode":
+            results = [_place(USER)]
+        elif endpoint == "nearbysearch":
+            results = [_place(point) for point in self.places]
+        elif endpoint == "distancematrix":
+            rows = [
+                {"elements": [_element(origin, destination, params["mode"]) for destination in params["destinations"].split("|")]}
+                for origin in params["origins"].split("|")
+            ]
+            return httpx.Response(200, json={"status": "OK", "rows": rows})
+        else:
+            return httpx.Response(200, json={"status": "OK", "routes": [_route(params["origin"], params["destination"], params["mode"])]})
+        return httpx.Response(200, json={"status": "OK", "results": results})
+
+
+def _point(location: str):
+    return tuple(float(part) for part in location.split(","))
+
+
+def _place(point) -> dict:
+    return {"geometry": {"location": {"lat": point[0], "lng": point[1]}}}
+
+
+def _measure(origin: str, destination: str, mode: str):
+    meters = haversine.distance(*_point(origin), *_point(destination))
+    return int(meters), int(meters / SPEEDS[mode])
+
+
+def _element(origin: str, destination: str, mode: str) -> dict:
+    meters, seconds = _measure(origin, destination, mode)
+    return {
+        "status": "OK",
+        "distance": {"text": f"{meters} m", "value": meters},
+        "duration": {"text": f"{seconds} s", "value": seconds},
+    }
+
+
+def _route(origin: str, destination: str, mode: str) -> dict:
+    meters, seconds = _measure(origin, destination, mode)
+    leg = {
+        "distance": {"text": f"{meters} m", "value": meters},
+        "duration": {"text": f"{seconds} s", "value": seconds},
+        "steps": [{"html_instructions": "Head south", "distance": {"text": f"{meters} m"}, "duration": {"text": f"{seconds} s"}}],
+    }
+    return {"legs": [leg], "overview_polyline": {"points": polyline.encode([_point(origin), _point(destination)])}}
+
+
+def taxi_service(mode: str, provider: FakeProvider) -> TaxiOptimaService:
+    settings = Settings(TAXI_OPTIMA_MODE=mode)
+    tracer = Tracer(settings)
+    http_client = HttpClient(settings, Metrics(), tracer)
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(provider.handle))
+    maps = GoogleMapsService(settings, http_client, RouteCache(settings), tracer)
+
+    service = TaxiOptimaService(settings, maps, tracer)
+    # The taxi position is random in the service; fixed here so both modes
+    # solve the same problem.
+    service.taxi_coordinates_generator = lambda longitude, latitude: (longitude + 0.004, latitude - 0.003)
+    return service
+
+
+def request_taxi(service: TaxiOptimaService):
+    return asyncio.run(service.request_taxi_optima(TaxiOptimaRequest(
+        user_latitude=USER[0],
+        user_longitude=USER[1],
+        destination_latitude=DESTINATION[0],
+        destination_longitude=DESTINATION[1],
+    )))
+
+
+@pytest.mark.parametrize("candidates", [3, 8, 20])
+def test_matrix_mode_picks_the_same_pickup_point_as_directions(candidates):
+    by_directions = request_taxi(taxi_service("directions", FakeProvider(candidates)))
+    by_matrix = request_taxi(taxi_service("matrix", FakeProvider(candidates)))
+
+    assert (by_matrix.optimal_start_latitude, by_matrix.optimal_start_longitude) == (
+        by_directions.optimal_start_latitude,
+        by_directions.optimal_start_longitude,
+    )
+    assert by_matrix.trip_duration == pytest.approx(by_directions.trip_duration)
+
+
+def test_matrix_mode_upstream_calls_do_not_grow_with_candidates():
+    calls = []
+    for candidates in (3, 8, 20):
+        provider = FakeProvider(candidates)
+        request_taxi(taxi_service("matrix", provider))
+        calls.append(dict(provider.calls))
+
+    # Geocode, places, three matrices and the winner's three legs.
+    assert calls == [{"geocode": 1, "nearbysearch": 1, "distancematrix": 3, "directions": 3}] * 3
+
+
+def test_follow_up_directions_come_from_the_fetched_memo():
+    service = taxi_service("matrix", FakeProvider(8))
+    requested = []
+    directions = service.maps.directions
+
+    async def counting_directions(origin, destination, mode="driving", departure_time="now"):
+        requested.append((origin, destination, mode))
+        return await directions(origin, destination, mode, departure_time)
+
+    service.maps.directions = counting_directions
+    response = request_taxi(service)
+
+    # Only the winner's three legs; the follow-up reuses them.
+    assert len(requested) == 3
+    assert len(set(requested)) == 3
+    assert response.instructions and response.coordinates and response.taxi_coming_coordinates
+
+
+def test_coordinates_are_simplified_only_for_a_requested_zoom():
+    service = taxi_service("matrix", FakeProvider(8))
+    detailed = polyline.encode([(USER[0] + 0.0001 * i, USER[1] + 0.00001 * (i % 3)) for i in range(100)])
+    service.maps.directions = _with_polyline(service.maps.directions, detailed)
+
+    full = request_taxi(service)
+    assert [tuple(point) for point in full.coordinates] == polyline.decode(detailed)
+    assert full.pickup_to_dest_polyline == detailed
+
+    zoomed = asyncio.run(service.request_taxi_optima(TaxiOptimaRequest(
+        user_latitude=USER[0],
+        user_longitude=USER[1],
+        destination_latitude=DESTINATION[0],
+        destination_longitude=DESTINATION[1],
+        zoom=12,
+    )))
+    assert len(zoomed.coordinates) < len(full.coordinates)
+    assert zoomed.pickup_to_dest_polyline == polyline.simplify_encoded(detailed, 12)
+
+
+def _with_polyline(directions, encoded: str):
+    async def replaced(*args, **kwargs):
+        routes = await directions(*args, **kwargs)
+        return [{**route, "overview_polyline": {"points": encoded}} for route in routes]
+    return replaced
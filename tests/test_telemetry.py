@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from uuid import uuid4
+
+import pytest
+
+from app.core.telemetry import TelemetryWriter
+from app.exceptions.infrastructure import TelemetryBackpressureError, TelemetryBatchTooLargeError
+from configs.settings import Settings
+
+
+class FailingRepository:
+    async def upsert_positions(self, rows):
+        raise ConnectionError("database down")
+
+
+def reading():
+    return (uuid4(), 40.4, 49.85, 80, 32000)
+
+
+def test_batch_larger_than_the_queue_is_refused_outright():
+    async def scenario():
+        writer = TelemetryWriter(Settings(TELEMETRY_QUEUE_SIZE=10), FailingRepository())
+        with pytest.raises(TelemetryBatchTooLargeError):
+            writer.offer([reading() for _ in range(11)])
+
+        writer.offer([reading() for _ in range(6)])
+        # A batch that fits the queue but not its free room is still retryable.
+        with pytest.raises(TelemetryBackpressureError):
+            writer.offer([reading() for _ in range(10)])
+        await writer.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flushes_are_logged(caplog):
+    async def scenario():
+        writer = TelemetryWriter(Settings(TELEMETRY_FLUSH_INTERVAL=0.01), FailingRepository())
+        writer.offer([reading() for _ in range(3)])
+        await asyncio.sleep(0.05)
+        await writer.aclose()
+        return writer
+
+    with caplog.at_level(logging.ERROR, logger="app.core.telemetry"):
+        writer = asyncio.run(scenario())
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert "telemetry flush failed" in messages
+    assert messages[-1] == "telemetry flush on shutdown failed"
+    assert all(record.exc_info[0] is ConnectionError for record in caplog.records)
+    assert writer.failed_flushes == len(messages)